@@ -2,7 +2,7 @@
 Application configuration using Pydantic Settings
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -23,6 +23,78 @@ class Settings(BaseSettings):
     
     # AI Configuration
     gemini_api_key: str
+    ai_backend: str = "gemini"  # "gemini", or "fake" for offline load tests and CI
+    ai_fake_latency_ms: float = 800.0  # Median latency of the fake backend
+    ai_fake_latency_spread_ms: float = 400.0  # Latency spread of the fake backend
+    ai_fake_latency_distribution: str = "lognormal"  # "fixed", "uniform" or "lognormal"
+    ai_fake_error_rate: float = 0.0  # Fraction of fake backend calls that fail
+    ai_fake_stream_chunk_chars: int = 40  # Characters per streamed chunk from the fake backend
+    ai_fake_seed: Optional[int] = None  # Seed for reproducible fake backend runs
+    ai_max_in_flight: int = 8  # Concurrent Gemini calls allowed per worker
+    ai_thread_pool_size: int = 8  # Dedicated threads for blocking Gemini SDK calls
+    ai_request_timeout_seconds: float = 30.0  # Default per-call timeout
+    ai_emergency_reserved_slots: int = 2  # In-flight Gemini slots reserved for likely emergencies
+    ai_background_max_in_flight: int = 3  # In-flight Gemini slots usable by summaries and directory lookups
+    ai_adaptive_timeout_min_seconds: float = 5.0  # Floor for the p95-derived timeout
+    ai_adaptive_timeout_multiplier: float = 2.0  # Adaptive timeout = multiplier x observed p95 latency
+    ai_breaker_window_seconds: float = 60.0  # Rolling window for the Gemini error rate
+    ai_breaker_min_calls: int = 10  # Calls in the window before the breaker may open
+    ai_breaker_error_threshold: float = 0.5  # Error rate that opens the breaker
+    ai_breaker_open_seconds: float = 30.0  # How long the breaker stays open before probing
+    ai_breaker_half_open_calls: int = 1  # Probe calls allowed while half-open
+    ai_retry_default_attempts: int = 2  # Attempts per Gemini call for endpoints without a policy
+    ai_retry_policies: str = "symptom_check:3:hedge,symptom_followup:3:hedge,vet_question:3:hedge,pet_summary:4,followup_summary:4,climate_context:2,vet_directory:3"  # endpoint:attempts[:hedge], comma-separated
+    ai_retry_base_delay_seconds: float = 0.5  # Backoff ceiling before the first retry (doubles per attempt, full jitter)
+    ai_retry_max_delay_seconds: float = 8.0  # Largest backoff ceiling
+    ai_retry_deadline_seconds: float = 60.0  # No retry starts later than this after the first attempt
+    ai_retry_budget_ratio: float = 0.1  # Retries and hedges allowed per Gemini call, across all endpoints
+    ai_retry_budget_min_per_second: float = 0.5  # Retries allowed per second regardless of traffic
+    ai_hedge_min_delay_seconds: float = 1.0  # Shortest wait before a hedged duplicate request
+    ai_cache_enabled: bool = True  # Cache parsed symptom analyses
+    ai_cache_max_entries: int = 512  # In-process LRU tier size
+    ai_cache_ttl_seconds: int = 21600  # 6 hours
+    ai_cache_mongo_enabled: bool = False  # Shared MongoDB tier with TTL index
+    vet_directory_fresh_seconds: int = 604800  # Serve cached clinic lists without revalidation for 7 days
+    vet_directory_max_age_seconds: int = 2592000  # Drop cached clinic lists after 30 days
+    image_pipeline_enabled: bool = True  # Downscale and re-encode uploads before sending to Gemini
+    image_pipeline_workers: int = 2  # Worker processes for image preprocessing
+    image_max_edge: int = 1536  # Longest image edge in pixels sent to Gemini
+    image_jpeg_quality: int = 85  # JPEG quality for re-encoded images
+    media_backend: str = "gridfs"  # Uploaded media storage: "gridfs" or "local"
+    media_local_root: str = "media"  # Directory for the local media backend
+    media_thumbnail_edge: int = 256  # Longest edge in pixels of thumbnails stored on symptom checks
+    media_thumbnail_quality: int = 70  # JPEG quality of stored thumbnails
+    prompt_budget_symptom_check_chars: int = 4000  # Case prompt size before older history is dropped (0 = no limit)
+    prompt_budget_pet_summary_chars: int = 6000  # Summary prompt size before older history is dropped
+    prompt_budget_symptom_followup_chars: int = 6000  # Follow-up prompt size before older conversation is dropped
+    prompt_budget_vet_question_chars: int = 8000  # Clinic question prompt size (recorded only)
+    followup_window_turns: int = 6  # Follow-up turns sent verbatim before older ones are folded into a summary
+    
+    # Rate Limiting Configuration
+    rate_limit_enabled: bool = True  # Token-bucket limits on AI endpoints
+    rate_limit_capacity: float = 20.0  # Burst size in tokens (a symptom check costs 3)
+    rate_limit_refill_per_minute: float = 10.0  # Tokens added to each client's bucket per minute
+    ai_max_concurrent_per_client: int = 2  # AI requests one client may have in flight
+    
+    # Background Jobs Configuration
+    job_workers: int = 2  # Worker tasks per app process for the MongoDB job queue
+    job_max_attempts: int = 3  # Attempts before a job is marked failed
+    job_poll_interval_seconds: float = 2.0  # How often idle workers look for new jobs
+    job_lease_seconds: float = 120.0  # Claim duration before a crashed worker's job is picked up again
+    job_retry_backoff_seconds: float = 5.0  # Delay before the first retry (doubles per attempt)
+    job_retention_days: int = 7  # How long finished jobs are kept
+    pet_summary_wait_seconds: float = 25.0  # How long the summary endpoint waits when no summary exists yet
+    season_refresh_enabled: bool = True  # Regenerate season-stale pet summaries off-peak in the app
+    season_refresh_concurrency: int = 2  # Summaries regenerated at the same time by the season refresh
+    season_refresh_max_per_minute: float = 20.0  # Summaries the season refresh starts per minute
+    season_refresh_window_start_hour: int = 1  # Local hour the off-peak refresh window opens
+    season_refresh_window_end_hour: int = 6  # Local hour the off-peak refresh window closes
+    
+    # Index Configuration
+    index_startup_build_max_documents: int = 100000  # Larger collections get missing indexes from manage_indexes.py, not at startup
+    
+    # Admin Configuration
+    admin_api_key: Optional[str] = None  # Enables /api/v1/admin endpoints via the X-Admin-Key header
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,83 @@
+"""
+Keyword table for the offline symptom triage fallback
+"""
+from typing import Dict, List
+
+
+# Category -> canonical keyword -> phrases that count as that keyword.
+# Phrases are matched case-insensitively on word boundaries; whitespace inside
+# a phrase matches any run of whitespace.
+TRIAGE_KEYWORDS: Dict[str, Dict[str, List[str]]] = {
+    "emergency": {
+        "bleeding": ["bleeding", "bleeds", "bled", "hemorrhage", "haemorrhage", "hemorrhaging"],
+        "blood": ["blood", "bloody", "blood in stool", "blood in urine", "vomiting blood", "coughing blood"],
+        "seizure": ["seizure", "seizures", "seizing", "fits", "fitting"],
+        "unconscious": ["unconscious", "passed out", "fainted", "fainting"],
+        "collapse": ["collapse", "collapsed", "collapsing"],
+        "difficulty breathing": [
+            "difficulty breathing", "trouble breathing", "struggling to breathe",
+            "labored breathing", "laboured breathing", "gasping", "can't breathe", "cannot breathe"
+        ],
+        "choking": ["choking", "choked"],
+        "poisoning": ["poisoning", "poisoned", "poison", "ate rat poison", "antifreeze"],
+        "toxic": ["toxic", "toxin", "ate chocolate", "ate grapes", "ate raisins", "ate xylitol"],
+        "severe pain": ["severe pain", "extreme pain", "screaming in pain", "crying in pain"],
+        "trauma": ["trauma", "head injury", "deep wound"],
+        "accident": ["accident", "hit by", "run over", "fell from", "fall from height", "dog bite", "attacked"],
+        "broken bone": ["broken bone", "broken leg", "fracture", "fractured"],
+        "not breathing": ["not breathing", "stopped breathing"],
+        "unresponsive": ["unresponsive", "not responding", "won't wake up"],
+        "convulsion": ["convulsion", "convulsions", "convulsing"],
+        "bloat": ["bloat", "bloated", "gdv", "twisted stomach"],
+        "pale gums": ["pale gums", "white gums"],
+        "blue gums": ["blue gums", "purple gums", "blue tongue"],
+        "distended abdomen": ["distended abdomen", "swollen belly", "swollen abdomen", "hard belly"],
+        "straining to urinate": ["straining to urinate", "can't urinate", "cannot urinate", "unable to urinate", "no urine"]
+    },
+    "urgent": {
+        "vomiting": ["vomiting", "vomit", "vomited", "vomits", "throwing up", "threw up", "puking"],
+        "diarrhea": ["diarrhea", "diarrhoea", "loose stool", "loose stools", "watery stool", "runny poop"],
+        "not eating": [
+            "not eating", "won't eat", "refusing food", "refuses food", "stopped eating",
+            "hasn't eaten", "hasn't been eating", "off food"
+        ],
+        "lethargic": ["lethargic", "lethargy", "very tired", "no energy", "weak", "weakness"],
+        "fever": ["fever", "feverish", "high temperature", "hot ears"],
+        "limping": ["limping", "limp", "lame", "lameness", "not putting weight"],
+        "swelling": ["swelling", "swollen", "lump"],
+        "discharge": ["discharge", "pus", "oozing"],
+        "coughing": ["coughing", "cough", "coughs", "hacking"],
+        "sneezing": ["sneezing", "sneeze", "sneezes"],
+        "scratching excessively": ["scratching excessively", "constant scratching", "scratching a lot", "itching constantly"],
+        "loss of appetite": ["loss of appetite", "poor appetite", "reduced appetite", "no appetite"],
+        "dehydrated": ["dehydrated", "dehydration", "dry gums"],
+        "painful": ["painful", "in pain", "hurts", "yelping"],
+        "whining": ["whining", "whimpering", "crying"],
+        "restless": ["restless", "pacing", "can't settle"],
+        "rapid breathing": ["rapid breathing", "fast breathing", "heavy panting", "panting heavily"]
+    },
+    "monitor": {
+        "mild": ["mild", "mildly"],
+        "slight": ["slight", "slightly"],
+        "occasional": ["occasional", "occasionally", "once or twice"],
+        "sometimes": ["sometimes", "now and then"],
+        "minor": ["minor"],
+        "small": ["small"],
+        "little": ["little", "a little"],
+        "bit": ["bit", "a bit"]
+    },
+    "persistent": {
+        "days": ["days", "since yesterday"],
+        "weeks": ["week", "weeks", "fortnight"],
+        "months": ["month", "months"],
+        "persistent": ["persistent", "persisting", "continuous", "continuously", "constant", "ongoing", "chronic", "recurring", "keeps coming back"]
+    }
+}
+
+# Words that negate a keyword appearing shortly after them ("no vomiting",
+# "isn't limping"). Any token ending in "n't" also counts as a negation.
+NEGATION_CUES: List[str] = ["no", "not", "never", "without", "denies", "nor", "neither", "none", "absent"]
+
+# Number of words before a keyword searched for a negation cue. Negation never
+# reaches across punctuation or contrast words such as "but".
+NEGATION_WINDOW = 3
@@ -7,13 +7,23 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
-from typing import Dict
+from typing import Dict, Any
 import logging
 
 from app.config import settings
 from app.database import connect_to_mongo, close_mongo_connection, get_database
-from app.routes import auth, pets, symptom_checks, providers, recommendations
+from app.routes import auth, pets, symptom_checks, providers, recommendations, admin, media
 from app.services.seed_data import seed_providers
+from app.services.ai_service import ai_service
+from app.services.pet_context import pet_context_builder
+from app.services.job_queue import job_queue
+from app.services.pet_summary import PET_SUMMARY_JOB, run_pet_summary_job
+from app.services.followup_session import FOLLOWUP_SUMMARY_JOB, run_followup_summary_job
+from app.services.season_refresh import season_refresher
+from app.services.media_store import media_store
+from app.services.index_registry import index_registry
+from app.services.health_stats import health_stats
+from app.utils.rate_limit import rate_limiter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,8 +44,28 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"[WARNING] Failed to seed providers: {e}")
     
+    # Create missing declared indexes and report drift (large collections are left to manage_indexes.py)
+    try:
+        await index_registry.apply()
+    except Exception as e:
+        print(f"[WARNING] Failed to apply indexes: {e}")
+    
+    # Start the background job workers
+    job_queue.register(PET_SUMMARY_JOB, run_pet_summary_job)
+    job_queue.register(FOLLOWUP_SUMMARY_JOB, run_followup_summary_job)
+    job_queue.start()
+    
+    # Refresh summaries made stale by a season change during the off-peak window
+    if settings.season_refresh_enabled:
+        season_refresher.start()
+    
     yield
-    # Shutdown: Close MongoDB connection
+    # Shutdown: Stop the background workers, release the Gemini worker threads and image workers,
+    # then close MongoDB connection
+    await season_refresher.stop()
+    await job_queue.stop()
+    ai_service.executor.shutdown()
+    ai_service.image_pipeline.shutdown()
     await close_mongo_connection()
 
 
@@ -54,6 +84,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Symptom check history pagination
 )
 
 # Add custom exception handler for validation errors
@@ -88,16 +119,27 @@ app.include_router(pets.router)
 app.include_router(symptom_checks.router)
 app.include_router(providers.router)
 app.include_router(recommendations.router)
+app.include_router(admin.router)
+app.include_router(media.router)
 
 
 @app.get("/api/v1/healthz", tags=["Health"])
-async def health_check() -> Dict[str, str]:
+async def health_check() -> Dict[str, Any]:
     """
     Health check endpoint that verifies MongoDB connection
     
+    Also reports the Gemini circuit breaker so load balancers can see when
+    symptom analyses are being served by the keyword fallback.
+    
     Returns:
-        Dict with status and database connection state
+        Dict with status, database connection state and AI circuit state
     """
+    breaker = ai_service.circuit_breaker.stats()
+    ai_status = {
+        "circuit": breaker["state"],
+        "retryInSeconds": breaker["retryInSeconds"]
+    }
+    
     try:
         # Verify database connection by pinging
         db = get_database()
@@ -105,16 +147,40 @@ async def health_check() -> Dict[str, str]:
         
         return {
             "status": "healthy",
-            "database": "connected"
+            "database": "connected",
+            "ai": ai_status
         }
     except Exception as e:
         return {
             "status": "unhealthy",
             "database": "disconnected",
+            "ai": ai_status,
             "error": str(e)
         }
 
 
+@app.get("/api/v1/metrics", tags=["Health"])
+async def get_metrics() -> Dict[str, Any]:
+    """
+    Runtime metrics for the AI execution layer
+    
+    Returns:
+        Dict with executor concurrency, call and cache counters, rate limit counters
+        pet context assembly timings, background job and media store counters
+        the outcome of the startup index check and pet/user statistics reads
+    """
+    return {
+        "ai": ai_service.stats(),
+        "rateLimits": rate_limiter.stats(),
+        "petContext": pet_context_builder.stats(),
+        "jobs": job_queue.stats(),
+        "seasonRefresh": season_refresher.stats(),
+        "media": media_store.stats(),
+        "indexes": index_registry.stats(),
+        "healthStats": health_stats.stats()
+    }
+
+
 @app.get("/", tags=["Root"])
 async def root() -> Dict[str, str]:
     """
@@ -7,6 +7,8 @@ from datetime import datetime
 from bson import ObjectId
 from enum import Enum
 
+from app.models.provider import ProviderResponse
+
 
 class HealthCategory(str, Enum):
     """Health category enumeration"""
@@ -47,6 +49,18 @@ class ChatMessage(BaseModel):
     options: Optional[List[Dict[str, str]]] = None
 
 
+class MediaReference(BaseModel):
+    """Uploaded image or video kept in the media store"""
+    hash: str  # SHA-256 of the bytes
+    kind: str  # 'image' or 'video'
+    mime_type: str = Field(alias="mimeType")
+    bytes: int
+    url: str  # GET path serving the original
+    thumbnail: Optional[str] = None  # Small JPEG data URL, images only
+
+    model_config = {"populate_by_name": True}
+
+
 class SymptomCheckBase(BaseModel):
     """Base symptom check model"""
     pet_id: Optional[str] = Field(None, alias="petId")
@@ -101,6 +115,7 @@ class SymptomCheckInDB(SymptomCheckBase):
     immediate_actions: List[str] = Field(alias="immediateActions")
     reasoning: str
     messages: Optional[List[ChatMessage]] = Field(default_factory=list)  # Complete chat history
+    media: List[MediaReference] = Field(default_factory=list)  # Uploads, moved out of images/video into the media store
     feedback: Optional[FeedbackType] = None
     feedback_reason: Optional[str] = Field(None, alias="feedbackReason")
     resolved: bool = False  # Flag to indicate if the concern has been addressed
@@ -128,11 +143,13 @@ class SymptomCheckResponse(BaseModel):
     immediate_actions: List[str] = Field(alias="immediateActions")
     reasoning: str
     messages: Optional[List[ChatMessage]] = Field(default_factory=list)  # Complete chat history
+    media: List[MediaReference] = Field(default_factory=list)  # Uploaded photos and video
     feedback: Optional[FeedbackType] = None
     feedback_reason: Optional[str] = Field(None, alias="feedbackReason")
     resolved: bool = False  # Flag to indicate if the concern has been addressed
     resolved_at: Optional[datetime] = Field(None, alias="resolvedAt")  # When it was marked as resolved
     timestamp: datetime
+    emergency_providers: Optional[List[ProviderResponse]] = Field(None, alias="emergencyProviders")  # Nearest 24x7 clinics, emergencies only
     disclaimer: str = "This AI assessment is for informational purposes only and does not replace professional veterinary advice. Always consult a licensed veterinarian for medical concerns."
 
     model_config = {
@@ -162,6 +179,26 @@ class SymptomCheckResponse(BaseModel):
     }
 
 
+class SymptomCheckListItem(BaseModel):
+    """Symptom check as listed in history; chat, media and detailed sections come from GET /{check_id}"""
+    id: str
+    user_id: Optional[str] = Field(None, alias="userId")
+    pet_id: Optional[str] = Field(None, alias="petId")
+    category: HealthCategory
+    health_subcategory: Optional[str] = Field(None, alias="healthSubcategory")
+    symptoms: Optional[str] = None
+    risk_level: RiskLevel = Field(alias="riskLevel")
+    summary: str
+    immediate_actions: List[str] = Field(default_factory=list, alias="immediateActions")
+    media_count: int = Field(0, alias="mediaCount")
+    feedback: Optional[FeedbackType] = None
+    resolved: bool = False
+    resolved_at: Optional[datetime] = Field(None, alias="resolvedAt")
+    timestamp: datetime
+
+    model_config = {"populate_by_name": True}
+
+
 class SymptomCheckFeedback(BaseModel):
     """Model for submitting feedback on symptom check"""
     feedback: FeedbackType
@@ -0,0 +1,57 @@
+"""
+Administrative maintenance routes
+"""
+from fastapi import APIRouter, HTTPException, status, Query, Depends
+from typing import Dict, Any, Optional
+
+from app.utils.dependencies import require_admin
+from app.services.ai_service import ai_service
+
+
+router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)]
+)
+
+
+@router.delete("/vet-directory-cache")
+async def purge_vet_directory_cache(
+    pincode: Optional[str] = Query(None, description="Purge entries for this pin code only"),
+    city: Optional[str] = Query(None, description="Purge entries for this city only")
+) -> Dict[str, Any]:
+    """
+    Purge cached AI vet directory lookups
+    
+    With no parameters every entry is deleted. Otherwise only entries for the
+    given pin code or city (across all limits) are deleted.
+    
+    Query Parameters:
+        - pincode: Pin code to purge (optional)
+        - city: City to purge (optional)
+    
+    Returns:
+        Dict with number of entries deleted
+    
+    Raises:
+        HTTPException: If both pincode and city are provided
+    """
+    if pincode and city:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either pincode or city, not both"
+        )
+    
+    if pincode:
+        deleted = await ai_service.vet_directory_cache.purge("pincode", pincode)
+    elif city:
+        deleted = await ai_service.vet_directory_cache.purge("city", city)
+    else:
+        deleted = await ai_service.vet_directory_cache.purge()
+    
+    return {
+        "message": "Vet directory cache purged",
+        "deleted": deleted,
+        "pincode": pincode,
+        "city": city
+    }
@@ -0,0 +1,127 @@
+"""
+Media routes serving uploaded images and videos from the media store
+"""
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional, Tuple
+import logging
+
+from app.services.media_store import media_store, is_media_hash, MediaNotFoundError
+
+logger = logging.getLogger(__name__)
+
+
+router = APIRouter(prefix="/api/v1/media", tags=["Media"])
+
+# Content never changes for a hash, so clients may cache it indefinitely
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header
+
+    Args:
+        header: Range header value, e.g. "bytes=0-1023", "bytes=500-" or "bytes=-500"
+        size: Blob size in bytes
+
+    Returns:
+        Inclusive (start, end), or None to send the whole blob (no header,
+        another unit, or several ranges)
+
+    Raises:
+        HTTPException: 416 if the range can't be satisfied
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    start_text, _, end_text = header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(end_text), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end or size == 0:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
+
+
+@router.get("/{media_hash}")
+async def get_media(media_hash: str, request: Request) -> Response:
+    """
+    Serve an uploaded image or video by its SHA-256 hash
+
+    Supports single byte ranges (for video seeking) and conditional
+    requests. Media URLs are unguessable content hashes handed out only on
+    the owning symptom check, so they are served without authentication,
+    which lets <img> and <video> tags load them directly.
+
+    Args:
+        media_hash: SHA-256 hex digest of the media
+
+    Returns:
+        The media bytes (206 for a range request)
+
+    Raises:
+        HTTPException: If the hash is malformed, unknown (or its blob is missing)
+            or the range is invalid
+    """
+    if not is_media_hash(media_hash):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid media hash"
+        )
+
+    meta = await media_store.get(media_hash)
+    if not meta:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Media not found"
+        )
+
+    etag = f'"{media_hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Accept-Ranges": "bytes"
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    size = meta["bytes"]
+    byte_range = _parse_range(request.headers.get("range"), size)
+    if byte_range is None:
+        start, end = 0, size - 1
+        status_code = status.HTTP_200_OK
+    else:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    # Fail with a 404 while no headers have been sent if the blob itself is gone
+    try:
+        body = await media_store.open(media_hash, start, end - start + 1)
+    except MediaNotFoundError:
+        logger.warning(f"Media {media_hash} has stored metadata but no blob in the backend")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Media not found"
+        )
+
+    return StreamingResponse(
+        body,
+        status_code=status_code,
+        media_type=meta["mimeType"],
+        headers=headers
+    )
@@ -11,10 +11,13 @@ from app.models.medical_history import MedicalHistoryCreate, MedicalHistoryRespo
 from app.models.user import UserInDB
 from app.utils.dependencies import get_current_user
 from app.database import get_database
+from app.services.health_stats import health_stats
 
 
 router = APIRouter(prefix="/api/v1/pets", tags=["Pets"])
 
+MAX_PETS_PER_USER = 10
+
 
 @router.post("/", response_model=PetResponse, status_code=status.HTTP_201_CREATED)
 async def create_pet(
@@ -45,12 +48,11 @@ async def create_pet(
     print(f"Type of conditions: {type(pet_data.conditions)}")
     print(f"Type of allergies: {type(pet_data.allergies)}")
     
-    # Check if user has reached max pets limit
-    pet_count = await db.pets.count_documents({"userId": str(current_user.id)})
-    if pet_count >= 10:
+    # Count the new pet against the user's limit (released again if the insert fails)
+    if not await health_stats.reserve_pet(db, str(current_user.id), MAX_PETS_PER_USER):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Maximum of 10 pets allowed per user"
+            detail=f"Maximum of {MAX_PETS_PER_USER} pets allowed per user"
         )
     
     # Create pet document
@@ -74,7 +76,11 @@ async def create_pet(
     print(f"Final pet_dict to be inserted into database: {pet_dict}")
     print("=" * 80)
     
-    result = await db.pets.insert_one(pet_dict)
+    try:
+        result = await db.pets.insert_one(pet_dict)
+    except Exception:
+        await health_stats.release_pet(db, str(current_user.id))
+        raise
     pet_id = str(result.inserted_id)
     
     # Get created pet
@@ -341,7 +347,9 @@ async def delete_pet(
         )
     
     # Delete pet
-    await db.pets.delete_one({"_id": ObjectId(pet_id)})
+    result = await db.pets.delete_one({"_id": ObjectId(pet_id)})
+    if result.deleted_count:
+        await health_stats.release_pet(db, pet["userId"])
     
     # Delete associated medical history
     await db.medical_history.delete_many({"petId": pet_id})
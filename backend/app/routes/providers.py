@@ -8,6 +8,7 @@ from bson import ObjectId
 from app.models.provider import ProviderResponse
 from app.database import get_database
 from app.utils.geo import haversine_distance
+from app.services.provider_search import find_nearest_emergency_providers
 
 
 router = APIRouter(prefix="/api/v1/providers", tags=["Providers"])
@@ -193,43 +194,4 @@ async def get_nearest_emergency_providers(
     Returns:
         List[ProviderResponse]: List of nearest 24x7 providers
     """
-    db = get_database()
-    
-    # Get all 24x7 providers
-    cursor = db.providers.find({"is24x7": True})
-    providers = await cursor.to_list(length=None)
-    
-    # Calculate distances and filter by radius
-    provider_responses = []
-    for provider in providers:
-        distance = haversine_distance(
-            latitude,
-            longitude,
-            provider["latitude"],
-            provider["longitude"]
-        )
-        
-        # Only include providers within radius
-        if distance <= radius:
-            provider_responses.append(
-                ProviderResponse(
-                    id=str(provider["_id"]),
-                    name=provider["name"],
-                    phone=provider["phone"],
-                    address=provider["address"],
-                    city=provider["city"],
-                    state=provider["state"],
-                    latitude=provider["latitude"],
-                    longitude=provider["longitude"],
-                    operatingHours=provider["operatingHours"],
-                    rating=provider["rating"],
-                    is24x7=provider["is24x7"],
-                    services=provider.get("services", []),
-                    distance=distance
-                )
-            )
-    
-    # Sort by distance (nearest first)
-    provider_responses.sort(key=lambda p: p.distance if p.distance is not None else float('inf'))
-    
-    return provider_responses
\ No newline at end of file
+    return await find_nearest_emergency_providers(latitude, longitude, radius)
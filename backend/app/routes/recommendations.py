@@ -2,15 +2,29 @@
 Health recommendations and alerts routes
 """
 from fastapi import APIRouter, HTTPException, status, Query, Depends
+from fastapi.responses import JSONResponse
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from bson import ObjectId
+import asyncio
+import json
 
 from app.data.breed_tips import get_breed_tips, get_all_breeds
 from app.models.user import UserInDB
-from app.utils.dependencies import get_current_user
+from app.utils.dependencies import get_current_user, get_current_user_optional
+from app.utils.rate_limit import rate_limit
 from app.database import get_database
 from app.services.ai_service import ai_service
+from app.services.prompts import SYMPTOM_FOLLOWUP_INSTRUCTION, VET_QUESTION_INSTRUCTION
+from app.config import settings
+from app.services.job_queue import job_queue, serialize_job, QUEUED, RUNNING, SUCCEEDED, FAILED
+from app.services.followup_session import append_followup_turn, build_followup_prompt, load_followup_session
+from app.services.pet_summary import (
+    PET_SUMMARY_JOB,
+    cached_summary_response,
+    load_summary_inputs,
+    pet_summary_job_key
+)
 
 
 router = APIRouter(prefix="/api/v1/recommendations", tags=["Recommendations"])
@@ -345,7 +359,7 @@ async def get_personalized_recommendations(
     }
 
 
-@router.get("/vets/by-pincode")
+@router.get("/vets/by-pincode", dependencies=[Depends(rate_limit("vet_lookup"))])
 async def get_vets_by_pincode(
     pincode: str = Query(..., description="Indian postal code (6 digits)", regex="^[1-9][0-9]{5}$"),
     limit: int = Query(10, ge=1, le=50, description="Number of clinics to return (1-50)")
@@ -382,7 +396,7 @@ async def get_vets_by_pincode(
         )
 
 
-@router.get("/vets/by-city")
+@router.get("/vets/by-city", dependencies=[Depends(rate_limit("vet_lookup"))])
 async def get_vets_by_city(
     city: str = Query(..., description="City name in India"),
     limit: int = Query(10, ge=1, le=50, description="Number of clinics to return (1-50)")
@@ -401,59 +415,8 @@ async def get_vets_by_city(
         Dict with list of veterinary clinics and metadata
     """
     try:
-        # Create a prompt for Gemini AI to get vet recommendations by city
-        prompt = f"""You are a veterinary clinic directory assistant for India. Provide a list of {limit} reputable veterinary clinics and animal hospitals in {city}, India.
-
-For each clinic, provide the following information in JSON format:
-- name: Full clinic name
-- address: Complete street address
-- phone: Contact phone number (with +91 country code)
-- services: Array of services offered (e.g., ["General Checkup", "Vaccination", "Surgery", "Emergency Care"])
-- specialties: Array of specialties (e.g., ["Small Animal Medicine", "Surgery", "Dental Care"])
-- hours: Operating hours (e.g., "Mon-Sat: 9:00 AM - 8:00 PM, Sun: Closed")
-- emergency: Boolean indicating if 24/7 emergency services available
-- rating: Rating out of 5.0 (realistic ratings between 3.8-4.9)
-- notes: Brief note about the clinic (1-2 sentences)
-- distance: Approximate distance from city center (e.g., "2.5 km from center")
-
-Return ONLY a valid JSON array of clinic objects, nothing else. No markdown, no explanations, just the JSON array.
-
-Example format:
-```json
-[
-  {{
-    "name": "Example Vet Clinic",
-    "address": "123 Main Street, {city}, State, PIN",
-    "phone": "+91-XXXXXXXXXX",
-    "services": ["General Checkup", "Vaccination"],
-    "specialties": ["Small Animal Medicine"],
-    "hours": "Mon-Sat: 9:00 AM - 7:00 PM",
-    "emergency": false,
-    "rating": 4.5,
-    "notes": "Well-established clinic with experienced vets.",
-    "distance": "1.5 km from center"
-  }}
-]
-```
-
-Provide {limit} clinics for {city}, India."""
-
-        # Call Gemini AI
-        response = ai_service.model.generate_content(prompt)
-        response_text = response.text.strip()
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]  # Remove ```json
-        if response_text.startswith("```"):
-            response_text = response_text[3:]  # Remove ```
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]  # Remove trailing ```
-        response_text = response_text.strip()
-        
-        # Parse JSON response
-        import json
-        clinics = json.loads(response_text)
+        # Get recommendations from Gemini AI (identical concurrent lookups share one call)
+        clinics = await ai_service.get_vet_recommendations_by_city(city, limit)
         
         return {
             "city": city,
@@ -465,7 +428,6 @@ Provide {limit} clinics for {city}, India."""
         }
     except json.JSONDecodeError as e:
         print(f"JSON parsing error: {e}")
-        print(f"Response text: {response_text}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to parse AI response: {str(e)}"
@@ -480,7 +442,7 @@ Provide {limit} clinics for {city}, India."""
         )
 
 
-@router.post("/vets/ask")
+@router.post("/vets/ask", dependencies=[Depends(rate_limit("vet_question"))])
 async def ask_about_vets(
     question: str = Query(..., description="Question about veterinary clinics"),
     pincode: Optional[str] = Query(None, description="Pin code for context (optional)"),
@@ -514,27 +476,20 @@ async def ask_about_vets(
         
         # Create a detailed prompt for Gemini
         location_context = f"near pin code {pincode}" if pincode else "in their area"
-        prompt = f"""You are a helpful veterinary clinic advisor for India. A pet owner {location_context} is asking about veterinary clinics.
+        prompt = f"""A pet owner {location_context} is asking about veterinary clinics.
 
 Available Veterinary Clinics:
 {clinics_context}
 
 User's Question: "{question}"
-
-Please provide a helpful, detailed answer to their question. Consider:
-- The specific clinics available and their features
-- Services, specialties, and ratings
-- Distance and accessibility
-- Emergency services availability
-- Any specific needs mentioned in the question
-
-Provide a conversational, informative response that directly answers their question. If they're asking for recommendations, explain your reasoning based on the clinic details provided.
-
-Keep your response concise but informative (2-4 paragraphs maximum)."""
+"""
 
         # Call Gemini AI
-        response = ai_service.model.generate_content(prompt)
-        answer = response.text.strip()
+        answer = (await ai_service.generate_text(
+            prompt,
+            system_instruction=VET_QUESTION_INSTRUCTION,
+            endpoint="vet_question"
+        )).strip()
         
         return {
             "question": question,
@@ -552,10 +507,12 @@ Keep your response concise but informative (2-4 paragraphs maximum)."""
         )
 
 
-@router.post("/symptom-followup")
+@router.post("/symptom-followup", dependencies=[Depends(rate_limit("symptom_followup"))])
 async def symptom_followup_question(
     question: str = Query(..., description="Follow-up question about symptoms or pet health"),
-    conversation_context: str = Query(..., description="Previous conversation context")
+    check_id: Optional[str] = Query(None, description="Symptom check whose follow-up session to continue"),
+    conversation_context: Optional[str] = Query(None, description="Previous conversation context (only without check_id)"),
+    current_user: Optional[UserInDB] = Depends(get_current_user_optional)
 ) -> Dict[str, Any]:
     """
     Use Gemini AI to answer follow-up questions in the symptom checker chat
@@ -563,44 +520,65 @@ async def symptom_followup_question(
     This endpoint enables conversational interaction after the initial symptom analysis,
     allowing users to ask clarifying questions, get more details, or discuss related concerns.
     
+    With check_id, the conversation is held on the server: only the new question is
+    sent, and the turn is appended to the symptom check. Without it, the client sends
+    the previous conversation on every call.
+    
     Query Parameters:
         - question: User's follow-up question
-        - conversation_context: Previous messages for context
+        - check_id: Symptom check the chat belongs to (optional)
+        - conversation_context: Previous messages for context (required without check_id)
     
     Returns:
         Dict with AI-generated conversational response
     """
+    if not check_id and conversation_context is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either check_id or conversation_context is required"
+        )
+    
     try:
+        db = get_database()
+        session = await load_followup_session(db, check_id, current_user) if check_id else None
+        
         # Create a conversational prompt for Gemini
-        prompt = f"""You are an experienced veterinarian having a conversation with a concerned pet owner. They've already described their pet's symptoms and received an initial assessment. Now they have a follow-up question.
-
-Previous Conversation:
-{conversation_context}
-
-Pet Owner's Follow-up Question: "{question}"
-
-Please provide a helpful, conversational response as if you're continuing the discussion in your clinic. Consider:
-- The context of the previous conversation
-- Any symptoms or concerns already mentioned
-- Provide clear, actionable advice
-- Be empathetic and professional
-- If the question requires seeing the pet in person, say so clearly
-- If it's an emergency, emphasize urgency
+        if session:
+            prompt = build_followup_prompt(session, question)
+        else:
+            # Long chats keep only their most recent part so the prompt stays within budget
+            question_text = f"Pet Owner's Follow-up Question: \"{question}\""
+            history = ai_service.prompt_accountant.fit_tail(
+                "symptom_followup",
+                conversation_context,
+                reserved_chars=len(question_text) + 30
+            )
+            prompt = f"""Previous Conversation:
+{history}
 
-Keep your response conversational and informative (2-4 paragraphs). Write as if speaking directly to the pet owner."""
+{question_text}"""
 
         # Call Gemini AI
-        response = ai_service.model.generate_content(prompt)
-        answer = response.text.strip()
+        answer = (await ai_service.generate_text(
+            prompt,
+            system_instruction=SYMPTOM_FOLLOWUP_INSTRUCTION,
+            endpoint="symptom_followup"
+        )).strip()
         
         # Add disclaimer to every response
         answer_with_disclaimer = f"{answer}\n\n---\n\n⚕️ **DISCLAIMER:** This is an AI-generated assessment for informational purposes only. It does not replace professional veterinary advice, diagnosis, or treatment. Always consult with a licensed veterinarian for medical concerns. In case of emergency, seek immediate veterinary care."
         
-        return {
+        response = {
             "question": question,
             "answer": answer_with_disclaimer,
             "source": "AI-powered response using Google Gemini"
         }
+        if session:
+            response["checkId"] = check_id
+            response["turn"] = await append_followup_turn(db, session, question, answer, answer_with_disclaimer)
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error answering follow-up question: {e}")
         import traceback
@@ -611,23 +589,32 @@ Keep your response conversational and informative (2-4 paragraphs). Write as if
         )
 
 
-@router.post("/pet-summary/{pet_id}")
+@router.post("/pet-summary/{pet_id}", dependencies=[Depends(rate_limit("pet_summary"))])
 async def generate_pet_health_summary(
     pet_id: str,
-    force_refresh: bool = Query(False, description="Force regeneration even if cached summary exists"),
+    force_refresh: bool = Query(False, description="Force a full regeneration from the complete health history"),
+    wait: bool = Query(False, description="Wait for the regenerated summary instead of returning the cached one"),
     current_user: UserInDB = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
-    Generate a comprehensive AI-powered health summary for a pet
-    
-    Uses Gemini AI to analyze the pet's profile and health history.
-    Caches the summary and only regenerates if new chat history is available.
+    Get a pet's AI-powered health summary, regenerating it in the background when stale
+    
+    Uses Gemini AI to analyze the pet's profile and health history. The
+    summary is regenerated when the health history, season or location has
+    changed (or on force_refresh) by a background job, deduplicated per pet.
+    While it runs, the cached summary is returned immediately with
+    "regenerating": true and the job status; poll
+    GET /pet-summary/{pet_id}/status to see when it has finished. Without a
+    cached summary, or with wait=true, the request waits up to
+    PET_SUMMARY_WAIT_SECONDS for the job and returns 202 with the job status
+    if it is still running.
     
     Path Parameters:
         - pet_id: Pet ID
     
     Query Parameters:
-        - force_refresh: Force regeneration even if cached summary exists
+        - force_refresh: Force a full regeneration from the complete health history
+        - wait: Wait for the regenerated summary instead of returning the cached one
     
     Returns:
         Dict with AI-generated health summary
@@ -636,7 +623,107 @@ async def generate_pet_health_summary(
         HTTPException: If pet not found or doesn't belong to user
     """
     db = get_database()
+    pet = await _get_owned_pet(db, pet_id, current_user)
     
+    try:
+        inputs = await load_summary_inputs(db, pet_id, current_user, force_refresh)
+        
+        # Return cached summary if no regeneration needed
+        if not inputs.needs_regeneration:
+            return cached_summary_response(pet, inputs.cached_summary)
+        
+        job = await job_queue.enqueue(
+            PET_SUMMARY_JOB,
+            {"petId": pet_id, "userId": str(current_user.id), "forceRefresh": force_refresh},
+            dedupe_key=pet_summary_job_key(pet_id)
+        )
+        if force_refresh and not job["payload"].get("forceRefresh"):
+            # Upgrade a deduplicated incremental update to a full rebuild; one
+            # already running is followed by the rebuild, which wait=true waits for
+            job = await job_queue.rerun_with(job, {**job["payload"], "forceRefresh": True})
+        
+        if inputs.cached_summary and not wait:
+            return {
+                **cached_summary_response(pet, inputs.cached_summary),
+                "source": "Cached summary (update in progress)",
+                "regenerating": True,
+                "job": serialize_job(job)
+            }
+        
+        job = await job_queue.wait(job["_id"], settings.pet_summary_wait_seconds)
+    except Exception as e:
+        print(f"Error generating pet summary: {e}")
+        import traceback
+        print(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to generate pet summary: {str(e)}"
+        )
+    
+    if job and job["status"] == SUCCEEDED:
+        return job["result"]
+    if not job or job["status"] == FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to generate pet summary: {job.get('lastError') if job else 'job not found'}"
+        )
+    
+    # Still running - the client can poll the status endpoint
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "petId": pet_id,
+            "petName": pet['name'],
+            "summary": None,
+            "regenerating": True,
+            "job": serialize_job(job)
+        }
+    )
+
+
+@router.get("/pet-summary/{pet_id}/status")
+async def get_pet_health_summary_status(
+    pet_id: str,
+    current_user: UserInDB = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get the status of a pet's latest summary regeneration job
+    
+    Path Parameters:
+        - pet_id: Pet ID
+    
+    Returns:
+        Dict with the latest job (or null if none has run) and when the
+        current summary was generated
+    
+    Raises:
+        HTTPException: If pet not found or doesn't belong to user
+    """
+    db = get_database()
+    pet = await _get_owned_pet(db, pet_id, current_user)
+    
+    job, cached_summary = await asyncio.gather(
+        job_queue.latest(pet_summary_job_key(pet_id)),
+        db.pet_health_summaries.find_one({"petId": pet_id}, {"generatedAt": 1})
+    )
+    
+    generated_at = cached_summary.get("generatedAt") if cached_summary else None
+    return {
+        "petId": pet_id,
+        "petName": pet['name'],
+        "summaryGeneratedAt": generated_at.isoformat() if isinstance(generated_at, datetime) else generated_at,
+        "regenerating": bool(job and job["status"] in (QUEUED, RUNNING)),
+        "job": serialize_job(job) if job else None
+    }
+
+
+async def _get_owned_pet(db, pet_id: str, current_user: UserInDB) -> Dict[str, Any]:
+    """
+    Load a pet owned by the current user
+    
+    Raises:
+        HTTPException: If the ID is invalid, the pet is not found or belongs to another user
+    """
     # Validate ObjectId
     if not ObjectId.is_valid(pet_id):
         raise HTTPException(
@@ -660,398 +747,7 @@ async def generate_pet_health_summary(
             detail="Not authorized to access this pet"
         )
     
-    try:
-        # Get ALL symptom check history for this pet (not limited by time)
-        symptom_checks = await db.symptom_checks.find({
-            "petId": pet_id
-        }).sort("timestamp", -1).to_list(length=100)
-        
-        # Separate active and resolved issues
-        active_checks = [check for check in symptom_checks if not check.get('resolved', False)]
-        resolved_checks = [check for check in symptom_checks if check.get('resolved', False)]
-        
-        # Determine current season based on system date (India seasons)
-        current_month = datetime.now().month
-        current_date = datetime.now()
-        
-        if 3 <= current_month <= 6:
-            season = "Summer"
-            season_description = "hot and dry weather"
-        elif 7 <= current_month <= 9:
-            season = "Monsoon"
-            season_description = "rainy season with high humidity"
-        else:  # October to February
-            season = "Winter"
-            season_description = "cooler temperatures"
-        
-        # Get user's location information first (needed for cache validation)
-        user_location_info = ""
-        pincode = None
-        city = None
-        state = None
-        
-        if current_user.address:
-            pincode = current_user.address.zip_code
-            city = current_user.address.city
-            state = current_user.address.state
-            user_location_info = f"\n\nOwner's Location:\n- City: {city}, {state}\n- PIN Code: {pincode}"
-        elif current_user.location:
-            city = current_user.location.city
-            state = current_user.location.state
-            user_location_info = f"\n\nOwner's Location:\n- City: {city}, {state}"
-        
-        # Add season information
-        user_location_info += f"\n- Current Season: {season} ({season_description})"
-        user_location_info += f"\n- Date: {current_date.strftime('%B %d, %Y')}"
-        
-        has_location_data = bool(city or pincode)
-        
-        # Check for existing cached summary
-        cached_summary = await db.pet_health_summaries.find_one({
-            "petId": pet_id
-        })
-        
-        # Determine if we need to regenerate
-        needs_regeneration = force_refresh or cached_summary is None
-        
-        if cached_summary and not force_refresh:
-            # Check if season has changed since last generation
-            cached_season = cached_summary.get("season")
-            if cached_season != season:
-                needs_regeneration = True
-            
-            # Check if location data availability has changed
-            if not needs_regeneration:
-                cached_had_location = cached_summary.get("hasLocationData", False)
-                if has_location_data != cached_had_location:
-                    needs_regeneration = True
-            
-            # Check if the number of symptom checks has changed (additions or deletions)
-            if not needs_regeneration:
-                cached_check_count = cached_summary.get("checksAnalyzed", 0)
-                current_check_count = len(symptom_checks)
-                
-                if cached_check_count != current_check_count:
-                    needs_regeneration = True
-                else:
-                    # If count is same, check if there are new symptom checks since last summary generation
-                    last_summary_time = cached_summary.get("generatedAt")
-                    if last_summary_time:
-                        # Convert to datetime if it's a string
-                        if isinstance(last_summary_time, str):
-                            last_summary_time = datetime.fromisoformat(last_summary_time.replace('Z', '+00:00'))
-                        
-                        # Check if any symptom checks are newer than the cached summary
-                        for check in symptom_checks:
-                            check_time = check.get("timestamp")
-                            if check_time:
-                                if isinstance(check_time, str):
-                                    check_time = datetime.fromisoformat(check_time.replace('Z', '+00:00'))
-                                
-                                if check_time > last_summary_time:
-                                    needs_regeneration = True
-                                    break
-        
-        # Return cached summary if no regeneration needed
-        if not needs_regeneration and cached_summary:
-            return {
-                "petId": pet_id,
-                "petName": pet['name'],
-                "summary": cached_summary["summary"],
-                "generatedAt": cached_summary["generatedAt"],
-                "historyPeriod": cached_summary.get("historyPeriod", "All available history"),
-                "checksAnalyzed": cached_summary.get("checksAnalyzed", len(symptom_checks)),
-                "source": "Cached summary (no new chat history)",
-                "cached": True
-            }
-        
-        # Use Gemini AI to get climate information for the location
-        climate_info = ""
-        if city or pincode:
-            try:
-                location_str = f"{city}, {state}" if city else f"PIN code {pincode}"
-                climate_prompt = f"""Provide a brief climate analysis for {location_str}, India during {season} season ({current_date.strftime('%B %Y')}). Include:
-1. Typical weather conditions for this season in this location
-2. Temperature range (in Celsius)
-3. Humidity levels
-4. Specific weather-related pet health concerns for this location and season
-
-Keep the response concise (3-4 sentences maximum). Focus on information relevant to pet health."""
-
-                climate_response = ai_service.model.generate_content(climate_prompt)
-                climate_info = f"\n\nLocal Climate Context ({location_str}, {season}):\n{climate_response.text.strip()}"
-            except Exception as e:
-                print(f"Failed to get climate info: {e}")
-                # Continue without climate info if API fails
-        
-        # Prepare pet profile information
-        pet_info = f"""Pet Profile:
-- Name: {pet['name']}
-- Breed: {pet['breed']}
-- Age: {pet.get('age', 'Unknown')} years
-- Gender: {pet.get('gender', 'Unknown')}
-- Weight: {pet.get('weight', 'Not specified')} kg
-- Lifestyle: {pet.get('lifestyle', 'Not specified')}"""
-        
-        if pet.get('conditions'):
-            pet_info += f"\n- Medical Conditions: {', '.join(pet['conditions'])}"
-        else:
-            pet_info += "\n- Medical Conditions: None"
-            
-        if pet.get('allergies'):
-            pet_info += f"\n- Allergies: {', '.join(pet['allergies'])}"
-        else:
-            pet_info += "\n- Allergies: None"
-        
-        # Add location and climate information
-        pet_info += user_location_info
-        pet_info += climate_info
-        
-        # Prepare detailed health history with chat conversations, separating active and resolved issues
-        history_summary = ""
-        
-        # Add active health concerns
-        if active_checks and len(active_checks) > 0:
-            history_summary = f"\n\nACTIVE HEALTH CONCERNS ({len(active_checks)} ongoing):\n"
-            for idx, check in enumerate(active_checks[:5], 1):  # Limit to 5 most recent active
-                # Handle timestamp - could be datetime object or ISO string
-                timestamp = check.get('timestamp')
-                if timestamp:
-                    if isinstance(timestamp, str):
-                        try:
-                            check_date = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).strftime('%B %d, %Y')
-                        except:
-                            check_date = "Unknown date"
-                    else:
-                        check_date = timestamp.strftime('%B %d, %Y')
-                else:
-                    check_date = "Unknown date"
-                    
-                history_summary += f"\n--- Active Concern #{idx} ({check_date}) ---"
-                history_summary += f"\nCategory: {check.get('category', 'Unknown')}"
-                if check.get('healthSubcategory'):
-                    history_summary += f" - {check['healthSubcategory']}"
-                history_summary += f"\nRisk Level: {check.get('riskLevel', 'Unknown')}"
-                history_summary += f"\nAssessment: {check.get('summary', 'No summary available')}"
-                
-                # Include chat conversation if available
-                if check.get('messages') and len(check['messages']) > 0:
-                    history_summary += f"\n\nChat Details:"
-                    # Get user messages (symptoms described by owner)
-                    user_messages = [msg for msg in check['messages'] if msg.get('type') == 'user']
-                    if user_messages:
-                        history_summary += f"\nOwner's Concerns:"
-                        for msg in user_messages[:5]:  # Up to 5 user messages
-                            content = msg.get('content', '')
-                            if content and len(content) > 10:  # Skip very short messages
-                                history_summary += f"\n  • {content[:300]}"
-                
-                history_summary += "\n"
-        
-        # Add resolved past issues
-        if resolved_checks and len(resolved_checks) > 0:
-            history_summary += f"\n\nRESOLVED PAST ISSUES ({len(resolved_checks)} addressed):\n"
-            history_summary += "**Note:** These issues have been resolved but are included for historical context.\n"
-            for idx, check in enumerate(resolved_checks[:5], 1):  # Limit to 5 most recent resolved
-                # Handle timestamp - could be datetime object or ISO string
-                timestamp = check.get('timestamp')
-                resolved_at = check.get('resolvedAt')
-                
-                if timestamp:
-                    if isinstance(timestamp, str):
-                        try:
-                            check_date = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).strftime('%B %d, %Y')
-                        except:
-                            check_date = "Unknown date"
-                    else:
-                        check_date = timestamp.strftime('%B %d, %Y')
-                else:
-                    check_date = "Unknown date"
-                
-                resolved_date = ""
-                if resolved_at:
-                    if isinstance(resolved_at, str):
-                        try:
-                            resolved_date = f" - Resolved: {datetime.fromisoformat(resolved_at.replace('Z', '+00:00')).strftime('%B %d, %Y')}"
-                        except:
-                            resolved_date = " - Resolved"
-                    else:
-                        resolved_date = f" - Resolved: {resolved_at.strftime('%B %d, %Y')}"
-                    
-                history_summary += f"\n--- Past Issue #{idx} ({check_date}{resolved_date}) (Now Resolved) ---"
-                history_summary += f"\nCategory: {check.get('category', 'Unknown')}"
-                if check.get('healthSubcategory'):
-                    history_summary += f" - {check['healthSubcategory']}"
-                history_summary += f"\nWas: {check.get('riskLevel', 'Unknown')} (Now Resolved)"
-                history_summary += f"\nPast Assessment: {check.get('summary', 'No summary available')}"
-                
-                # Include chat conversation if available
-                if check.get('messages') and len(check['messages']) > 0:
-                    # Get user messages (symptoms described by owner)
-                    user_messages = [msg for msg in check['messages'] if msg.get('type') == 'user']
-                    if user_messages:
-                        history_summary += f"\nPast Concerns (Now Addressed):"
-                        for msg in user_messages[:3]:  # Up to 3 user messages for resolved issues
-                            content = msg.get('content', '')
-                            if content and len(content) > 10:  # Skip very short messages
-                                history_summary += f"\n  • {content[:200]}"
-                
-                history_summary += "\n"
-        
-        # If no checks at all
-        if not active_checks and not resolved_checks:
-            history_summary = "\n\nHealth History: No health check conversations recorded yet."
-        
-        # Create comprehensive prompt for Gemini with location-based context
-        location_context = ""
-        has_climate_data = bool(climate_info)
-        
-        if city or pincode:
-            location_str = f"{city}, {state}" if city else f"PIN code {pincode}"
-            location_context = f"\n\n**IMPORTANT:** The pet owner is located in {location_str}. It is currently {season} season ({season_description}). Consider the local climate, current seasonal conditions, and region-specific health concerns when making recommendations. Tailor your advice to be relevant for this specific location and season in India."
-        else:
-            # Even without location, include season information
-            location_context = f"\n\n**IMPORTANT:** It is currently {season} season in India ({season_description}). Consider seasonal health concerns and provide season-appropriate recommendations."
-        
-        # Determine what data sources are being used
-        total_checks = len(symptom_checks)
-        active_count = len(active_checks)
-        resolved_count = len(resolved_checks)
-        
-        if active_count > 0 and resolved_count > 0:
-            checks_text = f"{active_count} active concern(s) and {resolved_count} resolved issue(s)"
-        elif active_count > 0:
-            checks_text = f"{active_count} active concern(s)"
-        elif resolved_count > 0:
-            checks_text = f"{resolved_count} resolved issue(s)"
-        else:
-            checks_text = "no health conversations"
-        
-        based_on_text = f"Pet profile, {checks_text}, and {season} season context"
-        if has_climate_data:
-            based_on_text = f"Pet profile, {checks_text}, local climate, and {season} season analysis"
-        
-        # Create comprehensive prompt for Gemini
-        prompt = f"""You are an experienced veterinarian creating a personalized health summary for a beloved pet. Analyze the following information and generate a clear, concise, and personal summary.
-
-{pet_info}
-{history_summary}
-{location_context}
-
-**IMPORTANT CONTEXT INTERPRETATION:**
-- "ACTIVE HEALTH CONCERNS" are ongoing issues that need attention
-- "RESOLVED PAST ISSUES" are problems that have been addressed but provide historical context
-- When making recommendations, focus on active concerns and prevention
-- Acknowledge resolved issues briefly to show awareness of the pet's health journey
-- Do not treat resolved issues as current problems requiring immediate action
-
-Create a health summary with this EXACT structure and formatting:
-
-# 🐾 Health Summary for {pet['name']}
-
-**Based on:** {based_on_text}
-
-## Current Health Overview
-[Write 2-3 sentences about {pet['name']}'s current health status. Be personal and direct - use "your" when referring to the owner. Mention key facts like age, breed, and any notable conditions. MUST mention how the current {season} season might affect the pet's health. Don't repeat information unnecessarily.]
-
-## Key Observations
-[Write 2-3 sentences highlighting the most important patterns or findings from the health history. If there are recurring issues, mention them. If the pet is healthy, acknowledge that. MUST consider current {season} season factors and how they relate to the pet's health. Be specific and avoid generic statements.]
-
-## Recommendations
-
-CRITICAL: Format recommendations as a NUMBERED list with each on a new line. MUST include at least 1-2 season-specific recommendations for {season} season:
-
-1. First specific actionable recommendation here (consider local climate if applicable)
-2. Second specific actionable recommendation here
-3. Third specific actionable recommendation here
-4. Fourth specific actionable recommendation here
-5. Fifth specific actionable recommendation here
-
-Each recommendation must:
-- Start with a number followed by period and space (e.g., "1. ")
-- Be on its own line
-- Be specific and actionable (what to DO, not just monitor)
-- Be concise (one sentence)
-- MUST consider current {season} season and provide season-appropriate advice
-- If location data available, also consider local climate
-
-Example format for {season} season:
-1. Schedule a dental cleaning within the next month
-2. During {season} season, [specific seasonal recommendation based on weather]
-3. Switch to senior dog food formulated for joint health
-4. [Another season-specific recommendation]
-
----
-
-**Important:** Keep the ENTIRE summary under 300 words. Be direct, personal, and actionable. Avoid:
-- Repeating the same information multiple times
-- Generic advice that applies to all pets
-- Verbose explanations - get straight to the point
-- Medical jargon - use simple language
-
-Write as if you're speaking directly to {pet['name']}'s owner in a caring but efficient manner, with awareness of their local environment."""
-        
-        # Call Gemini AI to generate new summary
-        response = ai_service.model.generate_content(prompt)
-        summary = response.text.strip()
-        
-        generated_at = datetime.utcnow()
-        
-        # Save the new summary to history (always insert, never update)
-        summary_history_doc = {
-            "petId": pet_id,
-            "petName": pet['name'],
-            "summary": summary,
-            "generatedAt": generated_at,
-            "historyPeriod": "All available history",
-            "checksAnalyzed": len(symptom_checks),
-            "hasLocationData": has_location_data,
-            "season": season,
-            "createdAt": generated_at
-        }
-        
-        # Insert into history collection
-        await db.pet_health_summary_history.insert_one(summary_history_doc)
-        
-        # Also update the current/cached summary for quick access
-        summary_doc = {
-            "petId": pet_id,
-            "petName": pet['name'],
-            "summary": summary,
-            "generatedAt": generated_at,
-            "historyPeriod": "All available history",
-            "checksAnalyzed": len(symptom_checks),
-            "hasLocationData": has_location_data,
-            "season": season,
-            "updatedAt": generated_at
-        }
-        
-        # Upsert the current summary (update if exists, insert if not)
-        await db.pet_health_summaries.update_one(
-            {"petId": pet_id},
-            {"$set": summary_doc},
-            upsert=True
-        )
-        
-        return {
-            "petId": pet_id,
-            "petName": pet['name'],
-            "summary": summary,
-            "generatedAt": generated_at.isoformat(),
-            "historyPeriod": "All available history",
-            "checksAnalyzed": len(symptom_checks),
-            "source": "AI-powered analysis using Google Gemini",
-            "cached": False
-        }
-        
-    except Exception as e:
-        print(f"Error generating pet summary: {e}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to generate pet summary: {str(e)}"
-        )
+    return pet
 
 
 @router.get("/pet-summary-history/{pet_id}")
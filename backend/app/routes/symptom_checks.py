@@ -1,32 +1,76 @@
 """
 Symptom checker routes for AI-powered health assessments
 """
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List, Dict, Optional, Any
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List, Dict, Optional, Any, AsyncIterator, Tuple
 from datetime import datetime
 from bson import ObjectId
+import asyncio
+import json
 import logging
 
 from app.models.symptom_check import (
     SymptomCheckCreate,
     SymptomCheckResponse,
+    SymptomCheckListItem,
     SymptomCheckFeedback,
     DetailedSection,
-    ChatMessage
+    ChatMessage,
+    MediaReference,
+    RiskLevel
 )
+from app.models.provider import ProviderResponse
 from app.models.user import UserInDB
 from app.utils.dependencies import get_current_user, get_current_user_optional
+from app.utils.rate_limit import rate_limit, RateLimitLease
+from app.utils.pagination import fetch_page, NEXT_CURSOR_HEADER
 from app.database import get_database
 from app.services.ai_service import ai_service
+from app.services.provider_search import find_nearest_emergency_providers
+from app.services.pet_context import pet_context_builder
+from app.services.media_store import media_store, externalize_message_images
+from app.services.health_stats import health_stats
 
 
 router = APIRouter(prefix="/api/v1/symptom-checks", tags=["Symptom Checker"])
 logger = logging.getLogger(__name__)
 
+# History pages: largest page size, and the fields listed (chat, media and detailed sections are left out)
+MAX_PAGE_SIZE = 100
+LIST_PROJECTION = {
+    "userId": 1,
+    "petId": 1,
+    "category": 1,
+    "healthSubcategory": 1,
+    "symptoms": 1,
+    "riskLevel": 1,
+    "summary": 1,
+    "immediateActions": 1,
+    "media.hash": 1,
+    "feedback": 1,
+    "resolved": 1,
+    "resolvedAt": 1,
+    "timestamp": 1
+}
 
-@router.post("", response_model=SymptomCheckResponse, status_code=status.HTTP_201_CREATED)
+# Emergency clinic lookup attached to likely-emergency symptom checks
+EMERGENCY_PROVIDER_RADIUS_KM = 15
+EMERGENCY_PROVIDER_LIMIT = 5
+# How long a streamed check waits for a lookup still running when the analysis finishes
+EMERGENCY_PROVIDER_WAIT_SECONDS = 5
+
+
+@router.post(
+    "",
+    response_model=SymptomCheckResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("symptom_check"))]
+)
 async def submit_symptom_check(
     symptom_data: SymptomCheckCreate,
+    bypass_cache: bool = Query(False, description="Skip the AI response cache and force a fresh analysis"),
     current_user: Optional[UserInDB] = Depends(get_current_user_optional)
 ) -> SymptomCheckResponse:
     """
@@ -37,6 +81,7 @@ async def submit_symptom_check(
     
     Args:
         symptom_data: Symptom check data
+        bypass_cache: Skip the AI response cache
         current_user: Current authenticated user (optional)
     
     Returns:
@@ -68,112 +113,13 @@ async def submit_symptom_check(
     logger.info(f"Pet ID: {symptom_data.pet_id}")
     print("="*80 + "\n")
     
-    # Validate input - require either symptoms text OR media
-    has_symptoms = symptom_data.symptoms is not None and len(symptom_data.symptoms.strip()) >= 10
-    has_media = (symptom_data.images and len(symptom_data.images) > 0) or symptom_data.video
-    
-    logger.info(f"Has symptoms: {has_symptoms}, Has media: {has_media}")
-    
-    if not has_symptoms and not has_media:
-        logger.error("Validation failed: No symptoms or media provided")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Please provide at least 10 characters of symptom description or upload media"
-        )
+    _validate_submission(symptom_data)
     
-    # Validate image count
-    if symptom_data.images and len(symptom_data.images) > 3:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Maximum 3 images allowed"
-        )
+    # Likely emergencies look up nearby 24x7 clinics while the context is built and the AI call runs
+    providers_task = _start_emergency_provider_lookup(symptom_data, current_user)
     
     # Get comprehensive pet context if petId provided
-    pet_context = None
-    
-    if symptom_data.pet_id:
-        # Validate ObjectId
-        if not ObjectId.is_valid(symptom_data.pet_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid pet ID"
-            )
-        
-        pet = await db.pets.find_one({"_id": ObjectId(symptom_data.pet_id)})
-        if pet:
-            # Verify pet belongs to current user if authenticated
-            if current_user and pet["userId"] != str(current_user.id):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Not authorized to access this pet"
-                )
-            
-            # Build comprehensive pet context
-            pet_context = {
-                "name": pet.get("name"),
-                "breed": pet.get("breed"),
-                "age": pet.get("age"),
-                "gender": pet.get("gender"),
-                "weight": pet.get("weight"),
-                "lifestyle": pet.get("lifestyle"),
-                "conditions": pet.get("conditions", []),
-                "allergies": pet.get("allergies", [])
-            }
-            
-            # Get previous symptom check history (last 5 checks)
-            try:
-                history = await db.symptom_checks.find({
-                    "petId": symptom_data.pet_id
-                }).sort("timestamp", -1).limit(5).to_list(length=5)
-                
-                pet_context["history"] = []
-                pet_context["resolved_history"] = []
-                
-                for check in history:
-                    check_data = {
-                        "date": check.get("timestamp"),
-                        "category": check.get("category"),
-                        "subcategory": check.get("healthSubcategory"),
-                        "riskLevel": check.get("riskLevel"),
-                        "summary": check.get("summary"),
-                        "resolved": check.get("resolved", False)
-                    }
-                    
-                    # Separate active and resolved issues
-                    if check.get("resolved", False):
-                        pet_context["resolved_history"].append(check_data)
-                    else:
-                        pet_context["history"].append(check_data)
-                        
-            except Exception as e:
-                logger.warning(f"Failed to load pet history: {e}")
-                pet_context["history"] = []
-                pet_context["resolved_history"] = []
-            
-            # Get season and location context if user is authenticated
-            if current_user:
-                from datetime import datetime
-                current_month = datetime.now().month
-                
-                if 3 <= current_month <= 6:
-                    pet_context["season"] = "Summer"
-                elif 7 <= current_month <= 9:
-                    pet_context["season"] = "Monsoon"
-                else:
-                    pet_context["season"] = "Winter"
-                
-                # Add user location if available
-                if current_user.address:
-                    pet_context["location"] = {
-                        "city": current_user.address.city,
-                        "state": current_user.address.state,
-                        "pincode": current_user.address.zip_code
-                    }
-                elif current_user.location:
-                    pet_context["location"] = {
-                        "city": current_user.location.city,
-                        "state": current_user.location.state
-                    }
+    pet_context = await _build_pet_context(db, symptom_data, current_user, providers_task)
     
     # Call AI service for analysis
     try:
@@ -186,7 +132,8 @@ async def submit_symptom_check(
             subcategory=symptom_data.health_subcategory,
             pet_context=pet_context,
             images=symptom_data.images,
-            video=symptom_data.video
+            video=symptom_data.video,
+            use_cache=not bypass_cache
         )
         print("\n" + "="*80)
         print("AI SERVICE RETURNED SUCCESSFULLY")
@@ -200,11 +147,346 @@ async def submit_symptom_check(
         import traceback
         print(f"Traceback:\n{traceback.format_exc()}")
         print("="*80 + "\n")
+        if providers_task:
+            providers_task.cancel()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"AI analysis failed: {str(e)}"
         )
     
+    emergency_providers = await _collect_emergency_providers(
+        providers_task, ai_response["riskLevel"], current_user
+    )
+    return await _save_symptom_check(
+        db, symptom_data, ai_response, current_user, emergency_providers
+    )
+
+
+@router.post("/stream")
+async def stream_symptom_check(
+    symptom_data: SymptomCheckCreate,
+    bypass_cache: bool = Query(False, description="Skip the AI response cache and force a fresh analysis"),
+    current_user: Optional[UserInDB] = Depends(get_current_user_optional),
+    lease: Optional[RateLimitLease] = Depends(rate_limit("symptom_check"))
+) -> StreamingResponse:
+    """
+    Submit symptom check for AI analysis and stream the result as Server-Sent Events
+    
+    Accepts the same payload as POST /api/v1/symptom-checks. Events are sent as
+    soon as they are available:
+        - emergency_providers: {"providers": [...]} nearest 24x7 clinics, sent as soon
+          as they are found when the submission looks like an emergency (always
+          before complete; the analysis waits briefly for a lookup still running)
+        - risk_level: {"riskLevel": ...} as soon as Gemini emits its RISK_LEVEL line
+        - section: {"title": ..., "points": [...]} for each completed detailed section
+        - complete: the full SymptomCheckResponse, after it has been saved
+        - error: {"detail": ...} if the analysis could not be completed
+    
+    Args:
+        symptom_data: Symptom check data
+        bypass_cache: Skip the AI response cache
+        current_user: Current authenticated user (optional)
+        lease: Rate limit concurrency slot, held until the stream ends
+    
+    Returns:
+        StreamingResponse: text/event-stream of analysis events
+    
+    Raises:
+        HTTPException: If validation fails (before the stream starts)
+    """
+    db = get_database()
+    
+    # Validation and ownership errors are raised before any bytes are streamed
+    _validate_submission(symptom_data)
+    providers_task = _start_emergency_provider_lookup(symptom_data, current_user)
+    pet_context = await _build_pet_context(db, symptom_data, current_user, providers_task)
+    
+    async def event_stream():
+        emergency_providers = None
+        try:
+            analysis_events = ai_service.analyze_symptoms_stream(
+                symptoms=symptom_data.symptoms or "",
+                category=symptom_data.category,
+                subcategory=symptom_data.health_subcategory,
+                pet_context=pet_context,
+                images=symptom_data.images,
+                video=symptom_data.video,
+                use_cache=not bypass_cache
+            )
+            async for event, payload in _with_emergency_providers(analysis_events, providers_task):
+                if event == "emergency_providers":
+                    emergency_providers = payload
+                    yield _format_sse(event, {
+                        "providers": [p.model_dump(mode="json", by_alias=True) for p in payload]
+                    })
+                elif event == "analysis":
+                    if emergency_providers is None:
+                        # The lookup may still be running when the analysis is done;
+                        # give it a bounded wait so the saved check includes the clinics
+                        emergency_providers = await _finish_emergency_provider_lookup(
+                            providers_task, payload["riskLevel"], current_user
+                        )
+                        if emergency_providers:
+                            yield _format_sse("emergency_providers", {
+                                "providers": [
+                                    p.model_dump(mode="json", by_alias=True) for p in emergency_providers
+                                ]
+                            })
+                    response = await _save_symptom_check(
+                        db, symptom_data, payload, current_user, emergency_providers
+                    )
+                    yield _format_sse("complete", response.model_dump(mode="json", by_alias=True))
+                else:
+                    yield _format_sse(event, payload)
+        except Exception as e:
+            logger.error(f"Streaming symptom check failed: {type(e).__name__}: {e}")
+            yield _format_sse("error", {"detail": f"AI analysis failed: {str(e)}"})
+        finally:
+            if providers_task:
+                providers_task.cancel()
+    
+    # Keep the client's AI concurrency slot until the stream has finished (or the client left)
+    background = BackgroundTask(lease.detach().release) if lease else None
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        },
+        background=background
+    )
+
+
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _start_emergency_provider_lookup(
+    symptom_data: SymptomCheckCreate,
+    current_user: Optional[UserInDB]
+) -> Optional["asyncio.Task[List[ProviderResponse]]"]:
+    """
+    Start the nearest 24x7 clinic lookup if the submission looks like an emergency
+    
+    Runs concurrently with the AI analysis. Needs the user's stored location,
+    so anonymous users and users without a location get no lookup.
+    
+    Returns:
+        The running lookup task, or None
+    """
+    if not current_user or not current_user.location:
+        return None
+    if not ai_service.is_likely_emergency(symptom_data.symptoms, symptom_data.health_subcategory):
+        return None
+    
+    return asyncio.create_task(find_nearest_emergency_providers(
+        current_user.location.latitude,
+        current_user.location.longitude,
+        radius=EMERGENCY_PROVIDER_RADIUS_KM,
+        limit=EMERGENCY_PROVIDER_LIMIT
+    ))
+
+
+async def _collect_emergency_providers(
+    providers_task: Optional["asyncio.Task[List[ProviderResponse]]"],
+    risk_level: RiskLevel,
+    current_user: Optional[UserInDB]
+) -> Optional[List[ProviderResponse]]:
+    """
+    Get the emergency clinic list for a finished analysis
+    
+    Uses the early lookup if one was started; otherwise looks up now when the
+    AI rated the check an emergency that keyword triage missed. Lookup
+    failures never fail the symptom check.
+    
+    Returns:
+        Nearest 24x7 providers, or None when not an emergency or unavailable
+    """
+    try:
+        if providers_task is not None:
+            return await providers_task
+        if risk_level == RiskLevel.EMERGENCY and current_user and current_user.location:
+            return await find_nearest_emergency_providers(
+                current_user.location.latitude,
+                current_user.location.longitude,
+                radius=EMERGENCY_PROVIDER_RADIUS_KM,
+                limit=EMERGENCY_PROVIDER_LIMIT
+            )
+    except Exception as e:
+        logger.error(f"Emergency provider lookup failed: {type(e).__name__}: {e}")
+    return None
+
+
+async def _finish_emergency_provider_lookup(
+    providers_task: Optional["asyncio.Task[List[ProviderResponse]]"],
+    risk_level: RiskLevel,
+    current_user: Optional[UserInDB]
+) -> Optional[List[ProviderResponse]]:
+    """
+    Collect the emergency clinic list, waiting a bounded time for a running lookup
+    
+    Used by the streaming endpoint, where the analysis can finish before the
+    early lookup does. A lookup that is not done within
+    EMERGENCY_PROVIDER_WAIT_SECONDS is cancelled and the check is saved
+    without clinics.
+    
+    Returns:
+        Nearest 24x7 providers, or None when not an emergency, unavailable or too slow
+    """
+    if providers_task is not None and not providers_task.done():
+        await asyncio.wait({providers_task}, timeout=EMERGENCY_PROVIDER_WAIT_SECONDS)
+        if not providers_task.done():
+            logger.warning(
+                f"Emergency provider lookup took longer than {EMERGENCY_PROVIDER_WAIT_SECONDS}s, saving without it"
+            )
+            providers_task.cancel()
+            return None
+    return await _collect_emergency_providers(providers_task, risk_level, current_user)
+
+
+async def _with_emergency_providers(
+    events: AsyncIterator[Tuple[str, Any]],
+    providers_task: Optional["asyncio.Task[List[ProviderResponse]]"]
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Interleave the emergency provider lookup with the AI event stream
+    
+    The ("emergency_providers", providers) event is yielded the moment the
+    lookup finishes - usually long before the AI's first event - and the AI
+    events pass through unchanged. An empty or failed lookup yields nothing.
+    """
+    iterator = events.__aiter__()
+    next_event = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while True:
+            if providers_task is not None:
+                done, _ = await asyncio.wait(
+                    {next_event, providers_task},
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if providers_task in done:
+                    providers = await _collect_emergency_providers(providers_task, None, None)
+                    providers_task = None
+                    if providers:
+                        yield ("emergency_providers", providers)
+                    if next_event not in done:
+                        continue
+            
+            try:
+                event = await next_event
+            except StopAsyncIteration:
+                return
+            yield event
+            next_event = asyncio.ensure_future(iterator.__anext__())
+    finally:
+        next_event.cancel()
+
+
+def _validate_submission(symptom_data: SymptomCheckCreate) -> None:
+    """
+    Validate that a submission has enough symptom text or media
+    
+    Raises:
+        HTTPException: If validation fails
+    """
+    # Validate input - require either symptoms text OR media
+    has_symptoms = symptom_data.symptoms is not None and len(symptom_data.symptoms.strip()) >= 10
+    has_media = (symptom_data.images and len(symptom_data.images) > 0) or symptom_data.video
+    
+    logger.info(f"Has symptoms: {has_symptoms}, Has media: {has_media}")
+    
+    if not has_symptoms and not has_media:
+        logger.error("Validation failed: No symptoms or media provided")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Please provide at least 10 characters of symptom description or upload media"
+        )
+    
+    # Validate image count
+    if symptom_data.images and len(symptom_data.images) > 3:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Maximum 3 images allowed"
+        )
+
+
+async def _build_pet_context(
+    db,
+    symptom_data: SymptomCheckCreate,
+    current_user: Optional[UserInDB],
+    providers_task: Optional["asyncio.Task[List[ProviderResponse]]"] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Build the pet context passed to the AI service
+    
+    The emergency provider lookup is already running; it is cancelled if the
+    request fails here (invalid pet ID or another user's pet).
+    
+    Returns:
+        Pet profile, recent history, season and location, or None without a petId
+    
+    Raises:
+        HTTPException: If the pet ID is invalid or the pet belongs to another user
+    """
+    try:
+        return await pet_context_builder.build(db, symptom_data.pet_id, current_user)
+    except BaseException:
+        if providers_task:
+            providers_task.cancel()
+        raise
+
+
+async def _store_uploads(symptom_data: SymptomCheckCreate) -> List[Dict[str, Any]]:
+    """
+    Save a submission's photos and video to the media store
+    
+    Uploads that fail to decode or store are logged and left out, like
+    media the AI analysis can't decode.
+    
+    Returns:
+        Media references in upload order, images first
+    """
+    uploads = [(image, "image/jpeg") for image in symptom_data.images or []]
+    if symptom_data.video:
+        uploads.append((symptom_data.video, "video/mp4"))
+    if not uploads:
+        return []
+    
+    outcomes = await asyncio.gather(
+        *(media_store.save_base64(data, mime_type) for data, mime_type in uploads),
+        return_exceptions=True
+    )
+    media = []
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            logger.warning(f"Failed to store uploaded media: {type(outcome).__name__}: {outcome}")
+            continue
+        media.append(outcome)
+    return media
+
+
+async def _save_symptom_check(
+    db,
+    symptom_data: SymptomCheckCreate,
+    ai_response: Dict[str, Any],
+    current_user: Optional[UserInDB],
+    emergency_providers: Optional[List[ProviderResponse]] = None
+) -> SymptomCheckResponse:
+    """
+    Persist an analysed symptom check (authenticated users only) and build the response
+    
+    Emergency providers are attached to the response only; clinic details
+    change, so they are not stored with the check.
+    
+    Returns:
+        SymptomCheckResponse: Saved check, or a temporary one for anonymous users
+    """
+    # Uploads go to the media store; the check keeps references and thumbnails
+    media = await _store_uploads(symptom_data) if current_user else []
+    
     # Prepare symptom check document
     symptom_check_dict = {
         "userId": str(current_user.id) if current_user else None,
@@ -212,8 +494,7 @@ async def submit_symptom_check(
         "category": symptom_data.category,
         "healthSubcategory": symptom_data.health_subcategory,
         "symptoms": symptom_data.symptoms or "",
-        "images": symptom_data.images or [],
-        "video": symptom_data.video,
+        "media": media,
         "riskLevel": ai_response["riskLevel"],
         "summary": ai_response["summary"],
         "detailedSections": ai_response["detailedSections"],
@@ -232,6 +513,7 @@ async def submit_symptom_check(
     if current_user:
         result = await db.symptom_checks.insert_one(symptom_check_dict)
         symptom_check_id = str(result.inserted_id)
+        await health_stats.check_created(db, symptom_check_dict)
     else:
         # For anonymous users, generate a temporary ID
         symptom_check_id = str(ObjectId())
@@ -251,57 +533,88 @@ async def submit_symptom_check(
         ],
         immediateActions=ai_response["immediateActions"],
         reasoning=ai_response["reasoning"],
+        media=[MediaReference(**ref) for ref in media],
         resolved=False,
         resolved_at=None,
-        timestamp=symptom_check_dict["timestamp"]
+        timestamp=symptom_check_dict["timestamp"],
+        emergencyProviders=emergency_providers
     )
 
 
-@router.get("", response_model=List[SymptomCheckResponse])
-async def get_symptom_check_history(
-    current_user: UserInDB = Depends(get_current_user)
-) -> List[SymptomCheckResponse]:
+async def _list_symptom_checks(
+    db,
+    query: Dict[str, Any],
+    limit: Optional[int],
+    cursor: Optional[str],
+    response: Response
+) -> List[SymptomCheckListItem]:
     """
-    Get symptom check history for current user
+    Fetch a page of symptom checks with the list projection
     
-    Args:
-        current_user: Current authenticated user
-    
-    Returns:
-        List[SymptomCheckResponse]: List of symptom checks
+    Raises:
+        HTTPException: If the cursor is malformed
     """
-    db = get_database()
+    try:
+        checks, next_cursor = await fetch_page(db.symptom_checks, query, LIST_PROJECTION, limit, cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     
-    # Get all symptom checks for user, sorted by timestamp (newest first)
-    cursor = db.symptom_checks.find({"userId": str(current_user.id)}).sort("timestamp", -1)
-    checks = await cursor.to_list(length=None)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     return [
-        SymptomCheckResponse(
+        SymptomCheckListItem(
             id=str(check["_id"]),
             userId=check.get("userId"),
             petId=check.get("petId"),
             category=check["category"],
             healthSubcategory=check.get("healthSubcategory"),
-            symptoms=check["symptoms"],
+            symptoms=check.get("symptoms"),
             riskLevel=check["riskLevel"],
             summary=check["summary"],
-            detailedSections=[
-                DetailedSection(**section) for section in check["detailedSections"]
-            ],
-            immediateActions=check["immediateActions"],
-            reasoning=check["reasoning"],
-            messages=[ChatMessage(**msg) for msg in check.get("messages", [])],
+            immediateActions=check.get("immediateActions", []),
+            mediaCount=len(check.get("media", [])),
             feedback=check.get("feedback"),
-            feedbackReason=check.get("feedbackReason"),
             resolved=check.get("resolved", False),
-            resolved_at=check.get("resolvedAt"),
+            resolvedAt=check.get("resolvedAt"),
             timestamp=check["timestamp"]
         )
         for check in checks
     ]
 
 
+@router.get("", response_model=List[SymptomCheckListItem])
+async def get_symptom_check_history(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size (all checks if omitted)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    current_user: UserInDB = Depends(get_current_user)
+) -> List[SymptomCheckListItem]:
+    """
+    Get symptom check history for current user
+    
+    Checks are listed newest first without their chat, media or detailed
+    sections (GET /{check_id} returns those). With a limit, the cursor for
+    the next page is returned in the X-Next-Cursor header, which is absent
+    on the last page.
+    
+    Args:
+        response: Response the next-page cursor header is set on
+        limit: Page size (optional)
+        cursor: Cursor of the page to fetch (optional)
+        current_user: Current authenticated user
+    
+    Returns:
+        List[SymptomCheckListItem]: Page of symptom checks
+    """
+    db = get_database()
+    
+    return await _list_symptom_checks(db, {"userId": str(current_user.id)}, limit, cursor, response)
+
+
 @router.get("/{check_id}", response_model=SymptomCheckResponse)
 async def get_symptom_check(
     check_id: str,
@@ -330,7 +643,8 @@ async def get_symptom_check(
         )
     
     # Get symptom check
-    check = await db.symptom_checks.find_one({"_id": ObjectId(check_id)})
+    # Inline media left from before the media store is never returned
+    check = await db.symptom_checks.find_one({"_id": ObjectId(check_id)}, {"images": 0, "video": 0})
     
     if not check:
         raise HTTPException(
@@ -360,6 +674,7 @@ async def get_symptom_check(
         immediateActions=check["immediateActions"],
         reasoning=check["reasoning"],
         messages=[ChatMessage(**msg) for msg in check.get("messages", [])],
+        media=[MediaReference(**ref) for ref in check.get("media", [])],
         feedback=check.get("feedback"),
         feedbackReason=check.get("feedbackReason"),
         resolved=check.get("resolved", False),
@@ -429,20 +744,28 @@ async def submit_feedback(
     return {"message": "Thank you for your feedback"}
 
 
-@router.get("/pet/{pet_id}", response_model=List[SymptomCheckResponse])
+@router.get("/pet/{pet_id}", response_model=List[SymptomCheckListItem])
 async def get_pet_symptom_checks(
     pet_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size (all checks if omitted)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
     current_user: UserInDB = Depends(get_current_user)
-) -> List[SymptomCheckResponse]:
+) -> List[SymptomCheckListItem]:
     """
     Get symptom check history for a specific pet
     
+    Listed and paginated like GET /api/v1/symptom-checks.
+    
     Args:
         pet_id: Pet ID
+        response: Response the next-page cursor header is set on
+        limit: Page size (optional)
+        cursor: Cursor of the page to fetch (optional)
         current_user: Current authenticated user
     
     Returns:
-        List[SymptomCheckResponse]: List of symptom checks for the pet
+        List[SymptomCheckListItem]: Page of symptom checks for the pet
     
     Raises:
         HTTPException: If pet not found or doesn't belong to user
@@ -470,37 +793,13 @@ async def get_pet_symptom_checks(
             detail="Not authorized to access this pet"
         )
     
-    # Get all symptom checks for pet, sorted by timestamp (newest first)
-    cursor = db.symptom_checks.find({
-        "petId": pet_id,
-        "userId": str(current_user.id)
-    }).sort("timestamp", -1)
-    checks = await cursor.to_list(length=None)
-    
-    return [
-        SymptomCheckResponse(
-            id=str(check["_id"]),
-            userId=check.get("userId"),
-            petId=check.get("petId"),
-            category=check["category"],
-            healthSubcategory=check.get("healthSubcategory"),
-            symptoms=check["symptoms"],
-            riskLevel=check["riskLevel"],
-            summary=check["summary"],
-            detailedSections=[
-                DetailedSection(**section) for section in check["detailedSections"]
-            ],
-            immediateActions=check["immediateActions"],
-            reasoning=check["reasoning"],
-            messages=[ChatMessage(**msg) for msg in check.get("messages", [])],
-            feedback=check.get("feedback"),
-            feedbackReason=check.get("feedbackReason"),
-            resolved=check.get("resolved", False),
-            resolved_at=check.get("resolvedAt"),
-            timestamp=check["timestamp"]
-        )
-        for check in checks
-    ]
+    return await _list_symptom_checks(
+        db,
+        {"petId": pet_id, "userId": str(current_user.id)},
+        limit,
+        cursor,
+        response
+    )
 
 
 @router.patch("/{check_id}/messages", status_code=status.HTTP_200_OK)
@@ -562,11 +861,17 @@ async def update_chat_messages(
             detail="Not authorized to update this symptom check"
         )
     
+    # Photos in the chat go to the media store rather than inline in the document
+    message_media = await externalize_message_images(messages, check.get("messageMedia", []))
+    
     # Update messages
+    now = datetime.utcnow()
     result = await db.symptom_checks.update_one(
         {"_id": ObjectId(check_id)},
-        {"$set": {"messages": messages}}
+        # updatedAt lets pet summaries pick up new chat messages incrementally
+        {"$set": {"messages": messages, "messageMedia": message_media, "updatedAt": now}}
     )
+    await health_stats.check_updated(db, check.get("petId"), now)
     
     logger.info(f"Update result - Matched: {result.matched_count}, Modified: {result.modified_count}")
     logger.info("Chat messages updated successfully")
@@ -618,7 +923,16 @@ async def delete_symptom_check(
         )
     
     # Delete the symptom check
-    await db.symptom_checks.delete_one({"_id": ObjectId(check_id)})
+    result = await db.symptom_checks.delete_one({"_id": ObjectId(check_id)})
+    if result.deleted_count:
+        await health_stats.check_deleted(db, check)
+    
+    # Release its uploads; blobs no other check shares are deleted
+    for media_hash in [ref["hash"] for ref in check.get("media", [])] + check.get("messageMedia", []):
+        try:
+            await media_store.release(media_hash)
+        except Exception as e:
+            logger.warning(f"Failed to release media {media_hash[:12]}: {e}")
     
     return {"message": "Symptom check deleted successfully"}
 
@@ -669,15 +983,22 @@ async def mark_symptom_check_resolved(
         )
     
     # Update resolved status
+    now = datetime.utcnow()
     update_data = {
         "resolved": resolved,
-        "resolvedAt": datetime.utcnow() if resolved else None
+        "resolvedAt": now if resolved else None,
+        "updatedAt": now
     }
     
-    await db.symptom_checks.update_one(
-        {"_id": ObjectId(check_id)},
+    # Only a check not already in that state is updated, so concurrent
+    # requests move the active count once
+    state_filter = {"resolved": {"$ne": True}} if resolved else {"resolved": True}
+    result = await db.symptom_checks.update_one(
+        {"_id": ObjectId(check_id), **state_filter},
         {"$set": update_data}
     )
+    if result.modified_count:
+        await health_stats.check_resolved(db, check, resolved, now)
     
     message = "Concern marked as resolved" if resolved else "Concern marked as unresolved"
     return {"message": message}
\ No newline at end of file
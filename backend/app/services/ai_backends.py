@@ -0,0 +1,333 @@
+"""
+Text generation backends used by AIService
+
+The Gemini backend talks to Google's API; the fake backend produces canned
+responses locally so load tests and CI can run without network access.
+"""
+from typing import Any, Dict, Iterator, List, Optional
+from abc import ABC, abstractmethod
+import hashlib
+import inspect
+import json
+import random
+import re
+import threading
+import time
+
+import google.generativeai as genai
+
+
+class AIBackend(ABC):
+    """
+    Interface for blocking text generation
+
+    Both methods are called on AIExecutor worker threads, never on the event loop.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, contents: Any, system_instruction: Optional[str] = None, **kwargs: Any) -> str:
+        """
+        Generate a complete response
+
+        Args:
+            contents: Prompt string or list of content parts
+            system_instruction: Static instruction shared by every call of a kind (optional)
+            **kwargs: Backend-specific options (e.g. safety_settings)
+
+        Returns:
+            Response text
+        """
+
+    @abstractmethod
+    def generate_stream(self, contents: Any, system_instruction: Optional[str] = None, **kwargs: Any) -> Iterator[str]:
+        """
+        Generate a response as a sequence of text chunks
+
+        Args:
+            contents: Prompt string or list of content parts
+            system_instruction: Static instruction shared by every call of a kind (optional)
+            **kwargs: Backend-specific options (e.g. safety_settings)
+
+        Yields:
+            Text chunks in order
+        """
+
+
+class GeminiBackend(AIBackend):
+    """
+    Google Gemini via the google-generativeai SDK
+
+    Each distinct system instruction gets its own GenerativeModel, created
+    on first use and reused afterwards, so the instruction is registered
+    once per model instance rather than rebuilt into every prompt. SDK
+    versions without system instruction support get the instruction as the
+    first content part instead, which keeps it a stable prompt prefix.
+    """
+
+    name = "gemini"
+
+    def __init__(self, api_key: str, model_name: str = "gemini-2.0-flash-exp"):
+        """
+        Args:
+            api_key: Gemini API key
+            model_name: Gemini model to use
+        """
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+        self.supports_system_instruction = (
+            "system_instruction" in inspect.signature(genai.GenerativeModel).parameters
+        )
+        self._instruction_models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def generate(self, contents: Any, system_instruction: Optional[str] = None, **kwargs: Any) -> str:
+        model, contents = self._prepare(contents, system_instruction)
+        return model.generate_content(contents, **kwargs).text
+
+    def generate_stream(self, contents: Any, system_instruction: Optional[str] = None, **kwargs: Any) -> Iterator[str]:
+        model, contents = self._prepare(contents, system_instruction)
+        for chunk in model.generate_content(contents, stream=True, **kwargs):
+            yield chunk.text
+
+    def _prepare(self, contents: Any, system_instruction: Optional[str]) -> Any:
+        """Pick the model registered with an instruction, or prepend it to the contents"""
+        if not system_instruction:
+            return self.model, contents
+        if not self.supports_system_instruction:
+            parts = [contents] if isinstance(contents, str) else list(contents)
+            return self.model, [system_instruction] + parts
+
+        with self._lock:
+            model = self._instruction_models.get(system_instruction)
+            if model is None:
+                model = genai.GenerativeModel(self.model_name, system_instruction=system_instruction)
+                self._instruction_models[system_instruction] = model
+        return model, contents
+
+
+class FakeUpstreamError(RuntimeError):
+    """Simulated upstream failure raised by FakeBackend"""
+
+
+class FakeBackend(AIBackend):
+    """
+    Offline stand-in for Gemini with configurable latency and failures
+
+    Responses are picked from the prompt: symptom analyses come back in the
+    RISK_LEVEL/ASSESSMENT/... format, vet directory prompts get a JSON array
+    of the requested size, and everything else gets a short canned answer.
+    The risk level is derived from a hash of the prompt, so the same
+    submission always gets the same analysis.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_spread_ms: float = 400.0,
+        distribution: str = "lognormal",
+        error_rate: float = 0.0,
+        stream_chunk_chars: int = 40,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            latency_ms: Median response latency
+            latency_spread_ms: Spread of the latency distribution
+                (half-width for "uniform", approximate p84 - median for "lognormal")
+            distribution: "fixed", "uniform" or "lognormal"
+            error_rate: Probability (0-1) that a call fails
+            stream_chunk_chars: Characters per streamed chunk
+            seed: Random seed for reproducible runs (optional)
+        """
+        if distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency_ms = latency_ms
+        self.latency_spread_ms = latency_spread_ms
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate(self, contents: Any, system_instruction: Optional[str] = None, **kwargs: Any) -> str:
+        time.sleep(self._sample_latency())
+        if self._should_fail():
+            raise FakeUpstreamError("Simulated upstream failure")
+        return self._respond(self._prompt_text(contents), system_instruction or "")
+
+    def generate_stream(self, contents: Any, system_instruction: Optional[str] = None, **kwargs: Any) -> Iterator[str]:
+        text = self._respond(self._prompt_text(contents), system_instruction or "")
+        chunks = [
+            text[i:i + self.stream_chunk_chars]
+            for i in range(0, len(text), self.stream_chunk_chars)
+        ]
+        fail_at = self._random_index(len(chunks)) if self._should_fail() else None
+        # Spread the sampled latency over the chunks, front-loading time to first chunk
+        latency = self._sample_latency()
+        time.sleep(latency * 0.5)
+        per_chunk = latency * 0.5 / max(len(chunks), 1)
+        for idx, chunk in enumerate(chunks):
+            if idx == fail_at:
+                raise FakeUpstreamError("Simulated upstream failure mid-stream")
+            if idx:
+                time.sleep(per_chunk)
+            yield chunk
+
+    def _sample_latency(self) -> float:
+        """Draw one latency in seconds from the configured distribution"""
+        with self._lock:
+            if self.distribution == "fixed":
+                ms = self.latency_ms
+            elif self.distribution == "uniform":
+                ms = self._random.uniform(
+                    self.latency_ms - self.latency_spread_ms,
+                    self.latency_ms + self.latency_spread_ms
+                )
+            else:
+                sigma = (self.latency_spread_ms / self.latency_ms) if self.latency_ms > 0 else 0.0
+                ms = self.latency_ms * self._random.lognormvariate(0.0, sigma)
+        return max(ms, 0.0) / 1000
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _random_index(self, n: int) -> int:
+        with self._lock:
+            return self._random.randrange(max(n, 1))
+
+    @staticmethod
+    def _prompt_text(contents: Any) -> str:
+        """Extract the text parts from a prompt or content list"""
+        if isinstance(contents, str):
+            return contents
+        return "\n".join(part for part in contents if isinstance(part, str))
+
+    def _respond(self, prompt: str, system_instruction: str = "") -> str:
+        """Choose a canned response for the kind of prompt (or its system instruction)"""
+        if "RISK_LEVEL:" in system_instruction or "RISK_LEVEL:" in prompt:
+            return self._symptom_analysis(prompt)
+        if "JSON array" in prompt:
+            return self._clinic_list(prompt)
+        if "Health Summary for" in prompt:
+            return self._health_summary(prompt)
+        if "climate analysis" in prompt:
+            return (
+                "Expect typical seasonal conditions for this location with moderate temperatures "
+                "of 18-32°C and variable humidity. Keep pets hydrated, watch for heat or damp-related "
+                "skin issues, and check for ticks after outdoor walks."
+            )
+        return (
+            "Thanks for the question. Based on what you've shared, keep a close eye on your pet "
+            "over the next 24-48 hours and note any changes in appetite, energy or behaviour.\n\n"
+            "If symptoms worsen or you notice difficulty breathing, collapse or repeated vomiting, "
+            "contact a veterinarian right away."
+        )
+
+    @staticmethod
+    def _symptom_analysis(prompt: str) -> str:
+        levels = ["EMERGENCY", "URGENT", "MONITOR", "LOW RISK"]
+        level = levels[int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16) % len(levels)]
+        return f"""RISK_LEVEL: {level}
+
+CONTEXT USED:
+Considered the pet's profile, the current season and the symptoms described.
+
+ASSESSMENT:
+This is a simulated assessment generated by the offline AI backend. The symptoms described have been classified as {level.lower()} for testing purposes.
+
+WHAT THIS MEANS:
+• Simulated concern based on the reported symptoms
+• Simulated note about possible causes
+• Simulated note about what to watch for
+
+IMMEDIATE ACTIONS:
+1. Monitor your pet closely for the next 24 hours
+2. Make sure fresh water is available
+3. Contact your veterinarian if symptoms worsen
+"""
+
+    @staticmethod
+    def _clinic_list(prompt: str) -> str:
+        limit_match = re.search(r"(?:list of|Provide) (\d+)", prompt)
+        limit = int(limit_match.group(1)) if limit_match else 10
+        pincode_match = re.search(r"pin code (\d{6})", prompt)
+        city_match = re.search(r"clinics and animal hospitals in (.+?), India", prompt)
+        if pincode_match:
+            location = pincode_match.group(1)
+        elif city_match:
+            location = city_match.group(1)
+        else:
+            location = "India"
+
+        clinics: List[Dict[str, Any]] = [
+            {
+                "name": f"Test Veterinary Clinic {i + 1}",
+                "address": f"{i + 1} Test Road, {location}",
+                "phone": f"+91-90000{i:05d}",
+                "services": ["General Checkup", "Vaccination", "Surgery"],
+                "specialties": ["Small Animal Medicine"],
+                "hours": "Mon-Sat: 9:00 AM - 8:00 PM",
+                "emergency": i % 3 == 0,
+                "rating": round(4.9 - (i % 10) * 0.1, 1),
+                "notes": "Simulated clinic from the offline AI backend.",
+                "distance": f"{1.0 + i * 0.5:.1f} km"
+            }
+            for i in range(limit)
+        ]
+        return "```json\n" + json.dumps(clinics, indent=2) + "\n```"
+
+    @staticmethod
+    def _health_summary(prompt: str) -> str:
+        name_match = re.search(r"Health Summary for (.+)", prompt)
+        name = name_match.group(1).strip() if name_match else "your pet"
+        return f"""# 🐾 Health Summary for {name}
+
+**Based on:** Simulated data from the offline AI backend
+
+## Current Health Overview
+{name} appears to be in stable health according to this simulated summary.
+
+## Key Observations
+No real analysis was performed; this text exists for load testing and CI.
+
+## Recommendations
+
+1. Keep up with routine vaccinations
+2. Maintain a balanced diet and regular exercise
+3. Provide fresh water and shade during the current season
+4. Check for ticks and fleas after outdoor walks
+5. Schedule an annual wellness exam
+"""
+
+
+def create_backend(settings: Any) -> AIBackend:
+    """
+    Build the backend selected by the AI_BACKEND setting
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        A GeminiBackend or FakeBackend
+
+    Raises:
+        ValueError: If AI_BACKEND names an unknown backend
+    """
+    if settings.ai_backend == "gemini":
+        return GeminiBackend(settings.gemini_api_key)
+    if settings.ai_backend == "fake":
+        return FakeBackend(
+            latency_ms=settings.ai_fake_latency_ms,
+            latency_spread_ms=settings.ai_fake_latency_spread_ms,
+            distribution=settings.ai_fake_latency_distribution,
+            error_rate=settings.ai_fake_error_rate,
+            stream_chunk_chars=settings.ai_fake_stream_chunk_chars,
+            seed=settings.ai_fake_seed
+        )
+    raise ValueError(f"Unknown AI_BACKEND: {settings.ai_backend}")
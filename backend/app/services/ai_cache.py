@@ -0,0 +1,172 @@
+"""
+Content-addressed cache for parsed AI symptom analyses
+"""
+from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import copy
+import hashlib
+import logging
+import time
+
+from app.database import get_database
+from app.services.index_registry import index_registry
+
+
+logger = logging.getLogger(__name__)
+
+
+class AIResponseCache:
+    """
+    Two-tier cache for parsed Gemini analyses
+
+    Entries are keyed on a SHA-256 of the exact prompt plus the hashes of any
+    uploaded media, so only byte-identical submissions share an entry. The
+    first tier is a bounded in-process LRU; the optional second tier is a
+    MongoDB collection whose documents expire through a TTL index.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: int,
+        enabled: bool = True,
+        use_mongo: bool = False,
+        collection_name: str = "ai_response_cache"
+    ):
+        """
+        Args:
+            max_entries: Maximum entries held in the in-process tier
+            ttl_seconds: Lifetime of an entry in either tier
+            enabled: Turn the cache off entirely when False
+            use_mongo: Enable the MongoDB-backed tier
+            collection_name: Collection used by the MongoDB tier
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.use_mongo = use_mongo
+        self.collection_name = collection_name
+        if enabled and use_mongo:
+            # TTL index backing the MongoDB tier
+            index_registry.declare(collection_name, "expiresAt", expireAfterSeconds=0)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters = {
+            "memoryHits": 0,
+            "mongoHits": 0,
+            "misses": 0,
+            "stores": 0,
+            "bypassed": 0,
+            "evictions": 0
+        }
+
+    @staticmethod
+    def build_key(prompt: str, media: Optional[List[bytes]] = None) -> str:
+        """
+        Build a canonical cache key
+
+        Args:
+            prompt: Fully rendered prompt text
+            media: Raw bytes of each uploaded image/video, in upload order
+
+        Returns:
+            Hex SHA-256 digest identifying the request
+        """
+        parts = [hashlib.sha256(prompt.encode("utf-8")).hexdigest()]
+        for blob in media or []:
+            parts.append(hashlib.sha256(blob).hexdigest())
+        return hashlib.sha256("|".join(parts).encode("ascii")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached analysis, checking memory first and then MongoDB
+
+        Args:
+            key: Key from build_key
+
+        Returns:
+            A copy of the cached analysis, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._counters["memoryHits"] += 1
+                return copy.deepcopy(value)
+            del self._entries[key]
+
+        if self.use_mongo:
+            try:
+                doc = await get_database()[self.collection_name].find_one({
+                    "_id": key,
+                    "expiresAt": {"$gt": datetime.utcnow()}
+                })
+            except Exception as e:
+                logger.warning(f"AI cache lookup failed: {e}")
+                doc = None
+            if doc:
+                self._counters["mongoHits"] += 1
+                remaining = (doc["expiresAt"] - datetime.utcnow()).total_seconds()
+                self._remember(key, doc["value"], remaining)
+                return copy.deepcopy(doc["value"])
+
+        self._counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store an analysis in every enabled tier
+
+        Args:
+            key: Key from build_key
+            value: Parsed analysis dict
+        """
+        if not self.enabled:
+            return
+
+        self._remember(key, value, self.ttl_seconds)
+        self._counters["stores"] += 1
+
+        if self.use_mongo:
+            now = datetime.utcnow()
+            try:
+                await get_database()[self.collection_name].update_one(
+                    {"_id": key},
+                    {"$set": {
+                        "value": value,
+                        "createdAt": now,
+                        "expiresAt": now + timedelta(seconds=self.ttl_seconds)
+                    }},
+                    upsert=True
+                )
+            except Exception as e:
+                logger.warning(f"AI cache write failed: {e}")
+
+    def record_bypass(self) -> None:
+        """Count a request that explicitly skipped the cache"""
+        self._counters["bypassed"] += 1
+
+    def _remember(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        """Insert into the in-process tier, evicting the least recently used entry"""
+        self._entries[key] = (time.monotonic() + ttl_seconds, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache counters"""
+        hits = self._counters["memoryHits"] + self._counters["mongoHits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "mongoTier": self.use_mongo,
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            **self._counters,
+            "hitRate": round(hits / lookups, 4) if lookups else 0.0
+        }
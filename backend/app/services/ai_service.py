@@ -1,25 +1,560 @@
 """
 AI service for symptom analysis using Google Gemini AI
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, AsyncIterator, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+from datetime import datetime
 import json
 import base64
-from PIL import Image
-import io
-import google.generativeai as genai
 from app.config import settings
 from app.models.symptom_check import RiskLevel
+from app.services.ai_backends import create_backend
+from app.services.ai_cache import AIResponseCache
+from app.services.vet_directory_cache import VetDirectoryCache, normalize_location_key
+from app.services.climate_context import ClimateContextStore, build_climate_key
+from app.services.image_pipeline import ImagePipeline
+from app.services.prompts import SYMPTOM_ANALYSIS_INSTRUCTION
+from app.utils.single_flight import SingleFlight
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.priority_scheduler import PriorityScheduler, EMERGENCY, NORMAL, BACKGROUND
+from app.utils.keyword_matcher import KeywordMatcher
+from app.utils.prompt_budget import PromptAccountant
+from app.utils.retry_policy import RetryingCaller, RetryPolicy, RetryBudget, parse_retry_policies
+from app.data.triage_keywords import TRIAGE_KEYWORDS, NEGATION_CUES, NEGATION_WINDOW
+
+
+# Gemini risk labels mapped to the RiskLevel enum
+RISK_LEVEL_MAP: Dict[str, RiskLevel] = {
+    "EMERGENCY": RiskLevel.EMERGENCY,
+    "URGENT": RiskLevel.URGENT,
+    "MONITOR": RiskLevel.MONITOR,
+    "LOW RISK": RiskLevel.LOW_RISK,
+    "LOW_RISK": RiskLevel.LOW_RISK
+}
+
+# Section headers Gemini is instructed to emit, in prompt order
+SECTION_HEADERS = ["CONTEXT USED:", "ASSESSMENT:", "WHAT THIS MEANS:", "IMMEDIATE ACTIONS:"]
+
+# Keyword triage used when Gemini is unavailable
+TRIAGE_MATCHER = KeywordMatcher(TRIAGE_KEYWORDS, NEGATION_CUES, NEGATION_WINDOW)
+
+
+class AISlotTimeoutError(Exception):
+    """
+    Raised when no executor slot frees up in time
+
+    Local congestion rather than an upstream failure, so it is kept out of
+    the circuit breaker's error window and is not retried.
+    """
+
+
+class AIExecutor:
+    """
+    Runs blocking Gemini SDK calls off the event loop
+
+    Calls are dispatched to a dedicated, bounded thread pool. A semaphore caps
+    the number of calls in flight, and every call is subject to a timeout so a
+    slow upstream can never hold a request handler indefinitely. Slots are
+    handed out by a PriorityScheduler, so emergency work has reserved
+    capacity and background work (summaries, directory lookups) yields to it.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_in_flight: int,
+        default_timeout: float,
+        emergency_reserved: int = 0,
+        background_limit: Optional[int] = None
+    ):
+        """
+        Args:
+            max_workers: Size of the dedicated thread pool
+            max_in_flight: Maximum concurrent Gemini calls
+            default_timeout: Timeout in seconds applied when a call passes none
+            emergency_reserved: In-flight slots only the emergency lane may use
+            background_limit: In-flight slots the background lane may use (defaults to all unreserved)
+        """
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self.default_timeout = default_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+        self._scheduler = PriorityScheduler(
+            total_slots=max_in_flight,
+            emergency_reserved=emergency_reserved,
+            background_limit=max_in_flight if background_limit is None else background_limit
+        )
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._slot_timeouts = 0
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        priority: str = NORMAL,
+        **kwargs: Any
+    ) -> Any:
+        """
+        Run a blocking callable in the Gemini thread pool
+
+        Waiting for a free slot and the call itself are each bounded by the
+        timeout, so a call that times out was slow upstream, not stuck behind
+        local work. A slot is only released once the worker thread has
+        actually finished, so timed-out calls still count against the
+        in-flight limit.
+
+        Args:
+            fn: Blocking callable to execute
+            timeout: Timeout in seconds (defaults to the executor default)
+            priority: Scheduler lane ("emergency", "normal" or "background")
+
+        Returns:
+            Whatever the callable returns
+
+        Raises:
+            AISlotTimeoutError: If no slot frees up in time
+            asyncio.TimeoutError: If the call does not complete in time
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        await self._acquire(priority, timeout)
+        deadline = time.monotonic() + timeout
+
+        self._in_flight += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._pool, lambda: fn(*args, **kwargs))
+        except Exception:
+            self._in_flight -= 1
+            self._scheduler.release(priority)
+            raise
+        future.add_done_callback(lambda f: self._on_call_done(f, priority))
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(future),
+                max(deadline - time.monotonic(), 0)
+            )
+        except asyncio.TimeoutError:
+            self._timed_out += 1
+            raise
+
+    async def stream(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        priority: str = NORMAL,
+        **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate a blocking iterator in the Gemini thread pool
+
+        The iterator returned by ``fn`` is consumed on a worker thread and its
+        items are handed back to the event loop as they arrive. The timeout
+        bounds the wait for a slot and is then a deadline for the whole
+        stream; streams share the in-flight limit with run().
+
+        Args:
+            fn: Blocking callable returning an iterator
+            timeout: Deadline in seconds for the full stream (defaults to the executor default)
+            priority: Scheduler lane ("emergency", "normal" or "background")
+
+        Yields:
+            Items produced by the iterator
+
+        Raises:
+            AISlotTimeoutError: If no slot frees up in time
+            asyncio.TimeoutError: If the stream does not finish in time
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        await self._acquire(priority, timeout)
+        deadline = time.monotonic() + timeout
+
+        self._in_flight += 1
+        loop = asyncio.get_running_loop()
+        queue: "asyncio.Queue[Tuple[Any, Optional[BaseException]]]" = asyncio.Queue()
+        finished = object()
+        stop = threading.Event()
+
+        def _produce() -> None:
+            try:
+                for item in fn(*args, **kwargs):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (finished, e))
+                raise
+            loop.call_soon_threadsafe(queue.put_nowait, (finished, None))
+
+        try:
+            future = loop.run_in_executor(self._pool, _produce)
+        except Exception:
+            self._in_flight -= 1
+            self._scheduler.release(priority)
+            raise
+        future.add_done_callback(lambda f: self._on_call_done(f, priority))
+
+        try:
+            while True:
+                item, error = await asyncio.wait_for(
+                    queue.get(),
+                    max(deadline - time.monotonic(), 0)
+                )
+                if item is finished:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        except asyncio.TimeoutError:
+            self._timed_out += 1
+            raise
+        finally:
+            # Tell the worker to stop pulling chunks if the consumer went away
+            stop.set()
+
+    async def _acquire(self, priority: str, timeout: float) -> None:
+        """Wait up to ``timeout`` seconds for a scheduler slot"""
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._scheduler.acquire(priority), timeout)
+        except asyncio.TimeoutError:
+            self._slot_timeouts += 1
+            raise AISlotTimeoutError(f"No {priority} AI slot free within {timeout:.1f}s")
+        finally:
+            self._waiting -= 1
+
+    def _on_call_done(self, future: "asyncio.Future[Any]", priority: str) -> None:
+        """Release the in-flight slot when the worker thread finishes"""
+        self._in_flight -= 1
+        self._scheduler.release(priority)
+        if future.cancelled() or future.exception() is not None:
+            self._failed += 1
+        else:
+            self._completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of executor counters"""
+        return {
+            "maxWorkers": self.max_workers,
+            "maxInFlight": self.max_in_flight,
+            "defaultTimeoutSeconds": self.default_timeout,
+            "inFlight": self._in_flight,
+            "waiting": self._waiting,
+            "completed": self._completed,
+            "failed": self._failed,
+            "timedOut": self._timed_out,
+            "slotTimeouts": self._slot_timeouts,
+            "scheduler": self._scheduler.stats()
+        }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release the thread pool"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class StreamingResponseParser:
+    """
+    Incremental parser for Gemini's RISK_LEVEL / section response format
+
+    Text chunks are fed in as they stream from Gemini. Events are produced as
+    soon as they are complete: the risk level once its line has arrived, and
+    each detailed section once the next header (or the end of the stream)
+    closes it. Section splitting mirrors AIService._parse_gemini_response.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._text_parts: List[str] = []
+        self._risk_level_sent = False
+        self._current_section: Optional[str] = None
+        self._current_points: List[str] = []
+
+    @property
+    def text(self) -> str:
+        """Full response text received so far"""
+        return "".join(self._text_parts)
+
+    @property
+    def risk_level_sent(self) -> bool:
+        """Whether a risk_level event has been produced"""
+        return self._risk_level_sent
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Consume a chunk of streamed text
+
+        Args:
+            chunk: Next piece of the Gemini response
+
+        Returns:
+            List of (event, payload) tuples completed by this chunk
+        """
+        self._text_parts.append(chunk)
+        self._buffer += chunk
+        events = []
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            events.extend(self._process_line(line))
+        return events
+
+    def finish(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Flush the trailing line and the final open section
+
+        Returns:
+            List of (event, payload) tuples still pending
+        """
+        events = []
+        if self._buffer:
+            events.extend(self._process_line(self._buffer))
+            self._buffer = ""
+        events.extend(self._close_section())
+        return events
+
+    def _process_line(self, raw_line: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Turn one complete line into zero or more events"""
+        line = raw_line.strip()
+
+        if line.startswith("RISK_LEVEL:"):
+            if self._risk_level_sent:
+                return []
+            self._risk_level_sent = True
+            label = line.split(":", 1)[1].strip().upper()
+            return [("risk_level", {"riskLevel": RISK_LEVEL_MAP.get(label, RiskLevel.MONITOR)})]
+
+        if line in SECTION_HEADERS:
+            events = self._close_section()
+            self._current_section = line.rstrip(':')
+            self._current_points = []
+            return events
+
+        if self._current_section and line:
+            if self._current_section == "IMMEDIATE ACTIONS" and line[0].isdigit():
+                line = line.lstrip('0123456789.').strip()
+            self._current_points.append(line)
+        return []
+
+    def _close_section(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Emit the section being accumulated, if it has any content"""
+        events = []
+        if self._current_section and self._current_points:
+            events.append(("section", {
+                "title": self._current_section,
+                "points": self._current_points
+            }))
+        self._current_section = None
+        self._current_points = []
+        return events
 
 
 class AIService:
     """Service for AI-powered symptom analysis"""
-    
+
     def __init__(self):
-        """Initialize Gemini AI client"""
-        # Configure Gemini API with the correct key and model
-        genai.configure(api_key=settings.gemini_api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-    
+        """Initialize the AI backend (Gemini unless AI_BACKEND selects the offline fake)"""
+        self.backend = create_backend(settings)
+        self.executor = AIExecutor(
+            max_workers=settings.ai_thread_pool_size,
+            max_in_flight=settings.ai_max_in_flight,
+            default_timeout=settings.ai_request_timeout_seconds,
+            emergency_reserved=settings.ai_emergency_reserved_slots,
+            background_limit=settings.ai_background_max_in_flight
+        )
+        self.response_cache = AIResponseCache(
+            max_entries=settings.ai_cache_max_entries,
+            ttl_seconds=settings.ai_cache_ttl_seconds,
+            enabled=settings.ai_cache_enabled,
+            use_mongo=settings.ai_cache_mongo_enabled
+        )
+        self.single_flight = SingleFlight()
+        self.circuit_breaker = CircuitBreaker(
+            window_seconds=settings.ai_breaker_window_seconds,
+            min_calls=settings.ai_breaker_min_calls,
+            error_threshold=settings.ai_breaker_error_threshold,
+            open_seconds=settings.ai_breaker_open_seconds,
+            half_open_max_calls=settings.ai_breaker_half_open_calls,
+            min_timeout=settings.ai_adaptive_timeout_min_seconds,
+            max_timeout=settings.ai_request_timeout_seconds,
+            timeout_multiplier=settings.ai_adaptive_timeout_multiplier
+        )
+        self.vet_directory_cache = VetDirectoryCache(
+            fresh_seconds=settings.vet_directory_fresh_seconds,
+            max_age_seconds=settings.vet_directory_max_age_seconds
+        )
+        self.climate_contexts = ClimateContextStore()
+        self.image_pipeline = ImagePipeline(
+            max_workers=settings.image_pipeline_workers,
+            max_edge=settings.image_max_edge,
+            quality=settings.image_jpeg_quality,
+            enabled=settings.image_pipeline_enabled
+        )
+        self.prompt_accountant = PromptAccountant(budgets={
+            "symptom_check": settings.prompt_budget_symptom_check_chars,
+            "pet_summary": settings.prompt_budget_pet_summary_chars,
+            "symptom_followup": settings.prompt_budget_symptom_followup_chars,
+            "vet_question": settings.prompt_budget_vet_question_chars
+        })
+        self.retry = RetryingCaller(
+            policies=parse_retry_policies(settings.ai_retry_policies),
+            default_policy=RetryPolicy(max_attempts=settings.ai_retry_default_attempts),
+            budget=RetryBudget(
+                ratio=settings.ai_retry_budget_ratio,
+                min_per_second=settings.ai_retry_budget_min_per_second
+            ),
+            base_delay=settings.ai_retry_base_delay_seconds,
+            max_delay=settings.ai_retry_max_delay_seconds,
+            deadline_seconds=settings.ai_retry_deadline_seconds,
+            hedge_min_delay=settings.ai_hedge_min_delay_seconds
+        )
+
+    async def generate_text(
+        self,
+        contents: Any,
+        timeout: Optional[float] = None,
+        priority: str = NORMAL,
+        system_instruction: Optional[str] = None,
+        endpoint: str = "other",
+        **kwargs: Any
+    ) -> str:
+        """
+        Generate content with Gemini without blocking the event loop
+
+        All Gemini calls should go through this method so they share the
+        executor's concurrency limit, timeouts, the circuit breaker and the
+        endpoint's retry policy, and so their prompt sizes are accounted per
+        endpoint. Generation has no side effects, so transient failures are
+        retried with backoff and slow calls may be hedged (see RetryingCaller).
+
+        Args:
+            contents: Prompt string or list of content parts
+            timeout: Per-attempt timeout in seconds (defaults to the breaker's adaptive timeout)
+            priority: Scheduler lane ("emergency", "normal" or "background")
+            system_instruction: Static instruction from app.services.prompts (optional)
+            endpoint: Name prompt sizes and the retry policy are looked up under
+            **kwargs: Extra arguments for generate_content (e.g. safety_settings)
+
+        Returns:
+            Response text from Gemini
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is rejecting calls
+            AISlotTimeoutError: If no executor slot freed up in time (not retried)
+        """
+        def _call() -> str:
+            return self.backend.generate(contents, system_instruction=system_instruction, **kwargs)
+
+        async def _attempt() -> str:
+            self.circuit_breaker.before_call()
+            # Set on the worker thread, so the latency sample leaves out the wait for a slot
+            call_started: List[float] = []
+
+            def _timed_call() -> str:
+                call_started.append(time.monotonic())
+                return _call()
+
+            try:
+                text = await self.executor.run(
+                    _timed_call,
+                    timeout=self.circuit_breaker.current_timeout() if timeout is None else timeout,
+                    priority=priority
+                )
+            except (asyncio.CancelledError, AISlotTimeoutError):
+                # Our own congestion says nothing about Gemini's health
+                self.circuit_breaker.record_cancelled()
+                raise
+            except Exception:
+                self.circuit_breaker.record_failure()
+                raise
+            self.circuit_breaker.record_success(time.monotonic() - call_started[0])
+            return text
+
+        self.prompt_accountant.record(endpoint, system_instruction, contents)
+        return await self.retry.call(endpoint, _attempt)
+
+    async def generate_text_stream(
+        self,
+        contents: Any,
+        timeout: Optional[float] = None,
+        priority: str = NORMAL,
+        system_instruction: Optional[str] = None,
+        endpoint: str = "other",
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text from Gemini without blocking the event loop
+
+        Failures before the first chunk are retried under the endpoint's
+        retry policy; streams are never hedged.
+
+        Args:
+            contents: Prompt string or list of content parts
+            timeout: Deadline in seconds for each streaming attempt (optional)
+            priority: Scheduler lane ("emergency", "normal" or "background")
+            system_instruction: Static instruction from app.services.prompts (optional)
+            endpoint: Name prompt sizes and the retry policy are looked up under
+            **kwargs: Extra arguments for generate_content (e.g. safety_settings)
+
+        Yields:
+            Text chunks in arrival order
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is rejecting calls
+            AISlotTimeoutError: If no executor slot freed up in time (not retried)
+        """
+        def _call():
+            return self.backend.generate_stream(contents, system_instruction=system_instruction, **kwargs)
+
+        self.prompt_accountant.record(endpoint, system_instruction, contents)
+        self.retry.record_call()
+        started = time.monotonic()
+        attempt_number = 1
+        while True:
+            self.circuit_breaker.before_call()
+            streamed = False
+            try:
+                async for text in self.executor.stream(_call, timeout=timeout, priority=priority):
+                    streamed = True
+                    yield text
+            except (asyncio.CancelledError, GeneratorExit, AISlotTimeoutError):
+                self.circuit_breaker.record_cancelled()
+                raise
+            except Exception as e:
+                self.circuit_breaker.record_failure()
+                # Text already handed to the caller can't be taken back, so only retry before the first chunk
+                delay = None if streamed else self.retry.retry_delay(endpoint, e, attempt_number, started)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt_number += 1
+                continue
+            # Whole-stream durations are not comparable to single calls, so no latency sample
+            self.circuit_breaker.record_success()
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        """Runtime metrics for the AI execution layer"""
+        return {
+            "backend": self.backend.name,
+            "executor": self.executor.stats(),
+            "circuitBreaker": self.circuit_breaker.stats(),
+            "responseCache": self.response_cache.stats(),
+            "singleFlight": self.single_flight.stats(),
+            "vetDirectoryCache": self.vet_directory_cache.stats(),
+            "climateContexts": self.climate_contexts.stats(),
+            "imagePipeline": self.image_pipeline.stats(),
+            "prompts": self.prompt_accountant.stats(),
+            "retries": self.retry.stats()
+        }
+
     async def analyze_symptoms(
         self,
         symptoms: str,
@@ -27,7 +562,8 @@ class AIService:
         subcategory: Optional[str],
         pet_context: Optional[Dict[str, Any]] = None,
         images: Optional[List[str]] = None,
-        video: Optional[str] = None
+        video: Optional[str] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Analyze pet symptoms using Gemini AI with comprehensive pet context
@@ -39,6 +575,7 @@ class AIService:
             pet_context: Comprehensive pet information including profile, history, season, location
             images: List of base64 encoded images (optional)
             video: Base64 encoded video (optional)
+            use_cache: Serve and store identical submissions from the response cache
         
         Returns:
             Dict with risk assessment and recommendations
@@ -63,14 +600,7 @@ class AIService:
         print(f"Video: {bool(video)}")
         print("="*80 + "\n")
         
-        # Handle empty symptoms - use media description if available
-        if not symptoms or not symptoms.strip():
-            if images and len(images) > 0:
-                symptoms = f"Please analyze the uploaded image(s) for any visible health concerns in the {category.lower()} category."
-            elif video:
-                symptoms = f"Please analyze the uploaded video for any visible health concerns in the {category.lower()} category."
-            else:
-                symptoms = f"General {category.lower()} assessment requested."
+        symptoms = self._normalize_symptoms(symptoms, category, images, video)
         
         # Build comprehensive prompt with pet context
         prompt = self._build_veterinary_prompt(
@@ -83,90 +613,44 @@ class AIService:
         print(prompt)
         print("="*80 + "\n")
         
+        # Decode uploaded media once - the raw bytes feed both the cache key and Gemini
+        image_blobs, video_bytes = self._decode_media(images, video)
+        
+        cache_key = self.response_cache.build_key(
+            prompt, image_blobs + ([video_bytes] if video_bytes else [])
+        )
+        cached = await self._get_cached_analysis(cache_key, use_cache)
+        if cached is not None:
+            return cached
+        
+        # Skip image preprocessing and the upstream wait entirely while Gemini is failing
+        if self.circuit_breaker.is_open:
+            print("Gemini circuit is open - using keyword-based fallback")
+            return await self._mock_ai_response(
+                symptoms, category, subcategory, pet_context
+            )
+        
         try:
             print("Calling Gemini API...")
             
-            # Prepare content for Gemini
-            content_parts = []
+            content_parts = await self._build_content_parts(prompt, image_blobs, video_bytes)
             
-            # Add images if provided (BEFORE the prompt for better context)
-            if images and len(images) > 0:
-                print(f"Processing {len(images)} image(s) for Gemini...")
-                
-                for idx, img_data in enumerate(images):
-                    try:
-                        # Remove data URL prefix if present
-                        if ',' in img_data:
-                            img_data = img_data.split(',')[1]
-                        
-                        # Decode base64 image
-                        img_bytes = base64.b64decode(img_data)
-                        img = Image.open(io.BytesIO(img_bytes))
-                        
-                        # Convert to RGB if necessary (handle RGBA, grayscale, etc.)
-                        if img.mode not in ('RGB', 'L'):
-                            print(f"  - Converting image {idx + 1} from {img.mode} to RGB")
-                            img = img.convert('RGB')
-                        
-                        # Add image to content parts
-                        content_parts.append(img)
-                        print(f"  - Image {idx + 1}: {img.format} {img.size} {img.mode}")
-                    except Exception as e:
-                        print(f"  - Error processing image {idx + 1}: {type(e).__name__}: {e}")
-                        import traceback
-                        print(f"  - Traceback: {traceback.format_exc()}")
-                        # Continue processing other images even if one fails
-                        continue
-            
-            # Add the prompt after images
-            content_parts.append(prompt)
-            
-            # Add video if provided
-            if video:
-                print("Processing video for Gemini...")
-                try:
-                    # Remove data URL prefix if present
-                    if ',' in video:
-                        video_data = video.split(',')[1]
-                    else:
-                        video_data = video
-                    
-                    # Decode base64 video
-                    video_bytes = base64.b64decode(video_data)
-                    content_parts.append({
-                        'mime_type': 'video/mp4',
-                        'data': video_bytes
-                    })
-                    print("  - Video added successfully")
-                except Exception as e:
-                    print(f"  - Error processing video: {e}")
-            
-            print(f"Sending {len(content_parts)} content part(s) to Gemini (images: {len([p for p in content_parts if isinstance(p, Image.Image)])}, text: {len([p for p in content_parts if isinstance(p, str)])})...")
-            
-            # Generate response using Gemini with all content
-            # Use safety settings to allow medical content
-            from google.generativeai.types import HarmCategory, HarmBlockThreshold
-            
-            safety_settings = {
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
-            
-            response = self.model.generate_content(
+            response_text = await self.generate_text(
                 content_parts,
-                safety_settings=safety_settings
+                priority=self._analysis_priority(symptoms, subcategory),
+                system_instruction=SYMPTOM_ANALYSIS_INSTRUCTION,
+                endpoint="symptom_check",
+                safety_settings=self._safety_settings()
             )
             
             print("\n" + "="*80)
             print("GEMINI API RESPONSE:")
             print("="*80)
-            print(response.text)
+            print(response_text)
             print("="*80 + "\n")
             
             # Parse the response
-            analysis = self._parse_gemini_response(response.text)
+            analysis = self._parse_gemini_response(response_text)
             
             print("\n" + "="*80)
             print("PARSED ANALYSIS:")
@@ -175,6 +659,9 @@ class AIService:
             print(f"Summary: {analysis['summary']}")
             print("="*80 + "\n")
             
+            # Only genuine Gemini analyses are cached - fallbacks are not
+            await self.response_cache.set(cache_key, analysis)
+            
             return analysis
             
         except Exception as e:
@@ -192,6 +679,224 @@ class AIService:
                 symptoms, category, subcategory, pet_context
             )
     
+    async def analyze_symptoms_stream(
+        self,
+        symptoms: str,
+        category: str,
+        subcategory: Optional[str],
+        pet_context: Optional[Dict[str, Any]] = None,
+        images: Optional[List[str]] = None,
+        video: Optional[str] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming variant of analyze_symptoms
+        
+        Uses Gemini's streaming generation and yields events as soon as they
+        can be parsed: a "risk_level" event when the RISK_LEVEL line arrives,
+        then a "section" event per completed detailed section. The last event
+        is always "analysis", carrying the full parsed result (identical in
+        shape to analyze_symptoms) which callers should treat as authoritative.
+        
+        Args:
+            symptoms: Text description of symptoms
+            category: Health category
+            subcategory: Health subcategory
+            pet_context: Comprehensive pet information including profile, history, season, location
+            images: List of base64 encoded images (optional)
+            video: Base64 encoded video (optional)
+            use_cache: Serve and store identical submissions from the response cache
+        
+        Yields:
+            (event, payload) tuples
+        """
+        symptoms = self._normalize_symptoms(symptoms, category, images, video)
+        prompt = self._build_veterinary_prompt(
+            symptoms, category, subcategory, pet_context
+        )
+        image_blobs, video_bytes = self._decode_media(images, video)
+        
+        cache_key = self.response_cache.build_key(
+            prompt, image_blobs + ([video_bytes] if video_bytes else [])
+        )
+        cached = await self._get_cached_analysis(cache_key, use_cache)
+        if cached is not None:
+            for event in self._analysis_events(cached):
+                yield event
+            return
+        
+        if self.circuit_breaker.is_open:
+            print("Gemini circuit is open - using keyword-based fallback")
+            analysis = await self._mock_ai_response(
+                symptoms, category, subcategory, pet_context
+            )
+            for event in self._analysis_events(analysis):
+                yield event
+            return
+        
+        parser = StreamingResponseParser()
+        try:
+            content_parts = await self._build_content_parts(prompt, image_blobs, video_bytes)
+            async for chunk in self.generate_text_stream(
+                content_parts,
+                priority=self._analysis_priority(symptoms, subcategory),
+                system_instruction=SYMPTOM_ANALYSIS_INSTRUCTION,
+                endpoint="symptom_check",
+                safety_settings=self._safety_settings()
+            ):
+                for event in parser.feed(chunk):
+                    yield event
+            for event in parser.finish():
+                yield event
+        except Exception as e:
+            print(f"Gemini streaming error: {type(e).__name__}: {e}")
+            print("Falling back to mock response...")
+            analysis = await self._mock_ai_response(
+                symptoms, category, subcategory, pet_context
+            )
+            # Don't repeat a risk level the client already has - the final analysis event is authoritative
+            for event in self._analysis_events(analysis, include_risk_level=not parser.risk_level_sent):
+                yield event
+            return
+        
+        analysis = self._parse_gemini_response(parser.text)
+        await self.response_cache.set(cache_key, analysis)
+        yield ("analysis", analysis)
+    
+    def is_likely_emergency(self, symptoms: Optional[str], subcategory: Optional[str]) -> bool:
+        """
+        Cheap pre-AI triage: does the submission look like an emergency?
+        
+        Uses the Emergency subcategory or the keyword fallback, so it is safe
+        to call on every request before Gemini has answered.
+        """
+        return subcategory == "Emergency" or self._determine_risk_level(symptoms or "") == RiskLevel.EMERGENCY
+    
+    def _analysis_priority(self, symptoms: str, subcategory: Optional[str]) -> str:
+        """Send likely emergencies to the scheduler's fast lane"""
+        return EMERGENCY if self.is_likely_emergency(symptoms, subcategory) else NORMAL
+    
+    @staticmethod
+    def _analysis_events(
+        analysis: Dict[str, Any],
+        include_risk_level: bool = True
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Replay a complete analysis as the events analyze_symptoms_stream emits"""
+        events = []
+        if include_risk_level:
+            events.append(("risk_level", {"riskLevel": analysis["riskLevel"]}))
+        for section in analysis["detailedSections"]:
+            events.append(("section", section))
+        events.append(("analysis", analysis))
+        return events
+    
+    @staticmethod
+    def _normalize_symptoms(
+        symptoms: str,
+        category: str,
+        images: Optional[List[str]],
+        video: Optional[str]
+    ) -> str:
+        """Handle empty symptoms - use media description if available"""
+        if not symptoms or not symptoms.strip():
+            if images and len(images) > 0:
+                return f"Please analyze the uploaded image(s) for any visible health concerns in the {category.lower()} category."
+            elif video:
+                return f"Please analyze the uploaded video for any visible health concerns in the {category.lower()} category."
+            else:
+                return f"General {category.lower()} assessment requested."
+        return symptoms
+    
+    def _decode_media(
+        self,
+        images: Optional[List[str]],
+        video: Optional[str]
+    ) -> Tuple[List[bytes], Optional[bytes]]:
+        """Decode base64 images and video, skipping any that fail to decode"""
+        image_blobs = []
+        for idx, img_data in enumerate(images or []):
+            try:
+                image_blobs.append(self._decode_base64_media(img_data))
+            except Exception as e:
+                print(f"  - Error decoding image {idx + 1}: {type(e).__name__}: {e}")
+        
+        video_bytes = None
+        if video:
+            try:
+                video_bytes = self._decode_base64_media(video)
+            except Exception as e:
+                print(f"  - Error decoding video: {e}")
+        
+        return image_blobs, video_bytes
+    
+    async def _get_cached_analysis(self, cache_key: str, use_cache: bool) -> Optional[Dict[str, Any]]:
+        """Look up a cached analysis, or record that the caller bypassed the cache"""
+        if not use_cache:
+            self.response_cache.record_bypass()
+            return None
+        
+        cached = await self.response_cache.get(cache_key)
+        if cached is not None:
+            print(f"Serving cached analysis for key {cache_key[:12]}...")
+            cached["riskLevel"] = RiskLevel(cached["riskLevel"])
+        return cached
+    
+    async def _build_content_parts(
+        self,
+        prompt: str,
+        image_blobs: List[bytes],
+        video_bytes: Optional[bytes]
+    ) -> List[Any]:
+        """Assemble Gemini content parts: images first, then the prompt, then video"""
+        content_parts = []
+        
+        # Add images if provided (BEFORE the prompt for better context)
+        if image_blobs:
+            print(f"Processing {len(image_blobs)} image(s) for Gemini...")
+            
+            # Downscaled and re-encoded in worker processes; failed images are skipped
+            for image in await self.image_pipeline.process(image_blobs):
+                content_parts.append({
+                    'mime_type': image['mimeType'],
+                    'data': image['data']
+                })
+        
+        image_count = len(content_parts)
+        
+        # Add the prompt after images
+        content_parts.append(prompt)
+        
+        # Add video if provided
+        if video_bytes:
+            content_parts.append({
+                'mime_type': 'video/mp4',
+                'data': video_bytes
+            })
+            print("  - Video added successfully")
+        
+        print(f"Sending {len(content_parts)} content part(s) to Gemini (images: {image_count}, text: 1)...")
+        
+        return content_parts
+    
+    @staticmethod
+    def _safety_settings() -> Dict[Any, Any]:
+        """Safety settings that allow medical content through"""
+        from google.generativeai.types import HarmCategory, HarmBlockThreshold
+        
+        return {
+            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+        }
+    
+    @staticmethod
+    def _decode_base64_media(data: str) -> bytes:
+        """Decode a base64 payload, stripping any data URL prefix"""
+        if ',' in data:
+            data = data.split(',')[1]
+        return base64.b64decode(data)
+    
     def _build_veterinary_prompt(
         self,
         symptoms: str,
@@ -199,66 +904,73 @@ class AIService:
         subcategory: Optional[str],
         pet_context: Optional[Dict[str, Any]]
     ) -> str:
-        """Build a comprehensive prompt for Gemini AI with full pet context"""
+        """
+        Build the case-specific part of the symptom analysis prompt
+        
+        The role, risk level definitions and response format are sent
+        separately as SYMPTOM_ANALYSIS_INSTRUCTION. Previous checks are listed
+        newest first, active before resolved, and the oldest resolved (then
+        active) checks are dropped if the prompt would exceed the
+        symptom_check budget.
+        """
         
         # Build comprehensive pet context if available
-        context_text = ""
+        profile_text = ""
+        history = []
+        resolved_history = []
         if pet_context:
-            context_text = "\n\nPET PROFILE:"
-            context_text += f"\n- Name: {pet_context.get('name', 'Unknown')}"
-            context_text += f"\n- Breed: {pet_context.get('breed', 'Unknown')}"
-            context_text += f"\n- Age: {pet_context.get('age', 'Unknown')} years old"
-            context_text += f"\n- Gender: {pet_context.get('gender', 'Unknown')}"
+            profile_text = "\n\nPET PROFILE:"
+            profile_text += f"\n- Name: {pet_context.get('name', 'Unknown')}"
+            profile_text += f"\n- Breed: {pet_context.get('breed', 'Unknown')}"
+            profile_text += f"\n- Age: {pet_context.get('age', 'Unknown')} years old"
+            profile_text += f"\n- Gender: {pet_context.get('gender', 'Unknown')}"
             
             if pet_context.get('weight'):
-                context_text += f"\n- Weight: {pet_context['weight']} kg"
+                profile_text += f"\n- Weight: {pet_context['weight']} kg"
             if pet_context.get('lifestyle'):
-                context_text += f"\n- Lifestyle: {pet_context['lifestyle']}"
+                profile_text += f"\n- Lifestyle: {pet_context['lifestyle']}"
             
             # Add medical conditions
             conditions = pet_context.get('conditions', [])
             if conditions:
-                context_text += f"\n- Known Medical Conditions: {', '.join(conditions)}"
+                profile_text += f"\n- Known Medical Conditions: {', '.join(conditions)}"
             else:
-                context_text += "\n- Known Medical Conditions: None"
+                profile_text += "\n- Known Medical Conditions: None"
             
             # Add allergies
             allergies = pet_context.get('allergies', [])
             if allergies:
-                context_text += f"\n- Known Allergies: {', '.join(allergies)}"
+                profile_text += f"\n- Known Allergies: {', '.join(allergies)}"
             else:
-                context_text += "\n- Known Allergies: None"
+                profile_text += "\n- Known Allergies: None"
             
             # Add season and location context
             if pet_context.get('season'):
-                context_text += f"\n- Current Season: {pet_context['season']}"
+                profile_text += f"\n- Current Season: {pet_context['season']}"
             
             if pet_context.get('location'):
                 loc = pet_context['location']
                 if loc.get('city') and loc.get('state'):
-                    context_text += f"\n- Location: {loc['city']}, {loc['state']}"
+                    profile_text += f"\n- Location: {loc['city']}, {loc['state']}"
                     if loc.get('pincode'):
-                        context_text += f" (PIN: {loc['pincode']})"
+                        profile_text += f" (PIN: {loc['pincode']})"
             
-            # Add ACTIVE health concerns
             history = pet_context.get('history', [])
-            if history:
+            resolved_history = pet_context.get('resolved_history', [])
+        
+        # Show up to the last 3 active and 3 resolved checks, in the order they are dropped last to first
+        history_items = [(False, check) for check in history[:3]] + [(True, check) for check in resolved_history[:3]]
+        
+        def render(kept: int) -> str:
+            active = [check for resolved, check in history_items[:kept] if not resolved]
+            resolved = [check for resolved, check in history_items[:kept] if resolved]
+            context_text = profile_text
+            
+            # Add ACTIVE health concerns
+            if active:
                 context_text += f"\n\nACTIVE HEALTH CONCERNS ({len(history)} ongoing):"
-                for i, check in enumerate(history[:3], 1):  # Show last 3 active checks
-                    date = check.get('date')
-                    if date:
-                        from datetime import datetime
-                        if isinstance(date, str):
-                            try:
-                                date_str = datetime.fromisoformat(date.replace('Z', '+00:00')).strftime('%b %d, %Y')
-                            except:
-                                date_str = "Recent"
-                        else:
-                            date_str = date.strftime('%b %d, %Y')
-                    else:
-                        date_str = "Recent"
-                    
-                    context_text += f"\n{i}. {date_str} - {check.get('category', 'Unknown')}"
+                for i, check in enumerate(active, 1):
+                    context_text += f"\n{i}. {self._history_date(check.get('date'), 'Recent')} - {check.get('category', 'Unknown')}"
                     if check.get('subcategory'):
                         context_text += f" ({check['subcategory']})"
                     context_text += f" - Risk: {check.get('riskLevel', 'Unknown')}"
@@ -266,80 +978,37 @@ class AIService:
                         context_text += f"\n   Summary: {check['summary'][:150]}..."
             
             # Add RESOLVED past issues
-            resolved_history = pet_context.get('resolved_history', [])
-            if resolved_history:
+            if resolved:
                 context_text += f"\n\nRESOLVED PAST ISSUES ({len(resolved_history)} addressed):"
-                for i, check in enumerate(resolved_history[:3], 1):  # Show last 3 resolved checks
-                    date = check.get('date')
-                    if date:
-                        from datetime import datetime
-                        if isinstance(date, str):
-                            try:
-                                date_str = datetime.fromisoformat(date.replace('Z', '+00:00')).strftime('%b %d, %Y')
-                            except:
-                                date_str = "Past"
-                        else:
-                            date_str = date.strftime('%b %d, %Y')
-                    else:
-                        date_str = "Past"
-                    
-                    context_text += f"\n{i}. {date_str} - {check.get('category', 'Unknown')}"
+                for i, check in enumerate(resolved, 1):
+                    context_text += f"\n{i}. {self._history_date(check.get('date'), 'Past')} - {check.get('category', 'Unknown')}"
                     if check.get('subcategory'):
                         context_text += f" ({check['subcategory']})"
                     context_text += f" - Was: {check.get('riskLevel', 'Unknown')} (Now Resolved)"
                     if check.get('summary'):
                         context_text += f"\n   Note: {check['summary'][:100]}... [Issue has been addressed]"
-        
-        prompt = f"""You are an experienced veterinarian providing a professional assessment. Analyze the following case and provide a concise, empathetic response.
-
-CASE INFORMATION:
+            
+            return f"""CASE INFORMATION:
 - Category: {category}
 - Subcategory: {subcategory or 'General'}{context_text}
 
 SYMPTOMS DESCRIBED:
 {symptoms}
-
-INSTRUCTIONS:
-Provide a clear, concise response in this EXACT format. Be empathetic but direct. Avoid repetition.
-
-1. First, determine the RISK LEVEL (choose ONE):
-   - EMERGENCY: Life-threatening, needs immediate vet care NOW
-   - URGENT: Needs vet within 12-24 hours
-   - MONITOR: Can monitor at home for 24-48 hours, see vet if worsens
-   - LOW RISK: Minor concern, routine vet visit sufficient
-
-2. Provide your response in this EXACT format:
-
-RISK_LEVEL: [EMERGENCY/URGENT/MONITOR/LOW RISK]
-
-CONTEXT USED:
-[In 1-2 sentences, briefly mention what context you considered: pet's profile (breed, age, medical conditions), location/climate, season, previous health history if available, and any photos/videos provided. Be specific about what information helped your assessment.]
-
-ASSESSMENT:
-[2-3 concise sentences explaining what you observe and why it matters. Be empathetic but direct. If EMERGENCY, start with "⚠️ TAKE YOUR PET TO THE EMERGENCY VET NOW."]
-
-WHAT THIS MEANS:
-• [Key medical concern #1 - one line]
-• [Key medical concern #2 - one line]
-• [Key medical concern #3 - one line if needed]
-
-IMMEDIATE ACTIONS:
-1. [First action with specific timeframe]
-2. [Second action]
-3. [Third action]
-
-Remember:
-- Be concise and to the point
-- Show empathy through tone, not length
-- No repetition between sections
-- Use specific timeframes
-- If emergency, emphasize urgency clearly once
-- Do NOT include a separate SUMMARY line
-- Do NOT include "WHAT TO EXPECT AT THE VET" section
-- ALWAYS include the CONTEXT USED section to show what information informed your assessment
 """
         
-        return prompt
+        return self.prompt_accountant.fit("symptom_check", render, len(history_items))
+    
+    @staticmethod
+    def _history_date(date: Any, default: str) -> str:
+        """Format a history entry's date (datetime or ISO string) for a prompt"""
+        if not date:
+            return default
+        if isinstance(date, str):
+            try:
+                return datetime.fromisoformat(date.replace('Z', '+00:00')).strftime('%b %d, %Y')
+            except ValueError:
+                return default
+        return date.strftime('%b %d, %Y')
     
     def _parse_gemini_response(self, response_text: str) -> Dict[str, Any]:
         """Parse Gemini's response into structured format"""
@@ -354,14 +1023,7 @@ Remember:
                 break
         
         # Map to RiskLevel enum
-        risk_level_map = {
-            "EMERGENCY": RiskLevel.EMERGENCY,
-            "URGENT": RiskLevel.URGENT,
-            "MONITOR": RiskLevel.MONITOR,
-            "LOW RISK": RiskLevel.LOW_RISK,
-            "LOW_RISK": RiskLevel.LOW_RISK
-        }
-        risk_enum = risk_level_map.get(risk_level, RiskLevel.MONITOR)
+        risk_enum = RISK_LEVEL_MAP.get(risk_level, RiskLevel.MONITOR)
         
         # Extract assessment section for summary
         assessment_text = []
@@ -392,7 +1054,7 @@ Remember:
                 continue
             
             # Check for section headers (including new CONTEXT USED section)
-            if line in ["CONTEXT USED:", "ASSESSMENT:", "WHAT THIS MEANS:", "IMMEDIATE ACTIONS:"]:
+            if line in SECTION_HEADERS:
                 # Save previous section if exists
                 if current_section and current_points:
                     detailed_sections.append({
@@ -577,45 +1239,23 @@ Remember:
     def _determine_risk_level(self, symptoms: str) -> RiskLevel:
         """
         Determine risk level based on symptom keywords
-        """
-        symptoms_lower = symptoms.lower()
-        
-        # Emergency keywords
-        emergency_keywords = [
-            'bleeding', 'blood', 'seizure', 'unconscious', 'collapse',
-            'difficulty breathing', 'choking', 'poisoning', 'toxic',
-            'severe pain', 'trauma', 'accident', 'hit by', 'broken bone',
-            'not breathing', 'unresponsive', 'convulsion', 'bloat',
-            'pale gums', 'blue gums', 'distended abdomen'
-        ]
         
-        # Urgent keywords
-        urgent_keywords = [
-            'vomiting', 'diarrhea', 'not eating', 'lethargic', 'fever',
-            'limping', 'swelling', 'discharge', 'coughing', 'sneezing',
-            'scratching excessively', 'loss of appetite', 'dehydrated',
-            'painful', 'whining', 'restless', 'rapid breathing'
-        ]
-        
-        # Monitor keywords
-        monitor_keywords = [
-            'mild', 'slight', 'occasional', 'sometimes', 'minor',
-            'small', 'little', 'bit'
-        ]
+        Negated mentions ("no vomiting") are ignored. Emergency signs win;
+        urgent signs are URGENT when persistent and MONITOR otherwise; mild
+        wording alone is LOW_RISK.
+        """
+        found = TRIAGE_MATCHER.categories(symptoms)
         
-        # Check for emergency
-        if any(keyword in symptoms_lower for keyword in emergency_keywords):
+        if "emergency" in found:
             return RiskLevel.EMERGENCY
         
-        # Check for urgent
-        if any(keyword in symptoms_lower for keyword in urgent_keywords):
+        if "urgent" in found:
             # Check if it's been going on for multiple days
-            if any(word in symptoms_lower for word in ['days', 'week', 'weeks', 'persistent', 'continuous']):
+            if "persistent" in found:
                 return RiskLevel.URGENT
             return RiskLevel.MONITOR
         
-        # Check for monitor keywords
-        if any(keyword in symptoms_lower for keyword in monitor_keywords):
+        if "monitor" in found:
             return RiskLevel.LOW_RISK
         
         # Default to monitor
@@ -625,6 +1265,11 @@ Remember:
         """
         Use Gemini AI to recommend veterinary clinics based on Indian pin code
         
+        Results are served from the persistent vet directory cache when
+        available. Concurrent misses for the same pin code and limit share one
+        Gemini call. A static fallback list is returned (and not cached) if
+        Gemini fails.
+        
         Args:
             pincode: Indian postal code (6 digits)
             limit: Number of clinics to return (default: 10)
@@ -632,6 +1277,156 @@ Remember:
         Returns:
             List of veterinary clinic recommendations with details
         """
+        pincode = pincode.strip()
+        try:
+            return await self.vet_directory_cache.get_or_fetch(
+                "pincode", pincode, limit,
+                lambda: self.single_flight.do(
+                    ("vets_by_pincode", pincode, limit),
+                    lambda: self._fetch_vet_recommendations_by_pincode(pincode, limit)
+                )
+            )
+        except Exception as e:
+            print(f"Error getting vet recommendations from Gemini: {e}")
+            # Return fallback clinics
+            return self._get_fallback_clinics(pincode, limit)
+    
+    async def get_climate_context(
+        self,
+        city: Optional[str],
+        state: Optional[str],
+        pincode: Optional[str],
+        season: str,
+        now: datetime
+    ) -> str:
+        """
+        Describe the local climate for a location in the current season
+        
+        Descriptions are shared by every user in the same city (or pin code
+        when no city is known) and regenerated once per month. Concurrent
+        misses for the same key share one Gemini call.
+        
+        Args:
+            city: Owner's city (optional)
+            state: Owner's state (optional)
+            pincode: Owner's pin code, used when city is missing (optional)
+            season: Current Indian season
+            now: Current date, used for the month in the prompt and key
+        
+        Returns:
+            Short climate description
+        
+        Raises:
+            Exception: If Gemini fails on a miss
+        """
+        key = build_climate_key(city, state, pincode, season, now)
+        climate = await self.climate_contexts.get(key)
+        if climate is not None:
+            return climate
+        
+        location_str = f"{city}, {state}" if city else f"PIN code {pincode}"
+        
+        async def _generate() -> str:
+            climate_prompt = f"""Provide a brief climate analysis for {location_str}, India during {season} season ({now.strftime('%B %Y')}). Include:
+1. Typical weather conditions for this season in this location
+2. Temperature range (in Celsius)
+3. Humidity levels
+4. Specific weather-related pet health concerns for this location and season
+
+Keep the response concise (3-4 sentences maximum). Focus on information relevant to pet health."""
+
+            text = (await self.generate_text(climate_prompt, priority=BACKGROUND, endpoint="climate_context")).strip()
+            await self.climate_contexts.set(key, text, location_str, season)
+            return text
+        
+        return await self.single_flight.do(("climate_context", key), _generate)
+    
+    async def get_vet_recommendations_by_city(self, city: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Use Gemini AI to recommend veterinary clinics in an Indian city
+        
+        Results are served from the persistent vet directory cache when
+        available. Concurrent misses for the same city (case-insensitive) and
+        limit share one Gemini call. Unlike the pin code lookup there is no
+        fallback list.
+        
+        Args:
+            city: City name in India
+            limit: Number of clinics to return (default: 10)
+        
+        Returns:
+            List of veterinary clinic recommendations with details
+        
+        Raises:
+            json.JSONDecodeError: If Gemini's response is not valid JSON
+        """
+        return await self.vet_directory_cache.get_or_fetch(
+            "city", city, limit,
+            lambda: self.single_flight.do(
+                ("vets_by_city", normalize_location_key(city), limit),
+                lambda: self._fetch_vet_recommendations_by_city(city, limit)
+            )
+        )
+    
+    async def _fetch_vet_recommendations_by_city(self, city: str, limit: int) -> List[Dict[str, Any]]:
+        """Call Gemini for a city clinic list and parse the JSON response"""
+        # Create a prompt for Gemini AI to get vet recommendations by city
+        prompt = f"""You are a veterinary clinic directory assistant for India. Provide a list of {limit} reputable veterinary clinics and animal hospitals in {city}, India.
+
+For each clinic, provide the following information in JSON format:
+- name: Full clinic name
+- address: Complete street address
+- phone: Contact phone number (with +91 country code)
+- services: Array of services offered (e.g., ["General Checkup", "Vaccination", "Surgery", "Emergency Care"])
+- specialties: Array of specialties (e.g., ["Small Animal Medicine", "Surgery", "Dental Care"])
+- hours: Operating hours (e.g., "Mon-Sat: 9:00 AM - 8:00 PM, Sun: Closed")
+- emergency: Boolean indicating if 24/7 emergency services available
+- rating: Rating out of 5.0 (realistic ratings between 3.8-4.9)
+- notes: Brief note about the clinic (1-2 sentences)
+- distance: Approximate distance from city center (e.g., "2.5 km from center")
+
+Return ONLY a valid JSON array of clinic objects, nothing else. No markdown, no explanations, just the JSON array.
+
+Example format:
+```json
+[
+  {{
+    "name": "Example Vet Clinic",
+    "address": "123 Main Street, {city}, State, PIN",
+    "phone": "+91-XXXXXXXXXX",
+    "services": ["General Checkup", "Vaccination"],
+    "specialties": ["Small Animal Medicine"],
+    "hours": "Mon-Sat: 9:00 AM - 7:00 PM",
+    "emergency": false,
+    "rating": 4.5,
+    "notes": "Well-established clinic with experienced vets.",
+    "distance": "1.5 km from center"
+  }}
+]
+```
+
+Provide {limit} clinics for {city}, India."""
+
+        # Call Gemini AI
+        response_text = (await self.generate_text(prompt, priority=BACKGROUND, endpoint="vet_directory")).strip()
+        
+        # Remove markdown code blocks if present
+        if response_text.startswith("```json"):
+            response_text = response_text[7:]  # Remove ```json
+        if response_text.startswith("```"):
+            response_text = response_text[3:]  # Remove ```
+        if response_text.endswith("```"):
+            response_text = response_text[:-3]  # Remove trailing ```
+        response_text = response_text.strip()
+        
+        try:
+            return json.loads(response_text)
+        except json.JSONDecodeError:
+            print(f"Response text: {response_text}")
+            raise
+    
+    async def _fetch_vet_recommendations_by_pincode(self, pincode: str, limit: int) -> List[Dict[str, Any]]:
+        """Call Gemini for a pin code clinic list and parse the JSON response"""
         print("\n" + "="*80)
         print("GEMINI VET RECOMMENDATIONS BY PINCODE - STARTING")
         print("="*80)
@@ -680,8 +1475,7 @@ IMPORTANT:
 
         try:
             print("Calling Gemini API for vet recommendations...")
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
+            response_text = (await self.generate_text(prompt, priority=BACKGROUND, endpoint="vet_directory")).strip()
             
             print("\n" + "="*80)
             print("GEMINI RESPONSE RECEIVED")
@@ -714,14 +1508,11 @@ IMPORTANT:
         except json.JSONDecodeError as e:
             print(f"Failed to parse JSON from Gemini response: {e}")
             print(f"Response text: {response_text}")
-            # Return fallback clinics
-            return self._get_fallback_clinics(pincode, limit)
-        except Exception as e:
-            print(f"Error getting vet recommendations from Gemini: {e}")
+            raise
+        except Exception:
             import traceback
             print(f"Traceback: {traceback.format_exc()}")
-            # Return fallback clinics
-            return self._get_fallback_clinics(pincode, limit)
+            raise
     
     def _get_fallback_clinics(self, pincode: str, limit: int) -> List[Dict[str, Any]]:
         """Fallback list of veterinary clinics"""
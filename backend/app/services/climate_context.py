@@ -0,0 +1,144 @@
+"""
+Shared store of AI-generated climate context by location, season and month
+"""
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import logging
+
+from app.database import get_database
+from app.services.index_registry import index_registry
+from app.services.vet_directory_cache import normalize_location_key
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_climate_key(
+    city: Optional[str],
+    state: Optional[str],
+    pincode: Optional[str],
+    season: str,
+    now: datetime
+) -> str:
+    """
+    Build the store key for a location/season/month
+    
+    City and state take precedence over the pin code, matching how the
+    climate prompt describes the location.
+    
+    Returns:
+        str: Key such as 'city:pune,maharashtra|Monsoon|2025-08'
+    """
+    if city:
+        location = f"city:{normalize_location_key(city)},{normalize_location_key(state or '')}"
+    else:
+        location = f"pincode:{normalize_location_key(pincode or '')}"
+    return f"{location}|{season}|{now.strftime('%Y-%m')}"
+
+
+class ClimateContextStore:
+    """
+    Climate descriptions computed once per location, season and month
+
+    A small in-process map sits in front of a MongoDB collection so every
+    worker and every user in the same place shares one generated description.
+    Documents carry an expiry so old months are cleaned up by a TTL index.
+    """
+
+    def __init__(
+        self,
+        max_memory_entries: int = 256,
+        retention_days: int = 62,
+        collection_name: str = "climate_contexts"
+    ):
+        """
+        Args:
+            max_memory_entries: Size of the in-process tier
+            retention_days: How long stored descriptions are kept
+            collection_name: Collection holding the descriptions
+        """
+        self.max_memory_entries = max_memory_entries
+        self.retention_days = retention_days
+        self.collection_name = collection_name
+        # TTL index that removes descriptions for past months
+        index_registry.declare(collection_name, "expiresAt", expireAfterSeconds=0)
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._counters = {
+            "memoryHits": 0,
+            "mongoHits": 0,
+            "misses": 0,
+            "stores": 0
+        }
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Look up a stored climate description
+        
+        Args:
+            key: Key from build_climate_key
+        
+        Returns:
+            The climate text, or None if it has not been generated yet
+        """
+        text = self._entries.get(key)
+        if text is not None:
+            self._entries.move_to_end(key)
+            self._counters["memoryHits"] += 1
+            return text
+        
+        try:
+            doc = await get_database()[self.collection_name].find_one({"_id": key})
+        except Exception as e:
+            logger.warning(f"Climate context lookup failed: {e}")
+            doc = None
+        
+        if doc:
+            self._counters["mongoHits"] += 1
+            self._remember(key, doc["climate"])
+            return doc["climate"]
+        
+        self._counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, climate: str, location_label: str, season: str) -> None:
+        """
+        Store a generated climate description
+        
+        Args:
+            key: Key from build_climate_key
+            climate: Generated climate text
+            location_label: Human-readable location the text describes
+            season: Season the text describes
+        """
+        self._remember(key, climate)
+        self._counters["stores"] += 1
+        now = datetime.utcnow()
+        try:
+            await get_database()[self.collection_name].update_one(
+                {"_id": key},
+                {"$set": {
+                    "climate": climate,
+                    "location": location_label,
+                    "season": season,
+                    "generatedAt": now,
+                    "expiresAt": now + timedelta(days=self.retention_days)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Climate context write failed: {e}")
+
+    def _remember(self, key: str, climate: str) -> None:
+        """Insert into the in-process tier, evicting the least recently used entry"""
+        self._entries[key] = climate
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_memory_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of store counters"""
+        return {
+            "entries": len(self._entries),
+            **self._counters
+        }
@@ -0,0 +1,273 @@
+"""
+Server-held follow-up chat sessions for symptom checks
+
+Each follow-up turn is appended to its symptom check with $push, so a
+question costs the same to send however long the chat has grown. Prompts
+are built from the check's assessment, a rolling summary of older turns and
+the most recent turns verbatim; once more than ``settings.followup_window_turns``
+turns are unsummarized, a background job folds the oldest into the summary.
+"""
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from bson import ObjectId
+from fastapi import HTTPException, status
+import logging
+
+from app.config import settings
+from app.database import get_database
+from app.models.user import UserInDB
+from app.services.ai_service import ai_service
+from app.services.job_queue import job_queue
+from app.services.health_stats import health_stats
+from app.services.prompts import FOLLOWUP_SUMMARY_INSTRUCTION
+from app.utils.priority_scheduler import BACKGROUND
+
+
+logger = logging.getLogger(__name__)
+
+# Job type for folding older follow-up turns into the rolling summary
+FOLLOWUP_SUMMARY_JOB = "followup_summary"
+
+# Large fields a follow-up prompt never needs
+_SESSION_PROJECTION_EXCLUDES = {"images": 0, "video": 0, "messages": 0}
+
+
+def followup_summary_job_key(check_id: str) -> str:
+    """Dedupe key for a symptom check's summary folding job"""
+    return f"{FOLLOWUP_SUMMARY_JOB}:{check_id}"
+
+
+def _turns_kept_verbatim() -> int:
+    """Recent turns left out of the rolling summary when it is folded"""
+    return max(settings.followup_window_turns // 2, 1)
+
+
+async def load_followup_session(
+    db,
+    check_id: str,
+    current_user: Optional[UserInDB]
+) -> Dict[str, Any]:
+    """
+    Load a symptom check's follow-up session
+
+    Only the unsummarized tail of the turns is fetched, and never the
+    check's images, video or chat transcript.
+
+    Args:
+        db: Database handle
+        check_id: Symptom check ID
+        current_user: Current user (anonymous checks can be continued without one)
+
+    Returns:
+        The symptom check document
+
+    Raises:
+        HTTPException: If the ID is invalid, the check doesn't exist or belongs to another user
+    """
+    if not ObjectId.is_valid(check_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid symptom check ID"
+        )
+
+    # Unsummarized turns stay near the window while folding keeps up; the margin covers a lagging job
+    projection = {
+        **_SESSION_PROJECTION_EXCLUDES,
+        "followupTurns": {"$slice": -3 * settings.followup_window_turns}
+    }
+    check = await db.symptom_checks.find_one({"_id": ObjectId(check_id)}, projection)
+    if not check:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Symptom check not found"
+        )
+
+    if check.get("userId") and (not current_user or check["userId"] != str(current_user.id)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this symptom check"
+        )
+
+    return check
+
+
+def build_followup_prompt(check: Dict[str, Any], question: str) -> str:
+    """
+    Build the dynamic part of a follow-up prompt from a session
+
+    Args:
+        check: Symptom check from load_followup_session
+        question: The owner's new question
+
+    Returns:
+        Prompt with the case, the rolling summary, recent turns and the question
+    """
+    turns = check.get("followupTurns", [])
+    turn_count = check.get("followupTurnCount", len(turns))
+    summarized = check.get("followupSummarizedTurns", 0)
+    # The loaded turns are the tail of the session; skip the ones the summary already covers
+    recent = turns[max(summarized - (turn_count - len(turns)), 0):]
+    summary = check.get("followupSummary")
+    case = _format_case(check)
+    question_text = f"Pet Owner's Follow-up Question: \"{question}\""
+
+    def render(kept: int) -> str:
+        shown = recent[len(recent) - kept:]
+        parts = [case]
+        if summary:
+            parts.append(f"Summary of the Earlier Conversation:\n{summary}")
+        if kept < len(recent):
+            parts.append(f"({len(recent) - kept} earlier exchange(s) omitted for length)")
+        if shown:
+            parts.append(f"Recent Conversation:\n{_format_turns(shown)}")
+        parts.append(question_text)
+        return "\n\n".join(parts)
+
+    # Render keeps the newest turns, so the oldest are dropped first
+    return ai_service.prompt_accountant.fit("symptom_followup", render, len(recent))
+
+
+async def append_followup_turn(
+    db,
+    check: Dict[str, Any],
+    question: str,
+    answer: str,
+    displayed_answer: str
+) -> int:
+    """
+    Append a question and answer to a session and schedule folding if it is due
+
+    The turn is also added to the check's chat transcript so the follow-up
+    appears in its history even if the client never saves the chat.
+
+    Args:
+        db: Database handle
+        check: Symptom check from load_followup_session
+        question: The owner's question
+        answer: Model answer, as used in later prompts
+        displayed_answer: Answer as shown to the owner (with disclaimer)
+
+    Returns:
+        Number of turns in the session
+    """
+    now = datetime.utcnow()
+    updated = await db.symptom_checks.find_one_and_update(
+        {"_id": check["_id"]},
+        {
+            "$push": {
+                "followupTurns": {"question": question, "answer": answer, "timestamp": now},
+                "messages": {"$each": [
+                    {"id": str(ObjectId()), "type": "user", "content": question, "timestamp": now},
+                    {"id": str(ObjectId()), "type": "bot", "content": displayed_answer, "timestamp": now}
+                ]}
+            },
+            "$inc": {"followupTurnCount": 1},
+            # updatedAt lets pet summaries pick up the follow-up incrementally
+            "$set": {"updatedAt": now}
+        },
+        projection={"followupTurnCount": 1, "followupSummarizedTurns": 1}
+    )
+    await health_stats.check_updated(db, check.get("petId"), now)
+    # find_one_and_update returns the document before the update
+    turn_count = (updated or {}).get("followupTurnCount", len(check.get("followupTurns", []))) + 1
+    summarized = (updated or {}).get("followupSummarizedTurns", 0)
+
+    if turn_count - summarized > settings.followup_window_turns:
+        check_id = str(check["_id"])
+        try:
+            await job_queue.enqueue(
+                FOLLOWUP_SUMMARY_JOB,
+                {"checkId": check_id},
+                dedupe_key=followup_summary_job_key(check_id)
+            )
+        except Exception as e:
+            # The next turn schedules it again
+            logger.warning(f"Failed to schedule follow-up summary for check {check_id}: {e}")
+
+    return turn_count
+
+
+async def run_followup_summary_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Job handler folding a session's older turns into its rolling summary
+
+    Args:
+        payload: {"checkId"}
+
+    Returns:
+        Dict with the check ID and how many turns the summary now covers
+
+    Raises:
+        ValueError: If the symptom check no longer exists
+    """
+    db = get_database()
+    check_id = payload["checkId"]
+    check = await db.symptom_checks.find_one(
+        {"_id": ObjectId(check_id)},
+        {"followupTurns": 1, "followupSummary": 1, "followupSummarizedTurns": 1}
+    )
+    if not check:
+        raise ValueError("Symptom check no longer exists")
+
+    turns = check.get("followupTurns", [])
+    summarized = check.get("followupSummarizedTurns", 0)
+    fold_to = len(turns) - _turns_kept_verbatim()
+    if fold_to <= summarized:
+        return {"checkId": check_id, "summarizedTurns": summarized, "folded": 0}
+
+    prompt = f"""Summary So Far:
+{check.get('followupSummary') or 'None yet - this is the start of the conversation.'}
+
+Conversation to Add:
+{_format_turns(turns[summarized:fold_to])}"""
+    summary = (await ai_service.generate_text(
+        prompt,
+        priority=BACKGROUND,
+        system_instruction=FOLLOWUP_SUMMARY_INSTRUCTION,
+        endpoint="followup_summary"
+    )).strip()
+
+    # Only apply the summary if no other run has moved the session on meanwhile
+    result = await db.symptom_checks.update_one(
+        {
+            "_id": ObjectId(check_id),
+            "followupSummarizedTurns": summarized if summarized else {"$in": [0, None]}
+        },
+        {"$set": {
+            "followupSummary": summary,
+            "followupSummarizedTurns": fold_to,
+            "followupSummarizedAt": datetime.utcnow()
+        }}
+    )
+    if not result.modified_count:
+        return {"checkId": check_id, "summarizedTurns": summarized, "folded": 0}
+
+    logger.info(f"Folded follow-up turns {summarized + 1}-{fold_to} of check {check_id} into its summary")
+    return {"checkId": check_id, "summarizedTurns": fold_to, "folded": fold_to - summarized}
+
+
+def _format_case(check: Dict[str, Any]) -> str:
+    """The symptom check the session continues"""
+    category = check.get("category", "Health")
+    if check.get("healthSubcategory"):
+        category += f" - {check['healthSubcategory']}"
+    timestamp = check.get("timestamp")
+    date_text = f", {timestamp.strftime('%B %d, %Y')}" if isinstance(timestamp, datetime) else ""
+
+    text = f"Symptom Check ({category}{date_text}):"
+    text += f"\n- Symptoms Described: {(check.get('symptoms') or 'Photos/video only')[:1000]}"
+    text += f"\n- Initial Assessment: {check.get('riskLevel', 'Unknown')} - {check.get('summary', '')}"
+    actions = check.get("immediateActions") or []
+    if actions:
+        text += "\n- Immediate Actions Given:"
+        for action in actions[:3]:
+            text += f"\n  • {action}"
+    return text
+
+
+def _format_turns(turns: List[Dict[str, Any]]) -> str:
+    """Follow-up turns as a transcript"""
+    return "\n\n".join(
+        f"Pet Owner: {turn['question']}\n\nVeterinarian: {turn['answer']}"
+        for turn in turns
+    )
@@ -0,0 +1,197 @@
+"""
+Incrementally maintained per-pet and per-user statistics
+
+``pet_stats`` and ``user_stats`` hold one document per pet / user (keyed
+by its ID) with check counts and timestamps, so summary cache validation
+and the pet limit are a point read instead of counting queries.
+"""
+from typing import Any, Dict, Optional
+from datetime import datetime
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HealthStats:
+    """
+    Counters kept up to date with $inc/$max on every write they depend on
+
+    pet_stats: totalChecks, activeChecks, lastCheckAt, lastResolvedAt and
+    lastChangeAt (any check added, updated, resolved or deleted).
+    user_stats: pets, totalChecks, activeChecks, lastCheckAt, lastResolvedAt.
+
+    Updates never create documents: a missing document means "not counted
+    yet" and is rebuilt from the source collections on its first read, so
+    data written before these collections existed is picked up without a
+    migration. Writes landing between a rebuild's counts and its insert can
+    be missed; a later rebuild (delete the document) corrects them.
+    """
+
+    def __init__(self, pet_collection: str = "pet_stats", user_collection: str = "user_stats"):
+        """
+        Args:
+            pet_collection: Collection holding per-pet statistics
+            user_collection: Collection holding per-user statistics
+        """
+        self.pet_collection = pet_collection
+        self.user_collection = user_collection
+        self._counters = {
+            "petReads": 0,
+            "userReads": 0,
+            "rebuilds": 0,
+            "updateFailures": 0
+        }
+
+    async def _update(self, db, collection: str, doc_id: Optional[str], update: Dict[str, Any]) -> None:
+        """Apply an update to an existing statistics document; failures are logged, not raised"""
+        if not doc_id:
+            return
+        try:
+            await db[collection].update_one({"_id": doc_id}, update)
+        except Exception as e:
+            self._counters["updateFailures"] += 1
+            logger.warning(f"Failed to update {collection} for {doc_id}: {e}")
+
+    async def _check_update(self, db, check: Dict[str, Any], pet_update: Dict[str, Any], user_update: Dict[str, Any]) -> None:
+        await asyncio.gather(
+            self._update(db, self.pet_collection, check.get("petId"), pet_update),
+            self._update(db, self.user_collection, check.get("userId"), user_update)
+        )
+
+    async def check_created(self, db, check: Dict[str, Any]) -> None:
+        """Count a newly inserted symptom check"""
+        counts = {"totalChecks": 1, "activeChecks": 0 if check.get("resolved") else 1}
+        timestamp = check["timestamp"]
+        await self._check_update(
+            db,
+            check,
+            {"$inc": counts, "$max": {"lastCheckAt": timestamp, "lastChangeAt": timestamp}},
+            {"$inc": counts, "$max": {"lastCheckAt": timestamp}}
+        )
+
+    async def check_deleted(self, db, check: Dict[str, Any]) -> None:
+        """Uncount a deleted symptom check"""
+        update = {"$inc": {"totalChecks": -1, "activeChecks": 0 if check.get("resolved") else -1}}
+        pet_update = {**update, "$max": {"lastChangeAt": datetime.utcnow()}}
+        await self._check_update(db, check, pet_update, update)
+
+    async def check_resolved(self, db, check: Dict[str, Any], resolved: bool, at: datetime) -> None:
+        """
+        Record a check moving between active and resolved
+
+        Only call this when the stored state actually changed.
+        """
+        update: Dict[str, Any] = {"$inc": {"activeChecks": -1 if resolved else 1}}
+        if resolved:
+            update["$max"] = {"lastResolvedAt": at}
+        pet_update = {**update, "$max": {**update.get("$max", {}), "lastChangeAt": at}}
+        await self._check_update(db, check, pet_update, update)
+
+    async def check_updated(self, db, pet_id: Optional[str], at: datetime) -> None:
+        """Record other changes a pet summary covers (chat messages, follow-ups)"""
+        await self._update(db, self.pet_collection, pet_id, {"$max": {"lastChangeAt": at}})
+
+    async def pet(self, db, pet_id: str) -> Dict[str, Any]:
+        """
+        Statistics for a pet, rebuilt from symptom_checks if not counted yet
+
+        Returns:
+            Dict with totalChecks, activeChecks and the last check, resolve and change times
+        """
+        self._counters["petReads"] += 1
+        stats = await db[self.pet_collection].find_one({"_id": pet_id})
+        if stats:
+            return stats
+
+        self._counters["rebuilds"] += 1
+        total, active, last_check, last_resolved, last_updated = await asyncio.gather(
+            db.symptom_checks.count_documents({"petId": pet_id}),
+            db.symptom_checks.count_documents({"petId": pet_id, "resolved": {"$ne": True}}),
+            self._latest(db, {"petId": pet_id}, "timestamp"),
+            self._latest(db, {"petId": pet_id, "resolved": True}, "resolvedAt"),
+            self._latest(db, {"petId": pet_id, "updatedAt": {"$exists": True}}, "updatedAt")
+        )
+        stats = {
+            "_id": pet_id,
+            "totalChecks": total,
+            "activeChecks": active,
+            "lastCheckAt": last_check,
+            "lastResolvedAt": last_resolved,
+            # Deletions before the rebuild are unknown; the check count catches those
+            "lastChangeAt": max((t for t in (last_check, last_updated) if t), default=None)
+        }
+        return await self._insert(db, self.pet_collection, stats)
+
+    async def user(self, db, user_id: str) -> Dict[str, Any]:
+        """
+        Statistics for a user, rebuilt from pets and symptom_checks if not counted yet
+
+        Returns:
+            Dict with pets, totalChecks, activeChecks and the last check and resolve times
+        """
+        self._counters["userReads"] += 1
+        stats = await db[self.user_collection].find_one({"_id": user_id})
+        if stats:
+            return stats
+
+        self._counters["rebuilds"] += 1
+        pets, total, active, last_check, last_resolved = await asyncio.gather(
+            db.pets.count_documents({"userId": user_id}),
+            db.symptom_checks.count_documents({"userId": user_id}),
+            db.symptom_checks.count_documents({"userId": user_id, "resolved": {"$ne": True}}),
+            self._latest(db, {"userId": user_id}, "timestamp"),
+            self._latest(db, {"userId": user_id, "resolved": True}, "resolvedAt")
+        )
+        stats = {
+            "_id": user_id,
+            "pets": pets,
+            "totalChecks": total,
+            "activeChecks": active,
+            "lastCheckAt": last_check,
+            "lastResolvedAt": last_resolved
+        }
+        return await self._insert(db, self.user_collection, stats)
+
+    async def reserve_pet(self, db, user_id: str, limit: int) -> bool:
+        """
+        Count a pet about to be created, unless the user already has ``limit``
+
+        The check and increment are one atomic update, so concurrent
+        creates cannot exceed the limit. Call release_pet if the pet is
+        not created after all.
+
+        Returns:
+            True if the pet was counted
+        """
+        await self.user(db, user_id)
+        reserved = await db[self.user_collection].find_one_and_update(
+            {"_id": user_id, "pets": {"$lt": limit}},
+            {"$inc": {"pets": 1}},
+            projection={"_id": 1}
+        )
+        return reserved is not None
+
+    async def release_pet(self, db, user_id: str) -> None:
+        """Uncount a deleted pet (or a reservation that was not used)"""
+        await self._update(db, self.user_collection, user_id, {"$inc": {"pets": -1}})
+
+    @staticmethod
+    async def _latest(db, query: Dict[str, Any], field: str) -> Optional[datetime]:
+        docs = await db.symptom_checks.find(query, {field: 1}).sort(field, -1).limit(1).to_list(length=1)
+        return docs[0].get(field) if docs else None
+
+    @staticmethod
+    async def _insert(db, collection: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a rebuilt document; if another request stored one first, use that"""
+        fields = {key: value for key, value in stats.items() if key != "_id"}
+        await db[collection].update_one({"_id": stats["_id"]}, {"$setOnInsert": fields}, upsert=True)
+        return await db[collection].find_one({"_id": stats["_id"]}) or stats
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of read and rebuild counters"""
+        return dict(self._counters)
+
+
+# Global statistics instance
+health_stats = HealthStats()
@@ -0,0 +1,246 @@
+"""
+Image preprocessing for uploads sent to Gemini, run in a worker process pool
+"""
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import io
+import multiprocessing
+import time
+
+from PIL import Image, ImageOps
+
+
+def preprocess_image(data: bytes, max_edge: int, quality: int) -> Dict[str, Any]:
+    """
+    Downscale, re-encode and strip metadata from one uploaded image
+
+    Runs inside a worker process, so it only depends on Pillow. JPEG input is
+    decoded in draft mode, letting libjpeg skip most of the work for large
+    phone photos. EXIF orientation is applied to the pixels before the
+    metadata is dropped so the image stays upright.
+
+    Args:
+        data: Raw image bytes as uploaded
+        max_edge: Maximum width/height in pixels of the output
+        quality: JPEG quality of the output (1-95)
+
+    Returns:
+        Dict with the JPEG ``data`` and ``mimeType``, original and output
+        ``size``/``bytes`` and the processing time in ``ms``
+    """
+    started = time.perf_counter()
+
+    img = Image.open(io.BytesIO(data))
+    original_size = img.size
+    original_format = img.format
+    if img.format == "JPEG":
+        img.draft("RGB", (max_edge, max_edge))
+
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    # Saving without exif/icc arguments drops the source metadata
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=quality, optimize=True)
+
+    return {
+        "data": output.getvalue(),
+        "mimeType": "image/jpeg",
+        "format": original_format,
+        "originalSize": original_size,
+        "size": img.size,
+        "originalBytes": len(data),
+        "bytes": output.tell(),
+        "ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def make_thumbnail(data: bytes, max_edge: int, quality: int) -> bytes:
+    """
+    Small upright JPEG preview of an image, for listing it without the original
+
+    Args:
+        data: Raw image bytes
+        max_edge: Maximum width/height in pixels
+        quality: JPEG quality (1-95)
+
+    Returns:
+        JPEG bytes
+    """
+    img = Image.open(io.BytesIO(data))
+    if img.format == "JPEG":
+        img.draft("RGB", (max_edge, max_edge))
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue()
+
+
+class ImagePipeline:
+    """
+    Process pool that prepares uploaded images for Gemini
+
+    Decoding and resizing happen in separate processes so a request with
+    several full-resolution photos never holds the event loop or the GIL.
+    The pool is created on first use with the ``spawn`` start method, which
+    is safe alongside the threads the server already runs. If a worker
+    process dies (e.g. out of memory on a huge image) the pool is replaced
+    and the affected calls are retried once.
+    """
+
+    def __init__(self, max_workers: int, max_edge: int, quality: int, enabled: bool = True):
+        """
+        Args:
+            max_workers: Number of worker processes
+            max_edge: Maximum width/height in pixels sent to Gemini
+            quality: JPEG quality used when re-encoding
+            enabled: When False images are decoded in a thread and sent unchanged
+        """
+        self.max_workers = max_workers
+        self.max_edge = max_edge
+        self.quality = quality
+        self.enabled = enabled
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._counters = {
+            "images": 0,
+            "failures": 0,
+            "originalBytes": 0,
+            "bytes": 0,
+            "totalMs": 0.0,
+            "poolRestarts": 0
+        }
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Drop a pool whose worker died; the next call creates a new one"""
+        if self._pool is broken:
+            self._pool = None
+            self._counters["poolRestarts"] += 1
+            broken.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_in_pool(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a function in the worker pool, replacing the pool once if it is broken
+
+        Raises:
+            BrokenProcessPool: If the replacement pool breaks too
+            Exception: Whatever the function raised
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = self._get_pool()
+            try:
+                # Submitting to a broken pool raises here, not in the future
+                return await loop.run_in_executor(pool, func, *args)
+            except BrokenProcessPool:
+                self._replace_pool(pool)
+                if attempt:
+                    raise
+
+    async def process(self, blobs: List[bytes]) -> List[Dict[str, Any]]:
+        """
+        Preprocess a batch of images concurrently
+
+        Images that fail to decode are logged and left out, matching how
+        invalid uploads were handled before.
+
+        Args:
+            blobs: Raw image bytes in upload order
+
+        Returns:
+            Results from preprocess_image for each image that succeeded
+        """
+        if not blobs:
+            return []
+
+        if self.enabled:
+            jobs = [
+                self._run_in_pool(preprocess_image, blob, self.max_edge, self.quality)
+                for blob in blobs
+            ]
+        else:
+            jobs = [asyncio.to_thread(self._passthrough, blob) for blob in blobs]
+
+        outcomes = await asyncio.gather(*jobs, return_exceptions=True)
+
+        results = []
+        for idx, outcome in enumerate(outcomes):
+            if isinstance(outcome, BaseException):
+                self._counters["failures"] += 1
+                print(f"  - Error processing image {idx + 1}: {type(outcome).__name__}: {outcome}")
+                continue
+
+            self._counters["images"] += 1
+            self._counters["originalBytes"] += outcome["originalBytes"]
+            self._counters["bytes"] += outcome["bytes"]
+            self._counters["totalMs"] += outcome["ms"]
+            print(
+                f"  - Image {idx + 1}: {outcome['format']} {outcome['originalSize']} -> {outcome['size']}, "
+                f"{outcome['originalBytes']} -> {outcome['bytes']} bytes in {outcome['ms']} ms"
+            )
+            results.append(outcome)
+        return results
+
+    async def thumbnail(self, data: bytes, max_edge: int, quality: int) -> bytes:
+        """
+        Make a thumbnail in a worker process (or a thread when the pipeline is disabled)
+
+        Raises:
+            Exception: If the image can't be decoded
+        """
+        if self.enabled:
+            return await self._run_in_pool(make_thumbnail, data, max_edge, quality)
+        return await asyncio.to_thread(make_thumbnail, data, max_edge, quality)
+
+    @staticmethod
+    def _passthrough(data: bytes) -> Dict[str, Any]:
+        """Validate an image without re-encoding it (pipeline disabled)"""
+        img = Image.open(io.BytesIO(data))
+        return {
+            "data": data,
+            "format": img.format,
+            "mimeType": Image.MIME.get(img.format, "image/jpeg"),
+            "originalSize": img.size,
+            "size": img.size,
+            "originalBytes": len(data),
+            "bytes": len(data),
+            "ms": 0.0
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of processing counters"""
+        images = self._counters["images"]
+        original = self._counters["originalBytes"]
+        return {
+            "enabled": self.enabled,
+            "workers": self.max_workers,
+            "maxEdge": self.max_edge,
+            "quality": self.quality,
+            **self._counters,
+            "totalMs": round(self._counters["totalMs"], 1),
+            "avgMs": round(self._counters["totalMs"] / images, 1) if images else 0.0,
+            "bytesSaved": original - self._counters["bytes"],
+            "savingsRatio": round(1 - self._counters["bytes"] / original, 4) if original else 0.0
+        }
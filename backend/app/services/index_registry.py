@@ -0,0 +1,260 @@
+"""
+Declared MongoDB indexes, applied at startup and checked for drift
+
+Every index the app relies on is declared here: the indexes behind the
+route queries are declared below, and services that own a collection
+(caches, job queue) declare theirs when they are constructed.
+Startup creates what is missing; indexes on large collections are left to
+``manage_indexes.py`` so a deploy never blocks on a long build. Indexes
+that exist in MongoDB but are not declared, or whose keys or options
+differ from the declaration, are reported but never dropped automatically.
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+import logging
+
+from pymongo import IndexModel
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.database import get_database
+
+logger = logging.getLogger(__name__)
+
+IndexKeys = List[Tuple[str, int]]
+
+# Options that change what an index does; other server-reported fields (v, ns, ...) are ignored
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+class IndexSpec(NamedTuple):
+    """One declared index"""
+    collection: str
+    keys: IndexKeys
+    options: Dict[str, Any]
+
+    @property
+    def name(self) -> str:
+        """Index name: explicit, or MongoDB's default of field_direction pairs"""
+        return self.options.get("name") or "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+
+def _normalize_keys(keys: Union[str, Sequence[Tuple[str, int]]]) -> IndexKeys:
+    if isinstance(keys, str):
+        return [(keys, 1)]
+    return [(field, int(direction)) for field, direction in keys]
+
+
+def _compared_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    compared = {key: options[key] for key in COMPARED_OPTIONS if key in options}
+    # Servers report TTLs as numbers, unique only when set
+    if "expireAfterSeconds" in compared:
+        compared["expireAfterSeconds"] = int(compared["expireAfterSeconds"])
+    if not compared.get("unique"):
+        compared.pop("unique", None)
+    if not compared.get("sparse"):
+        compared.pop("sparse", None)
+    return compared
+
+
+class IndexRegistry:
+    """
+    Registry of declared indexes with idempotent apply and drift reports
+    """
+
+    def __init__(self, startup_build_max_documents: int = 100000):
+        """
+        Args:
+            startup_build_max_documents: Collections with more documents are not
+                indexed at startup; build their missing indexes with manage_indexes.py
+        """
+        self.startup_build_max_documents = startup_build_max_documents
+        self._specs: Dict[Tuple[str, str], IndexSpec] = {}
+        self._last_report: Optional[Dict[str, Any]] = None
+
+    def declare(self, collection: str, keys: Union[str, Sequence[Tuple[str, int]]], **options: Any) -> IndexSpec:
+        """
+        Declare an index
+
+        Declaring the same collection and name again replaces the earlier
+        declaration, so services may be constructed more than once.
+
+        Args:
+            collection: Collection name
+            keys: Field name, or list of (field, direction) pairs
+            **options: IndexModel options (unique, expireAfterSeconds, partialFilterExpression, name, ...)
+
+        Returns:
+            The declared index
+        """
+        spec = IndexSpec(collection, _normalize_keys(keys), options)
+        self._specs[(collection, spec.name)] = spec
+        return spec
+
+    def specs(self, collection: Optional[str] = None) -> List[IndexSpec]:
+        """Declared indexes, optionally for one collection"""
+        return [spec for spec in self._specs.values() if collection is None or spec.collection == collection]
+
+    def collections(self) -> List[str]:
+        """Collections with declared indexes, in declaration order"""
+        return list(dict.fromkeys(spec.collection for spec in self._specs.values()))
+
+    async def check(self) -> Dict[str, Any]:
+        """
+        Compare the declared indexes with those in MongoDB
+
+        Returns:
+            Dict with per-collection document estimates and lists of
+            ``missing``, ``mismatched`` and ``extra`` indexes
+        """
+        db = get_database()
+        report: Dict[str, Any] = {"collections": {}, "missing": [], "mismatched": [], "extra": []}
+
+        for collection in self.collections():
+            existing = {}
+            async for info in db[collection].list_indexes():
+                existing[info["name"]] = info
+            report["collections"][collection] = {
+                "documents": await db[collection].estimated_document_count(),
+                "indexes": len(existing)
+            }
+
+            declared = self.specs(collection)
+            for spec in declared:
+                info = existing.get(spec.name)
+                if info is None:
+                    report["missing"].append({"collection": collection, "name": spec.name, "keys": spec.keys})
+                    continue
+                actual_keys = _normalize_keys(list(info["key"].items()))
+                actual_options = _compared_options(info)
+                if actual_keys != spec.keys or actual_options != _compared_options(spec.options):
+                    report["mismatched"].append({
+                        "collection": collection,
+                        "name": spec.name,
+                        "declared": {"keys": spec.keys, **_compared_options(spec.options)},
+                        "actual": {"keys": actual_keys, **actual_options}
+                    })
+
+            declared_names = {spec.name for spec in declared}
+            for name, info in existing.items():
+                if name != "_id_" and name not in declared_names:
+                    report["extra"].append({
+                        "collection": collection,
+                        "name": name,
+                        "keys": _normalize_keys(list(info["key"].items()))
+                    })
+
+        self._last_report = report
+        return report
+
+    async def build(
+        self,
+        specs: Sequence[IndexSpec],
+        background: bool = False
+    ) -> Tuple[List[str], List[Dict[str, str]]]:
+        """
+        Create indexes one at a time
+
+        Args:
+            specs: Indexes to create
+            background: Request a background build (only honoured by MongoDB
+                before 4.2; newer servers always build without blocking the collection)
+
+        Returns:
+            (names created, failures as {"collection", "name", "error"})
+        """
+        db = get_database()
+        created: List[str] = []
+        failed: List[Dict[str, str]] = []
+        for spec in specs:
+            options = dict(spec.options, name=spec.name)
+            if background:
+                options["background"] = True
+            try:
+                await db[spec.collection].create_indexes([IndexModel(spec.keys, **options)])
+                created.append(f"{spec.collection}.{spec.name}")
+            except PyMongoError as e:
+                # e.g. a unique index over existing duplicates, or a name clash with different keys
+                failed.append({"collection": spec.collection, "name": spec.name, "error": str(e)})
+        return created, failed
+
+    async def apply(self) -> Dict[str, Any]:
+        """
+        Create missing indexes on collections small enough to index at startup
+
+        Safe to run on every start: present indexes are left alone. Drift is
+        logged as warnings.
+
+        Returns:
+            The drift report, with ``created``, ``failed`` and ``deferred`` added
+        """
+        report = await self.check()
+        missing = {(item["collection"], item["name"]) for item in report["missing"]}
+
+        to_build: List[IndexSpec] = []
+        deferred: List[str] = []
+        for spec in self._specs.values():
+            if (spec.collection, spec.name) not in missing:
+                continue
+            if report["collections"][spec.collection]["documents"] > self.startup_build_max_documents:
+                deferred.append(f"{spec.collection}.{spec.name}")
+            else:
+                to_build.append(spec)
+
+        created, failed = await self.build(to_build)
+        report.update(created=created, failed=failed, deferred=deferred)
+
+        if created:
+            logger.info(f"Created indexes: {', '.join(created)}")
+        for failure in failed:
+            logger.warning(f"Failed to create index {failure['collection']}.{failure['name']}: {failure['error']}")
+        if deferred:
+            logger.warning(
+                f"Indexes missing on large collections, run manage_indexes.py --build: {', '.join(deferred)}"
+            )
+        for item in report["mismatched"]:
+            logger.warning(f"Index {item['collection']}.{item['name']} differs from its declaration: {item['actual']}")
+        for item in report["extra"]:
+            logger.warning(f"Undeclared index {item['collection']}.{item['name']} {item['keys']}")
+
+        self._last_report = report
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        """Declared index count and the outcome of the last check"""
+        stats: Dict[str, Any] = {"declared": len(self._specs)}
+        if self._last_report is not None:
+            stats.update({
+                "missing": len(self._last_report["missing"]),
+                "mismatched": len(self._last_report["mismatched"]),
+                "extra": len(self._last_report["extra"]),
+                "deferred": len(self._last_report.get("deferred", [])),
+                "failed": len(self._last_report.get("failed", []))
+            })
+        return stats
+
+
+def _declare_app_indexes(registry: IndexRegistry) -> None:
+    """Indexes behind the route queries on the core collections"""
+    # Login and signup look users up by email
+    registry.declare("users", "email", unique=True)
+    # Pet list and pet count per user
+    registry.declare("pets", [("userId", 1), ("createdAt", -1)])
+    # Symptom check history, newest first with keyset pagination (userId / petId
+    # filters; the pet history's extra userId filter is checked on the fetched rows)
+    registry.declare("symptom_checks", [("userId", 1), ("timestamp", -1), ("_id", -1)])
+    registry.declare("symptom_checks", [("petId", 1), ("timestamp", -1), ("_id", -1)])
+    # Checks changed since a pet's summary was generated (incremental summaries)
+    registry.declare("symptom_checks", [("petId", 1), ("updatedAt", -1)])
+    registry.declare("medical_history", [("petId", 1), ("date", -1)])
+    # One current summary per pet, upserted by petId; also orders the season refresh scan
+    registry.declare("pet_health_summaries", "petId", unique=True)
+    registry.declare("pet_health_summary_history", [("petId", 1), ("generatedAt", -1)])
+    # Vet search: the case-insensitive city regex is matched against index keys
+    # instead of fetching every provider; the 24x7 filter narrows on the prefix
+    registry.declare("providers", "city")
+    registry.declare("providers", [("is24x7", 1), ("city", 1)])
+
+
+# Global index registry; services declare their own collections' indexes on construction
+index_registry = IndexRegistry(startup_build_max_documents=settings.index_startup_build_max_documents)
+_declare_app_indexes(index_registry)
@@ -0,0 +1,420 @@
+"""
+MongoDB-backed background job queue with an in-process worker pool
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import logging
+import os
+import socket
+
+from app.config import settings
+from app.database import get_database
+from app.services.index_registry import index_registry
+
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """
+    Durable queue of background jobs stored in a MongoDB collection
+
+    Workers claim jobs with a single find_one_and_update, so a job is run by
+    one worker at a time even with several app processes. A claim carries a
+    lease that the worker renews while the job runs; jobs whose lease has
+    expired (the worker crashed) are claimed again. Failed jobs are retried
+    with exponential backoff up to ``max_attempts``. While a job with a given
+    dedupe key is queued or running, enqueueing the same key returns that
+    job instead of adding another (enforced by a partial unique index on
+    ``dedupeKey``); ``rerun_with`` changes what that job does, queueing a
+    follow-up run if it has already started. Finished jobs are removed
+    after ``retention_days``.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_attempts: int = 3,
+        poll_interval_seconds: float = 2.0,
+        lease_seconds: float = 120.0,
+        retry_backoff_seconds: float = 5.0,
+        retention_days: int = 7,
+        collection_name: str = "jobs"
+    ):
+        """
+        Args:
+            workers: Worker tasks started in this process
+            max_attempts: Attempts before a job is marked failed
+            poll_interval_seconds: How often idle workers look for new jobs
+            lease_seconds: How long a claim lasts without renewal
+            retry_backoff_seconds: Delay before the first retry (doubles per attempt)
+            retention_days: How long finished jobs are kept
+            collection_name: Collection holding the jobs
+        """
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.poll_interval_seconds = poll_interval_seconds
+        self.lease_seconds = lease_seconds
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.retention_days = retention_days
+        self.collection_name = collection_name
+
+        # Claim, deduplication and TTL indexes
+        index_registry.declare(collection_name, [("status", 1), ("runAt", 1)])
+        index_registry.declare(collection_name, "dedupeKey", unique=True, partialFilterExpression={"active": True})
+        index_registry.declare(collection_name, [("dedupeKey", 1), ("createdAt", -1)])
+        index_registry.declare(collection_name, "expiresAt", expireAfterSeconds=0)
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._counters = {
+            "enqueued": 0,
+            "deduplicated": 0,
+            "claimed": 0,
+            "succeeded": 0,
+            "retried": 0,
+            "failed": 0
+        }
+
+    @property
+    def collection(self):
+        return get_database()[self.collection_name]
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        """
+        Register the coroutine that runs jobs of a type
+
+        Args:
+            job_type: Job type name
+            handler: Called with the job payload; returns the job result
+        """
+        self._handlers[job_type] = handler
+
+    def start(self) -> None:
+        """Start the worker tasks"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(f"{self._worker_prefix}:{index}"))
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Stop the workers; interrupted jobs are put back in the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        dedupe_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Add a job, or return the queued/running job with the same dedupe key
+
+        Args:
+            job_type: Registered job type
+            payload: Arguments passed to the handler
+            dedupe_key: Jobs sharing a key are not queued twice (defaults to a new ID)
+
+        Returns:
+            The job document
+        """
+        now = datetime.utcnow()
+        dedupe_key = dedupe_key or str(ObjectId())
+        job = {
+            "type": job_type,
+            "dedupeKey": dedupe_key,
+            "active": True,
+            "status": QUEUED,
+            "payload": payload,
+            "attempts": 0,
+            "maxAttempts": self.max_attempts,
+            "runAt": now,
+            "createdAt": now
+        }
+
+        try:
+            await self.collection.insert_one(job)
+        except DuplicateKeyError:
+            existing = await self.collection.find_one({"dedupeKey": dedupe_key, "active": True})
+            if existing:
+                self._counters["deduplicated"] += 1
+                return existing
+            # The other job finished in between - try once more
+            job.pop("_id", None)
+            await self.collection.insert_one(job)
+
+        self._counters["enqueued"] += 1
+        if self._wakeup:
+            self._wakeup.set()
+        return job
+
+    async def rerun_with(self, job: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Make sure a deduplicated job runs with a different payload
+
+        A job that is still queued has its payload replaced. A running job
+        is left alone and records the payload as ``rerunPayload``; when it
+        finishes, a follow-up job with the same type and dedupe key is queued
+        with that payload and linked from ``rerunJobId`` (``wait`` follows
+        the link). If the job has finished in the meantime, a new job is
+        enqueued.
+
+        Args:
+            job: Job document returned by enqueue
+            payload: Payload the job should run with
+
+        Returns:
+            The updated job document (or the newly enqueued one)
+        """
+        for query, update in (
+            ({"_id": job["_id"], "status": QUEUED}, {"$set": {"payload": payload}}),
+            ({"_id": job["_id"], "status": RUNNING, "active": True}, {"$set": {"rerunPayload": payload}})
+        ):
+            updated = await self.collection.find_one_and_update(
+                query, update, return_document=ReturnDocument.AFTER
+            )
+            if updated:
+                return updated
+        return await self.enqueue(job["type"], payload, dedupe_key=job["dedupeKey"])
+
+    async def get(self, job_id: Any) -> Optional[Dict[str, Any]]:
+        """Fetch a job by ID"""
+        return await self.collection.find_one({"_id": ObjectId(job_id)})
+
+    async def latest(self, dedupe_key: str) -> Optional[Dict[str, Any]]:
+        """Fetch the most recently created job with a dedupe key"""
+        jobs = await self.collection.find(
+            {"dedupeKey": dedupe_key}
+        ).sort("createdAt", -1).limit(1).to_list(length=1)
+        return jobs[0] if jobs else None
+
+    async def wait(self, job_id: Any, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait for a job to finish
+
+        Jobs run by this process wake the waiter immediately; jobs run
+        elsewhere are noticed on the next poll. A job that was given a
+        follow-up run (see ``rerun_with``) is finished once the follow-up is.
+
+        Args:
+            job_id: Job ID
+            timeout: Maximum seconds to wait
+
+        Returns:
+            The job document (check its status - it may still be queued or running)
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            key = str(job_id)
+            finished = self._finished.setdefault(key, asyncio.Event())
+            try:
+                job = await self.get(job_id)
+                if job and job.get("rerunJobId"):
+                    job_id = job["rerunJobId"]
+                    continue
+                # A finished job with a rerunPayload but no rerunJobId is still queueing its follow-up
+                if not job or (job["status"] in (SUCCEEDED, FAILED) and not job.get("rerunPayload")):
+                    return job
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    return job
+                try:
+                    await asyncio.wait_for(finished.wait(), min(remaining, self.poll_interval_seconds))
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                self._finished.pop(key, None)
+
+    async def _worker(self, worker_id: str) -> None:
+        """Claim and run jobs until cancelled"""
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self._claim(worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job claim failed: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(job, worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # e.g. MongoDB failing while the outcome is recorded; the lease expires and the job is claimed again
+                logger.exception(f"Job {job['_id']} ({job['type']}) could not be run or recorded")
+
+    async def _claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest runnable job (or one whose lease expired)"""
+        if not self._handlers:
+            return None
+        now = datetime.utcnow()
+        job = await self.collection.find_one_and_update(
+            {
+                "type": {"$in": list(self._handlers)},
+                "$or": [
+                    {"status": QUEUED, "runAt": {"$lte": now}},
+                    {"status": RUNNING, "leaseExpiresAt": {"$lte": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "workerId": worker_id,
+                    "startedAt": now,
+                    "leaseExpiresAt": now + timedelta(seconds=self.lease_seconds)
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("runAt", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            self._counters["claimed"] += 1
+        return job
+
+    async def _run(self, job: Dict[str, Any], worker_id: str) -> None:
+        """Run a claimed job and record the outcome"""
+        owned = {"_id": job["_id"], "workerId": worker_id, "status": RUNNING}
+
+        if job["attempts"] > job.get("maxAttempts", self.max_attempts):
+            # Claimed again after its worker died on the last attempt
+            await self._finish(job, owned, FAILED, {"lastError": "Worker lost during final attempt"})
+            return
+
+        heartbeat = asyncio.create_task(self._renew_lease(owned))
+        try:
+            result = await self._handlers[job["type"]](job["payload"])
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back without using up an attempt
+            await asyncio.shield(self.collection.update_one(
+                owned,
+                {"$set": {"status": QUEUED, "runAt": datetime.utcnow()}, "$inc": {"attempts": -1}}
+            ))
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.warning(f"Job {job['_id']} ({job['type']}) attempt {job['attempts']} failed: {error}")
+            if job["attempts"] < job.get("maxAttempts", self.max_attempts):
+                self._counters["retried"] += 1
+                delay = self.retry_backoff_seconds * 2 ** (job["attempts"] - 1)
+                await self.collection.update_one(owned, {"$set": {
+                    "status": QUEUED,
+                    "runAt": datetime.utcnow() + timedelta(seconds=delay),
+                    "lastError": error
+                }})
+            else:
+                await self._finish(job, owned, FAILED, {"lastError": error})
+            return
+        finally:
+            heartbeat.cancel()
+
+        await self._finish(job, owned, SUCCEEDED, {"result": result})
+
+    async def _finish(self, job: Dict[str, Any], owned: Dict[str, Any], state: str, fields: Dict[str, Any]) -> None:
+        """Mark a job finished, release its dedupe key and queue a requested follow-up run"""
+        now = datetime.utcnow()
+        finished_job = await self.collection.find_one_and_update(owned, {
+            "$set": {
+                "status": state,
+                "finishedAt": now,
+                "expiresAt": now + timedelta(days=self.retention_days),
+                **fields
+            },
+            "$unset": {"active": "", "leaseExpiresAt": ""}
+        }, projection={"rerunPayload": 1})
+        self._counters["succeeded" if state == SUCCEEDED else "failed"] += 1
+        if finished_job and finished_job.get("rerunPayload") is not None:
+            try:
+                rerun = await self.enqueue(job["type"], finished_job["rerunPayload"], dedupe_key=job["dedupeKey"])
+                await self.collection.update_one({"_id": job["_id"]}, {"$set": {"rerunJobId": rerun["_id"]}})
+            except Exception as e:
+                logger.warning(f"Failed to queue the follow-up run of job {job['_id']}: {e}")
+                await self.collection.update_one({"_id": job["_id"]}, {"$unset": {"rerunPayload": ""}})
+        finished = self._finished.get(str(job["_id"]))
+        if finished:
+            finished.set()
+
+    async def _renew_lease(self, owned: Dict[str, Any]) -> None:
+        """Extend a running job's lease until cancelled"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.collection.update_one(owned, {"$set": {
+                    "leaseExpiresAt": datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+                }})
+            except Exception as e:
+                logger.warning(f"Job lease renewal failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker pool size and job counters for this process"""
+        return {
+            "workers": len(self._tasks),
+            "handlers": sorted(self._handlers),
+            **self._counters
+        }
+
+
+def serialize_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Public view of a job document for status endpoints
+
+    Returns:
+        Dict with jobId, status, attempts, timestamps and error (payload and
+        result are left to the caller)
+    """
+    def iso(value: Any) -> Optional[str]:
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    return {
+        "jobId": str(job["_id"]),
+        "type": job.get("type"),
+        "status": job.get("status"),
+        "attempts": job.get("attempts", 0),
+        "maxAttempts": job.get("maxAttempts"),
+        "createdAt": iso(job.get("createdAt")),
+        "startedAt": iso(job.get("startedAt")),
+        "finishedAt": iso(job.get("finishedAt")),
+        "nextAttemptAt": iso(job.get("runAt")) if job.get("status") == QUEUED else None,
+        "error": job.get("lastError")
+    }
+
+
+# Global job queue instance
+job_queue = JobQueue(
+    workers=settings.job_workers,
+    max_attempts=settings.job_max_attempts,
+    poll_interval_seconds=settings.job_poll_interval_seconds,
+    lease_seconds=settings.job_lease_seconds,
+    retry_backoff_seconds=settings.job_retry_backoff_seconds,
+    retention_days=settings.job_retention_days
+)
@@ -0,0 +1,504 @@
+"""
+Content-addressed storage for uploaded images and videos
+
+Blobs are keyed by the SHA-256 of their bytes, so the same photo uploaded
+twice is stored once. Documents such as symptom checks keep only a small
+reference (hash, type, size and an inline thumbnail) and the bytes are
+served by GET /api/v1/media/{hash}.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pymongo import ReturnDocument
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+import asyncio
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+import tempfile
+
+from app.config import settings
+from app.database import get_database
+from app.services.ai_service import ai_service
+from app.services.image_pipeline import ImagePipeline
+
+
+logger = logging.getLogger(__name__)
+
+MEDIA_URL_PREFIX = "/api/v1/media/"
+
+# Chunk size used when streaming blobs back to clients
+READ_CHUNK_BYTES = 256 * 1024
+
+# How long a save waits for a concurrent release to finish deleting the same blob
+DELETE_WAIT_SECONDS = 10.0
+DELETE_POLL_SECONDS = 0.05
+
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_DATA_URL_PATTERN = re.compile(r"^data:([\w.+-]+/[\w.+-]+)?(;[^,]*)?,", re.IGNORECASE)
+
+
+class MediaNotFoundError(Exception):
+    """Raised when a blob is not in the store"""
+
+
+def is_media_hash(value: str) -> bool:
+    """Check whether a string is a well-formed media hash"""
+    return bool(_HASH_PATTERN.match(value or ""))
+
+
+def media_url(media_hash: str) -> str:
+    """API path serving a blob"""
+    return f"{MEDIA_URL_PREFIX}{media_hash}"
+
+
+def decode_data_url(data: str, default_mime_type: str) -> Tuple[bytes, str]:
+    """
+    Decode a base64 upload, with or without a data URL prefix
+
+    Args:
+        data: "data:image/png;base64,..." or bare base64
+        default_mime_type: MIME type assumed without a prefix
+
+    Returns:
+        (bytes, MIME type)
+
+    Raises:
+        ValueError: If the payload isn't valid base64
+    """
+    mime_type = default_mime_type
+    match = _DATA_URL_PATTERN.match(data)
+    if match:
+        mime_type = (match.group(1) or default_mime_type).lower()
+        data = data[match.end():]
+    try:
+        # Strict decoding, so non-base64 text is rejected instead of stored as garbage
+        return base64.b64decode("".join(data.split()), validate=True), mime_type
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid base64 media: {e}") from e
+
+
+class MediaBackend(ABC):
+    """Where blob bytes live; metadata is kept by MediaStore"""
+
+    name = "base"
+
+    @abstractmethod
+    async def put(self, media_hash: str, data: bytes, mime_type: str) -> None:
+        """Store a blob (a no-op if it is already stored)"""
+
+    @abstractmethod
+    def read(self, media_hash: str, start: int, length: int) -> AsyncIterator[bytes]:
+        """
+        Stream ``length`` bytes of a blob from offset ``start``
+
+        Implemented as an async generator.
+
+        Raises:
+            MediaNotFoundError: If the blob is missing
+        """
+
+    @abstractmethod
+    async def delete(self, media_hash: str) -> None:
+        """Remove a blob if present"""
+
+
+class GridFSMediaBackend(MediaBackend):
+    """Blobs in a GridFS bucket of the application database, one file per hash"""
+
+    name = "gridfs"
+
+    def __init__(self, bucket_name: str = "media"):
+        """
+        Args:
+            bucket_name: GridFS bucket (collections <bucket>.files and <bucket>.chunks)
+        """
+        self.bucket_name = bucket_name
+
+    @property
+    def bucket(self) -> AsyncIOMotorGridFSBucket:
+        return AsyncIOMotorGridFSBucket(get_database(), bucket_name=self.bucket_name)
+
+    async def _file_id(self, media_hash: str) -> Optional[Any]:
+        doc = await get_database()[f"{self.bucket_name}.files"].find_one({"filename": media_hash}, {"_id": 1})
+        return doc["_id"] if doc else None
+
+    async def put(self, media_hash: str, data: bytes, mime_type: str) -> None:
+        if await self._file_id(media_hash) is not None:
+            return
+        await self.bucket.upload_from_stream(media_hash, data, metadata={"contentType": mime_type})
+
+    async def read(self, media_hash: str, start: int, length: int) -> AsyncIterator[bytes]:
+        file_id = await self._file_id(media_hash)
+        if file_id is None:
+            raise MediaNotFoundError(media_hash)
+        grid_out = await self.bucket.open_download_stream(file_id)
+        grid_out.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await grid_out.read(min(READ_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    async def delete(self, media_hash: str) -> None:
+        # Two first uploads racing can leave duplicate files under one hash
+        files = get_database()[f"{self.bucket_name}.files"].find({"filename": media_hash}, {"_id": 1})
+        async for doc in files:
+            await self.bucket.delete(doc["_id"])
+
+
+class LocalMediaBackend(MediaBackend):
+    """Blobs as files under a directory, fanned out by hash prefix"""
+
+    name = "local"
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Directory holding the blobs (created on first write)
+        """
+        self.root = root
+
+    def _path(self, media_hash: str) -> str:
+        return os.path.join(self.root, media_hash[:2], media_hash[2:4], media_hash)
+
+    def _write(self, media_hash: str, data: bytes) -> None:
+        path = self._path(media_hash)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _read_chunk(self, media_hash: str, offset: int, size: int) -> bytes:
+        try:
+            with open(self._path(media_hash), "rb") as f:
+                f.seek(offset)
+                return f.read(size)
+        except FileNotFoundError:
+            raise MediaNotFoundError(media_hash)
+
+    def _remove(self, media_hash: str) -> None:
+        try:
+            os.remove(self._path(media_hash))
+        except FileNotFoundError:
+            pass
+
+    async def put(self, media_hash: str, data: bytes, mime_type: str) -> None:
+        await asyncio.to_thread(self._write, media_hash, data)
+
+    async def read(self, media_hash: str, start: int, length: int) -> AsyncIterator[bytes]:
+        offset = start
+        end = start + length
+        while offset < end:
+            chunk = await asyncio.to_thread(self._read_chunk, media_hash, offset, min(READ_CHUNK_BYTES, end - offset))
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+
+    async def delete(self, media_hash: str) -> None:
+        await asyncio.to_thread(self._remove, media_hash)
+
+
+def create_media_backend(config) -> MediaBackend:
+    """
+    Build the media backend selected by settings.media_backend
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if config.media_backend == "gridfs":
+        return GridFSMediaBackend()
+    if config.media_backend == "local":
+        return LocalMediaBackend(config.media_local_root)
+    raise ValueError(f"Unknown MEDIA_BACKEND '{config.media_backend}' (expected 'gridfs' or 'local')")
+
+
+class MediaStore:
+    """
+    Deduplicating blob store with reference counts
+
+    Each blob has a metadata document in ``collection_name`` keyed by its
+    hash, holding the MIME type, size and how many documents refer to it.
+    Saving a blob adds a reference and uploads the bytes only the first
+    time; releasing the last reference deletes the blob. While a blob is
+    being deleted its metadata is flagged ``deleting``, and a save of the
+    same content waits for the deletion and then uploads the bytes again.
+    """
+
+    def __init__(
+        self,
+        backend: MediaBackend,
+        image_pipeline: ImagePipeline,
+        thumbnail_edge: int = 256,
+        thumbnail_quality: int = 70,
+        collection_name: str = "media"
+    ):
+        """
+        Args:
+            backend: Where blob bytes are kept
+            image_pipeline: Worker pool used to make image thumbnails
+            thumbnail_edge: Longest thumbnail edge in pixels
+            thumbnail_quality: Thumbnail JPEG quality
+            collection_name: Collection holding blob metadata
+        """
+        self.backend = backend
+        self.image_pipeline = image_pipeline
+        self.thumbnail_edge = thumbnail_edge
+        self.thumbnail_quality = thumbnail_quality
+        self.collection_name = collection_name
+        self._counters = {
+            "saved": 0,
+            "deduplicated": 0,
+            "uploadedBytes": 0,
+            "released": 0,
+            "deleted": 0,
+            "served": 0,
+            "servedBytes": 0
+        }
+
+    @property
+    def collection(self):
+        return get_database()[self.collection_name]
+
+    @staticmethod
+    async def hash(data: bytes) -> str:
+        """SHA-256 hex digest of a blob, computed off the event loop"""
+        return await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+
+    async def save(self, data: bytes, mime_type: str, media_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store a blob and add a reference to it
+
+        Args:
+            data: Blob bytes
+            mime_type: MIME type served with the blob
+            media_hash: The blob's hash, if the caller already computed it
+
+        Returns:
+            Reference to keep on the owning document: hash, kind, mimeType,
+            bytes, url and (for images) a base64 data URL thumbnail
+        """
+        media_hash = media_hash or await self.hash(data)
+        kind = mime_type.split("/", 1)[0]
+        meta = await self.collection.find_one_and_update(
+            {"_id": media_hash},
+            {
+                "$inc": {"refs": 1},
+                "$setOnInsert": {
+                    "mimeType": mime_type,
+                    "kind": kind,
+                    "bytes": len(data),
+                    "stored": False,
+                    "createdAt": datetime.utcnow()
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+        if meta.get("deleting"):
+            meta = await self._wait_for_delete(media_hash)
+
+        self._counters["saved"] += 1
+        if meta.get("stored"):
+            self._counters["deduplicated"] += 1
+        else:
+            await self.backend.put(media_hash, data, mime_type)
+            await self.collection.update_one({"_id": media_hash}, {"$set": {"stored": True}})
+            self._counters["uploadedBytes"] += len(data)
+
+        reference = {
+            "hash": media_hash,
+            "kind": kind,
+            "mimeType": meta["mimeType"],
+            "bytes": meta["bytes"],
+            "url": media_url(media_hash),
+            "thumbnail": None
+        }
+        if kind == "image":
+            try:
+                thumbnail = await self.image_pipeline.thumbnail(data, self.thumbnail_edge, self.thumbnail_quality)
+                reference["thumbnail"] = "data:image/jpeg;base64," + base64.b64encode(thumbnail).decode("ascii")
+            except Exception as e:
+                logger.warning(f"Thumbnail failed for media {media_hash[:12]}: {type(e).__name__}: {e}")
+        return reference
+
+    async def save_base64(self, data: str, default_mime_type: str) -> Dict[str, Any]:
+        """
+        Store a base64 upload (data URL or bare base64)
+
+        Raises:
+            ValueError: If the payload isn't valid base64
+        """
+        blob, mime_type = decode_data_url(data, default_mime_type)
+        return await self.save(blob, mime_type)
+
+    async def release(self, media_hash: str) -> None:
+        """Drop a reference, deleting the blob when none remain"""
+        meta = await self.collection.find_one_and_update(
+            {"_id": media_hash},
+            {"$inc": {"refs": -1}},
+            return_document=ReturnDocument.AFTER
+        )
+        self._counters["released"] += 1
+        if meta is None or meta.get("refs", 0) > 0:
+            return
+
+        # Flag the deletion first, so a save arriving meanwhile re-uploads after it instead of
+        # finding the old bytes in place and losing them to the delete below
+        claimed = await self.collection.update_one(
+            {"_id": media_hash, "refs": {"$lte": 0}, "deleting": {"$ne": True}},
+            {"$set": {"deleting": True, "stored": False}}
+        )
+        if not claimed.modified_count:
+            return
+        try:
+            await self.backend.delete(media_hash)
+        finally:
+            result = await self.collection.delete_one({"_id": media_hash, "refs": {"$lte": 0}})
+            if not result.deleted_count:
+                # Saved again during the delete; that save uploads the bytes once this flag is gone
+                await self.collection.update_one({"_id": media_hash}, {"$unset": {"deleting": ""}})
+        if result.deleted_count:
+            self._counters["deleted"] += 1
+
+    async def _wait_for_delete(self, media_hash: str) -> Dict[str, Any]:
+        """
+        Wait for a concurrent release to finish deleting a blob that was just saved again
+
+        Gives up after DELETE_WAIT_SECONDS (the releasing process may have
+        died) and clears the flag itself.
+
+        Returns:
+            The blob's metadata (``stored`` is False, so the caller uploads the bytes)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + DELETE_WAIT_SECONDS
+        while loop.time() < deadline:
+            await asyncio.sleep(DELETE_POLL_SECONDS)
+            meta = await self.collection.find_one({"_id": media_hash})
+            if not meta.get("deleting"):
+                return meta
+        logger.warning(f"Deletion of media {media_hash[:12]} did not finish, uploading it again")
+        return await self.collection.find_one_and_update(
+            {"_id": media_hash},
+            {"$unset": {"deleting": ""}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def get(self, media_hash: str) -> Optional[Dict[str, Any]]:
+        """Metadata of a stored blob, or None"""
+        return await self.collection.find_one({"_id": media_hash, "stored": True})
+
+    async def read(self, media_hash: str, start: int, length: int) -> AsyncIterator[bytes]:
+        """Stream part of a blob (see MediaBackend.read)"""
+        self._counters["served"] += 1
+        async for chunk in self.backend.read(media_hash, start, length):
+            self._counters["servedBytes"] += len(chunk)
+            yield chunk
+
+    async def open(self, media_hash: str, start: int, length: int) -> AsyncIterator[bytes]:
+        """
+        Start streaming part of a blob, reading its first chunk up front
+
+        A blob whose metadata is stored but whose bytes are missing from the
+        backend is reported here, before a response has been started.
+
+        Returns:
+            The blob's chunks, as read() streams them
+
+        Raises:
+            MediaNotFoundError: If the blob is missing from the backend
+        """
+        chunks = self.read(media_hash, start, length)
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            first = b""
+        return self._resume(first, chunks)
+
+    @staticmethod
+    async def _resume(first: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        try:
+            if first:
+                yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend name and store counters"""
+        return {"backend": self.backend.name, **self._counters}
+
+
+async def externalize_message_images(
+    messages: List[Dict[str, Any]],
+    stored_hashes: List[str]
+) -> List[str]:
+    """
+    Replace inline data URL images in chat messages with media store URLs
+
+    The client resends the whole chat on every save, with its images still
+    inline, so only images the check doesn't reference yet are stored, and
+    images no longer in the chat are released.
+
+    Args:
+        messages: Chat messages, updated in place
+        stored_hashes: Media hashes the check's messages already reference
+
+    Returns:
+        Media hashes the messages reference now
+    """
+    hashes: List[str] = []
+    for msg in messages:
+        image = msg.get("image")
+        if not isinstance(image, str) or not image.startswith("data:"):
+            continue
+        try:
+            blob, mime_type = decode_data_url(image, "image/jpeg")
+            media_hash = await media_store.hash(blob)
+            if media_hash not in stored_hashes and media_hash not in hashes:
+                await media_store.save(blob, mime_type, media_hash)
+        except Exception as e:
+            logger.warning(f"Failed to store chat image: {type(e).__name__}: {e}")
+            continue
+        msg["image"] = media_url(media_hash)
+        if media_hash not in hashes:
+            hashes.append(media_hash)
+
+    # Images sent earlier as media URLs are still referenced
+    for msg in messages:
+        image = msg.get("image")
+        if isinstance(image, str) and image.startswith(MEDIA_URL_PREFIX):
+            media_hash = image[len(MEDIA_URL_PREFIX):]
+            if media_hash in stored_hashes and media_hash not in hashes:
+                hashes.append(media_hash)
+
+    for media_hash in set(stored_hashes) - set(hashes):
+        await media_store.release(media_hash)
+    return hashes
+
+
+# Global media store instance; thumbnails share the AI image worker pool
+media_store = MediaStore(
+    backend=create_media_backend(settings),
+    image_pipeline=ai_service.image_pipeline,
+    thumbnail_edge=settings.media_thumbnail_edge,
+    thumbnail_quality=settings.media_thumbnail_quality
+)
@@ -0,0 +1,201 @@
+"""
+Concurrent, instrumented assembly of the pet context sent to the AI service
+"""
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from bson import ObjectId
+from fastapi import HTTPException, status
+import asyncio
+import logging
+import time
+
+from app.models.user import UserInDB
+from app.utils.season import get_season
+
+
+# The only check fields _split_history reads; skips messages and legacy inline media
+HISTORY_PROJECTION = {
+    "timestamp": 1,
+    "category": 1,
+    "healthSubcategory": 1,
+    "riskLevel": 1,
+    "summary": 1,
+    "resolved": 1
+}
+
+
+logger = logging.getLogger(__name__)
+
+
+class PetContextBuilder:
+    """
+    Builds the pet profile, recent history, season and location for an analysis
+
+    The pet document and its recent symptom checks are fetched concurrently;
+    the ownership check runs once both have returned, and history fetched for
+    a pet the caller does not own is discarded. A failed history query
+    degrades to an empty history instead of failing the request. Season and
+    owner location need no database access and are computed while the
+    queries are in flight.
+    """
+
+    def __init__(self, history_limit: int = 5):
+        """
+        Args:
+            history_limit: Number of recent symptom checks included
+        """
+        self.history_limit = history_limit
+        self._counters = {
+            "builds": 0,
+            "notFound": 0,
+            "forbidden": 0,
+            "historyFailures": 0
+        }
+        self._timings = {"petMs": 0.0, "historyMs": 0.0, "totalMs": 0.0}
+
+    async def build(
+        self,
+        db,
+        pet_id: Optional[str],
+        current_user: Optional[UserInDB],
+        now: Optional[datetime] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Build the pet context for a symptom check
+
+        Args:
+            db: Database handle
+            pet_id: Pet ID from the submission (optional)
+            current_user: Current authenticated user (optional)
+            now: Current time, used for the season (defaults to now)
+
+        Returns:
+            Pet profile, recent history, season and location, or None without a
+            petId or when the pet does not exist
+
+        Raises:
+            HTTPException: If the pet ID is invalid or the pet belongs to another user
+        """
+        if not pet_id:
+            return None
+
+        # Validate ObjectId
+        if not ObjectId.is_valid(pet_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pet ID"
+            )
+
+        started = time.perf_counter()
+        pet, history = await asyncio.gather(
+            self._timed("petMs", db.pets.find_one({"_id": ObjectId(pet_id)})),
+            self._timed("historyMs", db.symptom_checks.find(
+                {"petId": pet_id},
+                HISTORY_PROJECTION
+            ).sort("timestamp", -1).limit(self.history_limit).to_list(length=self.history_limit)),
+            return_exceptions=True
+        )
+
+        if isinstance(pet, BaseException):
+            raise pet
+        if not pet:
+            self._counters["notFound"] += 1
+            return None
+
+        # Verify pet belongs to current user if authenticated
+        if current_user and pet["userId"] != str(current_user.id):
+            self._counters["forbidden"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access this pet"
+            )
+
+        pet_context = self._profile(pet)
+
+        if isinstance(history, BaseException):
+            self._counters["historyFailures"] += 1
+            logger.warning(f"Failed to load pet history: {history}")
+            history = []
+        pet_context["history"], pet_context["resolved_history"] = self._split_history(history)
+
+        # Season and location context only apply to authenticated users
+        if current_user:
+            pet_context["season"] = get_season(now)
+            location = self._owner_location(current_user)
+            if location:
+                pet_context["location"] = location
+
+        self._counters["builds"] += 1
+        self._timings["totalMs"] += (time.perf_counter() - started) * 1000
+        return pet_context
+
+    async def _timed(self, name: str, awaitable: Any) -> Any:
+        """Await a query and add its duration to the named timing"""
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self._timings[name] += (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _profile(pet: Dict[str, Any]) -> Dict[str, Any]:
+        """Pet fields included in the AI prompt"""
+        return {
+            "name": pet.get("name"),
+            "breed": pet.get("breed"),
+            "age": pet.get("age"),
+            "gender": pet.get("gender"),
+            "weight": pet.get("weight"),
+            "lifestyle": pet.get("lifestyle"),
+            "conditions": pet.get("conditions", []),
+            "allergies": pet.get("allergies", [])
+        }
+
+    @staticmethod
+    def _split_history(history: List[Dict[str, Any]]) -> tuple:
+        """Separate recent checks into active and resolved issues"""
+        active, resolved = [], []
+        for check in history:
+            check_data = {
+                "date": check.get("timestamp"),
+                "category": check.get("category"),
+                "subcategory": check.get("healthSubcategory"),
+                "riskLevel": check.get("riskLevel"),
+                "summary": check.get("summary"),
+                "resolved": check.get("resolved", False)
+            }
+            if check.get("resolved", False):
+                resolved.append(check_data)
+            else:
+                active.append(check_data)
+        return active, resolved
+
+    @staticmethod
+    def _owner_location(current_user: UserInDB) -> Optional[Dict[str, Any]]:
+        """Owner's city/state (and pin code when an address is on file)"""
+        if current_user.address:
+            return {
+                "city": current_user.address.city,
+                "state": current_user.address.state,
+                "pincode": current_user.address.zip_code
+            }
+        if current_user.location:
+            return {
+                "city": current_user.location.city,
+                "state": current_user.location.state
+            }
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and average stage timings"""
+        lookups = self._counters["builds"] + self._counters["notFound"] + self._counters["forbidden"]
+        return {
+            **self._counters,
+            "avgPetMs": round(self._timings["petMs"] / lookups, 2) if lookups else 0.0,
+            "avgHistoryMs": round(self._timings["historyMs"] / lookups, 2) if lookups else 0.0,
+            "avgTotalMs": round(self._timings["totalMs"] / self._counters["builds"], 2) if self._counters["builds"] else 0.0
+        }
+
+
+# Global pet context builder instance
+pet_context_builder = PetContextBuilder()
@@ -0,0 +1,585 @@
+"""
+Pet health summary generation, shared by the summary endpoint and its background jobs
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from datetime import datetime, timezone
+from bson import ObjectId
+import asyncio
+import logging
+
+from app.models.user import UserInDB
+from app.database import get_database
+from app.services.ai_service import ai_service
+from app.services.prompts import PET_SUMMARY_INSTRUCTION
+from app.services.health_stats import health_stats
+from app.utils.priority_scheduler import BACKGROUND
+from app.utils.season import get_season, SEASON_DESCRIPTIONS
+
+
+logger = logging.getLogger(__name__)
+
+# Job type for background summary regeneration
+PET_SUMMARY_JOB = "pet_summary"
+
+# Incremental pet summaries send the previous summary plus at most this many changed checks
+INCREMENTAL_SUMMARY_MAX_CHANGES = 5
+# Consecutive incremental updates before a summary is rebuilt from the full history
+INCREMENTAL_SUMMARY_MAX_CHAIN = 10
+
+
+class SummaryInputs(NamedTuple):
+    """Everything needed to decide whether, and how, to regenerate a summary"""
+    current_date: datetime
+    season: str
+    city: Optional[str]
+    state: Optional[str]
+    pincode: Optional[str]
+    cached_summary: Optional[Dict[str, Any]]
+    total_checks: int
+    resolved_count: int
+    changed_checks: Optional[List[Dict[str, Any]]]  # None when a full rebuild is required
+    needs_regeneration: bool
+
+
+def pet_summary_job_key(pet_id: str) -> str:
+    """Dedupe key for a pet's summary regeneration job"""
+    return f"{PET_SUMMARY_JOB}:{pet_id}"
+
+
+async def load_summary_inputs(
+    db,
+    pet_id: str,
+    current_user: UserInDB,
+    force_refresh: bool = False
+) -> SummaryInputs:
+    """
+    Check a pet's cached summary against its history, season and owner location
+    
+    Args:
+        db: Database handle
+        pet_id: Pet ID
+        current_user: Pet owner
+        force_refresh: Require a full rebuild
+    
+    Returns:
+        SummaryInputs for the pet
+    """
+    # Determine current season based on system date (India seasons)
+    current_date = datetime.now()
+    season = get_season(current_date)
+    city, state, pincode = _owner_location(current_user)
+    has_location_data = bool(city or pincode)
+    
+    # Check for existing cached summary and the pet's check counts (one point read each)
+    cached_summary, stats = await asyncio.gather(
+        db.pet_health_summaries.find_one({"petId": pet_id}),
+        health_stats.pet(db, pet_id)
+    )
+    total_checks = stats.get("totalChecks", 0)
+    resolved_count = total_checks - stats.get("activeChecks", 0)
+    
+    # Checks changed since the cached summary, or None if it must be rebuilt in full
+    changed_checks = None
+    if cached_summary and not force_refresh:
+        if _unchanged_since_summary(cached_summary, stats):
+            changed_checks = []
+        else:
+            changed_checks = await _summary_changes(db, pet_id, cached_summary, total_checks)
+    
+    needs_regeneration = (
+        changed_checks is None
+        or len(changed_checks) > 0
+        or cached_summary.get("season") != season
+        or cached_summary.get("hasLocationData", False) != has_location_data
+    )
+    
+    return SummaryInputs(
+        current_date=current_date,
+        season=season,
+        city=city,
+        state=state,
+        pincode=pincode,
+        cached_summary=cached_summary,
+        total_checks=total_checks,
+        resolved_count=resolved_count,
+        changed_checks=changed_checks,
+        needs_regeneration=needs_regeneration
+    )
+
+
+def cached_summary_response(pet: Dict[str, Any], cached_summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Endpoint response for a stored summary"""
+    generated_at = cached_summary["generatedAt"]
+    return {
+        "petId": cached_summary["petId"],
+        "petName": pet['name'],
+        "summary": cached_summary["summary"],
+        "generatedAt": generated_at.isoformat() if isinstance(generated_at, datetime) else generated_at,
+        "historyPeriod": cached_summary.get("historyPeriod", "All available history"),
+        "checksAnalyzed": cached_summary.get("checksAnalyzed", 0),
+        "source": "Cached summary (no new chat history)",
+        "cached": True
+    }
+
+
+async def run_pet_summary_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Job handler regenerating a pet's summary
+    
+    Args:
+        payload: {"petId", "userId", "forceRefresh"}
+    
+    Returns:
+        The summary endpoint response for the new (or still current) summary
+    
+    Raises:
+        ValueError: If the pet or its owner no longer exists
+    """
+    db = get_database()
+    pet, user_data = await asyncio.gather(
+        db.pets.find_one({"_id": ObjectId(payload["petId"])}),
+        db.users.find_one({"_id": ObjectId(payload["userId"])})
+    )
+    if not pet or not user_data:
+        raise ValueError("Pet or owner no longer exists")
+    
+    user_data["_id"] = str(user_data["_id"])
+    return await generate_pet_summary(db, pet, UserInDB(**user_data), payload.get("forceRefresh", False))
+
+
+async def generate_pet_summary(
+    db,
+    pet: Dict[str, Any],
+    current_user: UserInDB,
+    force_refresh: bool = False
+) -> Dict[str, Any]:
+    """
+    Regenerate a pet's health summary if its history, season or location changed
+    
+    Regeneration is incremental: Gemini receives the previous summary plus
+    only the checks added, resolved or discussed since it was generated, so
+    the prompt stays the same size however long the history grows. The
+    summary is rebuilt from the full history on force_refresh, after checks
+    are deleted, when too many checks changed, or after
+    INCREMENTAL_SUMMARY_MAX_CHAIN incremental updates in a row.
+    
+    Args:
+        db: Database handle
+        pet: Pet document
+        current_user: Pet owner
+        force_refresh: Rebuild from the full history even if the cached summary is current
+    
+    Returns:
+        Dict with the summary, as returned by the summary endpoint
+    """
+    pet_id = str(pet["_id"])
+    inputs = await load_summary_inputs(db, pet_id, current_user, force_refresh)
+    cached_summary = inputs.cached_summary
+    changed_checks = inputs.changed_checks
+    if not inputs.needs_regeneration:
+        return cached_summary_response(pet, cached_summary)
+    
+    current_date = inputs.current_date
+    season = inputs.season
+    season_description = SEASON_DESCRIPTIONS[season]
+    city, state, pincode = inputs.city, inputs.state, inputs.pincode
+    has_location_data = bool(city or pincode)
+    total_checks = inputs.total_checks
+    resolved_count = inputs.resolved_count
+    active_count = total_checks - resolved_count
+    
+    # Owner's location and season for the prompt
+    if current_user.address:
+        user_location_info = f"\n\nOwner's Location:\n- City: {city}, {state}\n- PIN Code: {pincode}"
+    elif current_user.location:
+        user_location_info = f"\n\nOwner's Location:\n- City: {city}, {state}"
+    else:
+        user_location_info = ""
+    user_location_info += f"\n- Current Season: {season} ({season_description})"
+    user_location_info += f"\n- Date: {current_date.strftime('%B %d, %Y')}"
+    
+    incremental = (
+        changed_checks is not None
+        and cached_summary.get("incrementalUpdates", 0) < INCREMENTAL_SUMMARY_MAX_CHAIN
+    )
+    
+    # Climate context is shared across users in the same location and season
+    climate_info = ""
+    if city or pincode:
+        try:
+            location_str = f"{city}, {state}" if city else f"PIN code {pincode}"
+            climate_text = await ai_service.get_climate_context(city, state, pincode, season, current_date)
+            climate_info = f"\n\nLocal Climate Context ({location_str}, {season}):\n{climate_text}"
+        except Exception as e:
+            logger.warning(f"Failed to get climate info: {e}")
+            # Continue without climate info if API fails
+    
+    # Prepare pet profile information
+    pet_info = f"""Pet Profile:
+- Name: {pet['name']}
+- Breed: {pet['breed']}
+- Age: {pet.get('age', 'Unknown')} years
+- Gender: {pet.get('gender', 'Unknown')}
+- Weight: {pet.get('weight', 'Not specified')} kg
+- Lifestyle: {pet.get('lifestyle', 'Not specified')}"""
+    
+    if pet.get('conditions'):
+        pet_info += f"\n- Medical Conditions: {', '.join(pet['conditions'])}"
+    else:
+        pet_info += "\n- Medical Conditions: None"
+        
+    if pet.get('allergies'):
+        pet_info += f"\n- Allergies: {', '.join(pet['allergies'])}"
+    else:
+        pet_info += "\n- Allergies: None"
+    
+    # Add location and climate information
+    pet_info += user_location_info
+    pet_info += climate_info
+    
+    # Create comprehensive prompt for Gemini with location-based context
+    location_context = ""
+    has_climate_data = bool(climate_info)
+    
+    if city or pincode:
+        location_str = f"{city}, {state}" if city else f"PIN code {pincode}"
+        location_context = f"\n\n**IMPORTANT:** The pet owner is located in {location_str}. It is currently {season} season ({season_description}). Consider the local climate, current seasonal conditions, and region-specific health concerns when making recommendations. Tailor your advice to be relevant for this specific location and season in India."
+    else:
+        # Even without location, include season information
+        location_context = f"\n\n**IMPORTANT:** It is currently {season} season in India ({season_description}). Consider seasonal health concerns and provide season-appropriate recommendations."
+    
+    # Determine what data sources are being used
+    if active_count > 0 and resolved_count > 0:
+        checks_text = f"{active_count} active concern(s) and {resolved_count} resolved issue(s)"
+    elif active_count > 0:
+        checks_text = f"{active_count} active concern(s)"
+    elif resolved_count > 0:
+        checks_text = f"{resolved_count} resolved issue(s)"
+    else:
+        checks_text = "no health conversations"
+    
+    based_on_text = f"Pet profile, {checks_text}, and {season} season context"
+    if has_climate_data:
+        based_on_text = f"Pet profile, {checks_text}, local climate, and {season} season analysis"
+    
+    title_lines = f"""Use this title: # 🐾 Health Summary for {pet['name']}
+Use this "Based on" line: **Based on:** {based_on_text}"""
+    
+    if incremental:
+        previous_generated_at = _as_utc_datetime(cached_summary["generatedAt"])
+        previous_date = previous_generated_at.strftime('%B %d, %Y')
+        
+        def render(kept: int) -> str:
+            changes_summary = _format_summary_changes(changed_checks[:kept], previous_generated_at)
+            if kept < len(changed_checks):
+                changes_summary += f"\n({len(changed_checks) - kept} older change(s) omitted for length)"
+            return f"""Update your previous health summary for this pet. Below are the pet's current details, your previous summary, and only what has changed in the pet's health history since then. Revise the summary so it reflects these changes, keeping everything that is still accurate.
+
+{pet_info}
+
+PREVIOUS SUMMARY ({previous_date}):
+{cached_summary['summary']}
+{changes_summary}
+{location_context}
+
+About the changes:
+- The previous summary already covers the pet's earlier health history
+- "NEW HEALTH CHECKS" were recorded after the previous summary was written
+- "UPDATED HEALTH CHECKS" were covered by the previous summary but have since been resolved, reopened or discussed further
+- If there are no health history changes, keep the health observations and refresh the seasonal and location-specific content
+
+{title_lines}"""
+        
+        # Changed checks are newest first, so the oldest changes are dropped first
+        prompt = ai_service.prompt_accountant.fit("pet_summary", render, len(changed_checks))
+    else:
+        # Get ALL symptom check history for this pet (not limited by time)
+        symptom_checks = await db.symptom_checks.find({
+            "petId": pet_id
+        }).sort("timestamp", -1).to_list(length=100)
+        
+        # Separate active and resolved issues
+        active_checks = [check for check in symptom_checks if not check.get('resolved', False)]
+        resolved_checks = [check for check in symptom_checks if check.get('resolved', False)]
+        
+        # Up to 5 most recent active and 5 most recent resolved, in the order they are dropped last to first
+        history_items = [(False, check) for check in active_checks[:5]] + [(True, check) for check in resolved_checks[:5]]
+        
+        def render(kept: int) -> str:
+            active = [check for resolved, check in history_items[:kept] if not resolved]
+            resolved = [check for resolved, check in history_items[:kept] if resolved]
+            
+            # Prepare detailed health history with chat conversations, separating active and resolved issues
+            history_summary = ""
+            
+            # Add active health concerns
+            if active:
+                history_summary = f"\n\nACTIVE HEALTH CONCERNS ({len(active_checks)} ongoing):\n"
+                for idx, check in enumerate(active, 1):
+                    history_summary += _format_active_check(check, f"Active Concern #{idx}")
+            
+            # Add resolved past issues
+            if resolved:
+                history_summary += f"\n\nRESOLVED PAST ISSUES ({len(resolved_checks)} addressed):\n"
+                history_summary += "**Note:** These issues have been resolved but are included for historical context.\n"
+                for idx, check in enumerate(resolved, 1):
+                    history_summary += _format_resolved_check(check, f"Past Issue #{idx}")
+            
+            # If no checks at all
+            if not active_checks and not resolved_checks:
+                history_summary = "\n\nHealth History: No health check conversations recorded yet."
+            elif kept < len(history_items):
+                history_summary += f"\n({len(history_items) - kept} older health check(s) omitted for length)"
+            
+            return f"""Create a health summary for this pet from the following information.
+
+{pet_info}
+{history_summary}
+{location_context}
+
+{title_lines}"""
+        
+        prompt = ai_service.prompt_accountant.fit("pet_summary", render, len(history_items))
+    
+    # Call Gemini AI to generate new summary
+    # Summaries are not time-critical, so they yield to symptom analyses
+    summary = (await ai_service.generate_text(
+        prompt,
+        priority=BACKGROUND,
+        system_instruction=PET_SUMMARY_INSTRUCTION,
+        endpoint="pet_summary"
+    )).strip()
+    
+    generated_at = datetime.utcnow()
+    generation_mode = "incremental" if incremental else "full"
+    incremental_updates = cached_summary.get("incrementalUpdates", 0) + 1 if incremental else 0
+    
+    # Save the new summary to history (always insert, never update)
+    summary_history_doc = {
+        "petId": pet_id,
+        "petName": pet['name'],
+        "summary": summary,
+        "generatedAt": generated_at,
+        "historyPeriod": "All available history",
+        "checksAnalyzed": total_checks,
+        "hasLocationData": has_location_data,
+        "season": season,
+        "generationMode": generation_mode,
+        "createdAt": generated_at
+    }
+    
+    # Insert into history collection
+    await db.pet_health_summary_history.insert_one(summary_history_doc)
+    
+    # Also update the current/cached summary for quick access
+    summary_doc = {
+        "petId": pet_id,
+        "petName": pet['name'],
+        "summary": summary,
+        "generatedAt": generated_at,
+        "historyPeriod": "All available history",
+        "checksAnalyzed": total_checks,
+        "hasLocationData": has_location_data,
+        "season": season,
+        "generationMode": generation_mode,
+        "incrementalUpdates": incremental_updates,
+        "updatedAt": generated_at
+    }
+    
+    # Upsert the current summary (update if exists, insert if not)
+    await db.pet_health_summaries.update_one(
+        {"petId": pet_id},
+        {"$set": summary_doc},
+        upsert=True
+    )
+    
+    return {
+        "petId": pet_id,
+        "petName": pet['name'],
+        "summary": summary,
+        "generatedAt": generated_at.isoformat(),
+        "historyPeriod": "All available history",
+        "checksAnalyzed": total_checks,
+        "source": "AI-powered analysis using Google Gemini",
+        "generationMode": generation_mode,
+        "cached": False
+    }
+
+
+def changed_checks_query(pet_id: str, generated_at: datetime) -> Dict[str, Any]:
+    """
+    Filter for a pet's symptom checks added or updated after a time
+
+    petId is repeated in each $or branch so each branch is an index range
+    (petId/timestamp and petId/updatedAt) instead of a scan of all the
+    pet's checks.
+    """
+    return {
+        "$or": [
+            {"petId": pet_id, "timestamp": {"$gt": generated_at}},
+            {"petId": pet_id, "updatedAt": {"$gt": generated_at}}
+        ]
+    }
+
+
+def _unchanged_since_summary(cached_summary: Dict[str, Any], stats: Dict[str, Any]) -> bool:
+    """
+    Whether the pet's statistics show no check added, updated or deleted since the summary
+
+    A True result skips the query for changed checks; anything else falls
+    back to it.
+    """
+    generated_at = _as_utc_datetime(cached_summary.get("generatedAt"))
+    if not generated_at or cached_summary.get("checksAnalyzed", 0) != stats.get("totalChecks", 0):
+        return False
+    last_change = _as_utc_datetime(stats.get("lastChangeAt"))
+    return last_change is None or last_change <= generated_at
+
+
+async def _summary_changes(
+    db,
+    pet_id: str,
+    cached_summary: Dict[str, Any],
+    total_checks: int
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Find the symptom checks added or updated since a cached summary was generated
+    
+    Checks are updated when they are resolved, reopened or get new chat
+    messages (see updatedAt on symptom_checks).
+    
+    Returns:
+        Changed checks (newest first), or None if the summary must be rebuilt
+        in full: checks were deleted, more than INCREMENTAL_SUMMARY_MAX_CHANGES
+        changed, or the cached summary has no usable generatedAt
+    """
+    generated_at = _as_utc_datetime(cached_summary.get("generatedAt"))
+    if not generated_at:
+        return None
+    
+    changed_checks = await db.symptom_checks.find(
+        changed_checks_query(pet_id, generated_at)
+    ).sort("timestamp", -1).to_list(length=INCREMENTAL_SUMMARY_MAX_CHANGES + 1)
+    
+    if len(changed_checks) > INCREMENTAL_SUMMARY_MAX_CHANGES:
+        return None
+    
+    # Any other difference in the count means checks were deleted (or stored
+    # in a form the query above cannot see), which an update cannot express
+    new_checks = sum(
+        1 for check in changed_checks
+        if (_as_utc_datetime(check.get("timestamp")) or generated_at) > generated_at
+    )
+    if cached_summary.get("checksAnalyzed", 0) + new_checks != total_checks:
+        return None
+    
+    return changed_checks
+
+
+def _format_summary_changes(changed_checks: List[Dict[str, Any]], since: datetime) -> str:
+    """Describe the checks added or updated since the previous summary for the update prompt"""
+    if not changed_checks:
+        return "\n\nHEALTH HISTORY CHANGES: None since the previous summary."
+    
+    new_checks = [check for check in changed_checks if (_as_utc_datetime(check.get("timestamp")) or since) > since]
+    updated_checks = [check for check in changed_checks if check not in new_checks]
+    
+    changes = ""
+    if new_checks:
+        changes += f"\n\nNEW HEALTH CHECKS ({len(new_checks)} since the previous summary):\n"
+        for idx, check in enumerate(new_checks, 1):
+            if check.get('resolved', False):
+                changes += _format_resolved_check(check, f"New Check #{idx}")
+            else:
+                changes += _format_active_check(check, f"New Check #{idx}")
+    
+    if updated_checks:
+        changes += f"\n\nUPDATED HEALTH CHECKS ({len(updated_checks)} since the previous summary):\n"
+        for idx, check in enumerate(updated_checks, 1):
+            if check.get('resolved', False):
+                changes += _format_resolved_check(check, f"Updated Check #{idx}")
+            else:
+                changes += _format_active_check(check, f"Updated Check #{idx} (Active)")
+    
+    return changes
+
+
+def _as_utc_datetime(value: Any) -> Optional[datetime]:
+    """Read a stored timestamp (datetime or ISO string) as a naive UTC datetime"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _format_check_date(value: Any) -> str:
+    """Format a stored timestamp for a prompt"""
+    parsed = _as_utc_datetime(value)
+    return parsed.strftime('%B %d, %Y') if parsed else "Unknown date"
+
+
+def _format_active_check(check: Dict[str, Any], label: str) -> str:
+    """Describe an ongoing health concern, with up to 5 of the owner's chat messages"""
+    text = f"\n--- {label} ({_format_check_date(check.get('timestamp'))}) ---"
+    text += f"\nCategory: {check.get('category', 'Unknown')}"
+    if check.get('healthSubcategory'):
+        text += f" - {check['healthSubcategory']}"
+    text += f"\nRisk Level: {check.get('riskLevel', 'Unknown')}"
+    text += f"\nAssessment: {check.get('summary', 'No summary available')}"
+    
+    # Include chat conversation if available
+    if check.get('messages'):
+        text += f"\n\nChat Details:"
+        # Get user messages (symptoms described by owner)
+        user_messages = [msg for msg in check['messages'] if msg.get('type') == 'user']
+        if user_messages:
+            text += f"\nOwner's Concerns:"
+            for msg in user_messages[:5]:  # Up to 5 user messages
+                content = msg.get('content', '')
+                if content and len(content) > 10:  # Skip very short messages
+                    text += f"\n  • {content[:300]}"
+    
+    return text + "\n"
+
+
+def _format_resolved_check(check: Dict[str, Any], label: str) -> str:
+    """Describe a resolved health issue, with up to 3 of the owner's chat messages"""
+    resolved_date = ""
+    if check.get('resolvedAt'):
+        resolved_at = _as_utc_datetime(check['resolvedAt'])
+        resolved_date = f" - Resolved: {resolved_at.strftime('%B %d, %Y')}" if resolved_at else " - Resolved"
+    
+    text = f"\n--- {label} ({_format_check_date(check.get('timestamp'))}{resolved_date}) (Now Resolved) ---"
+    text += f"\nCategory: {check.get('category', 'Unknown')}"
+    if check.get('healthSubcategory'):
+        text += f" - {check['healthSubcategory']}"
+    text += f"\nWas: {check.get('riskLevel', 'Unknown')} (Now Resolved)"
+    text += f"\nPast Assessment: {check.get('summary', 'No summary available')}"
+    
+    # Include chat conversation if available
+    if check.get('messages'):
+        # Get user messages (symptoms described by owner)
+        user_messages = [msg for msg in check['messages'] if msg.get('type') == 'user']
+        if user_messages:
+            text += f"\nPast Concerns (Now Addressed):"
+            for msg in user_messages[:3]:  # Up to 3 user messages for resolved issues
+                content = msg.get('content', '')
+                if content and len(content) > 10:  # Skip very short messages
+                    text += f"\n  • {content[:200]}"
+    
+    return text + "\n"
+
+
+def _owner_location(current_user: UserInDB) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Owner's (city, state, pincode); the address takes precedence over the GPS location"""
+    if current_user.address:
+        return current_user.address.city, current_user.address.state, current_user.address.zip_code
+    if current_user.location:
+        return current_user.location.city, current_user.location.state, None
+    return None, None, None
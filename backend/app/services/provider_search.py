@@ -0,0 +1,68 @@
+"""
+Provider lookups shared by the provider routes and the symptom checker
+"""
+from typing import List, Optional
+
+from app.models.provider import ProviderResponse
+from app.database import get_database
+from app.utils.geo import haversine_distance
+
+
+async def find_nearest_emergency_providers(
+    latitude: float,
+    longitude: float,
+    radius: float = 15,
+    limit: Optional[int] = None
+) -> List[ProviderResponse]:
+    """
+    Find 24x7 providers within a radius, nearest first
+    
+    Args:
+        latitude: User latitude
+        longitude: User longitude
+        radius: Search radius in km (default: 15)
+        limit: Maximum number of providers to return (optional)
+    
+    Returns:
+        List[ProviderResponse]: Nearest 24x7 providers with distances
+    """
+    db = get_database()
+    
+    # Get all 24x7 providers
+    cursor = db.providers.find({"is24x7": True})
+    providers = await cursor.to_list(length=None)
+    
+    # Calculate distances and filter by radius
+    provider_responses = []
+    for provider in providers:
+        distance = haversine_distance(
+            latitude,
+            longitude,
+            provider["latitude"],
+            provider["longitude"]
+        )
+        
+        # Only include providers within radius
+        if distance <= radius:
+            provider_responses.append(
+                ProviderResponse(
+                    id=str(provider["_id"]),
+                    name=provider["name"],
+                    phone=provider["phone"],
+                    address=provider["address"],
+                    city=provider["city"],
+                    state=provider["state"],
+                    latitude=provider["latitude"],
+                    longitude=provider["longitude"],
+                    operatingHours=provider["operatingHours"],
+                    rating=provider["rating"],
+                    is24x7=provider["is24x7"],
+                    services=provider.get("services", []),
+                    distance=distance
+                )
+            )
+    
+    # Sort by distance (nearest first)
+    provider_responses.sort(key=lambda p: p.distance if p.distance is not None else float('inf'))
+    
+    return provider_responses[:limit] if limit else provider_responses
@@ -0,0 +1,345 @@
+"""
+Off-peak batch refresh of pet summaries made stale by a season change
+"""
+from typing import Any, Dict, Optional
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+import asyncio
+import logging
+import os
+import socket
+
+from app.config import settings
+from app.database import get_database
+from app.services.job_queue import job_queue, SUCCEEDED, FAILED
+from app.services.pet_summary import PET_SUMMARY_JOB, pet_summary_job_key
+from app.utils.season import get_season
+
+
+logger = logging.getLogger(__name__)
+
+
+def season_run_id(now: datetime) -> str:
+    """
+    Identify the season a refresh run belongs to
+
+    Winter runs from October to February, so January and February belong to
+    the run that started the previous October.
+
+    Returns:
+        str: e.g. 'Monsoon-2025' or 'Winter-2025'
+    """
+    season = get_season(now)
+    year = now.year - 1 if season == "Winter" and now.month <= 2 else now.year
+    return f"{season}-{year}"
+
+
+class SeasonSummaryRefresher:
+    """
+    Regenerates every cached pet summary whose season is out of date
+
+    A season change makes every summary in pet_health_summaries stale at
+    once. Instead of regenerating them as owners open their dashboards,
+    this walks the stale summaries in petId order during an off-peak window,
+    with at most ``concurrency`` summaries in flight and at most
+    ``max_per_minute`` started per minute. Progress is checkpointed per
+    batch in ``collection_name`` (one document per season), so an
+    interrupted run resumes after the last completed batch. The checkpoint
+    also carries a lease, renewed while a batch runs, so only one app
+    process runs a season at a time.
+
+    Summaries are regenerated by PET_SUMMARY_JOB jobs on the job queue,
+    deduplicated per pet with the ones owners trigger, so a pet is never
+    regenerated twice at once.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        max_per_minute: float = 20.0,
+        window_start_hour: int = 1,
+        window_end_hour: int = 6,
+        batch_size: int = 25,
+        check_interval_seconds: float = 900.0,
+        lease_seconds: float = 600.0,
+        job_wait_seconds: float = 600.0,
+        collection_name: str = "season_refresh_runs"
+    ):
+        """
+        Args:
+            concurrency: Summaries regenerated at the same time
+            max_per_minute: Summaries started per minute
+            window_start_hour: Local hour the off-peak window opens
+            window_end_hour: Local hour the off-peak window closes (may wrap past midnight)
+            batch_size: Summaries per checkpoint
+            check_interval_seconds: How often the in-app scheduler checks for work
+            lease_seconds: How long a run is locked to one process without a checkpoint
+            job_wait_seconds: How long to wait for a pet's summary job before moving on
+            collection_name: Collection holding the run checkpoints
+        """
+        self.concurrency = concurrency
+        self.max_per_minute = max_per_minute
+        self.window_start_hour = window_start_hour
+        self.window_end_hour = window_end_hour
+        self.batch_size = batch_size
+        self.check_interval_seconds = check_interval_seconds
+        self.lease_seconds = lease_seconds
+        self.job_wait_seconds = job_wait_seconds
+        self.collection_name = collection_name
+
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._pace_lock = asyncio.Lock()
+        self._next_start = 0.0
+        self._last_run: Optional[Dict[str, Any]] = None
+
+    @property
+    def collection(self):
+        return get_database()[self.collection_name]
+
+    def in_window(self, now: Optional[datetime] = None) -> bool:
+        """Check whether a local time falls inside the off-peak window"""
+        hour = (now or datetime.now()).hour
+        if self.window_start_hour <= self.window_end_hour:
+            return self.window_start_hour <= hour < self.window_end_hour
+        return hour >= self.window_start_hour or hour < self.window_end_hour
+
+    async def run(self, respect_window: bool = True, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Refresh stale summaries for the current season, resuming from the checkpoint
+
+        Args:
+            respect_window: Stop starting new batches once the off-peak window closes
+            dry_run: Count the stale summaries without regenerating them
+
+        Returns:
+            Dict with the run ID, status and counters
+        """
+        db = get_database()
+        now = datetime.now()
+        season = get_season(now)
+        run_id = season_run_id(now)
+
+        if dry_run:
+            stale = await db.pet_health_summaries.count_documents({"season": {"$ne": season}})
+            return {"runId": run_id, "season": season, "status": "dry_run", "stale": stale}
+
+        checkpoint = await self._claim(run_id, season)
+        if checkpoint is None:
+            return {"runId": run_id, "season": season, "status": "locked"}
+        if checkpoint.get("completedAt"):
+            return self._progress(checkpoint, "completed")
+
+        last_pet_id = checkpoint.get("lastPetId", "")
+        status = "completed"
+        while True:
+            if respect_window and not self.in_window():
+                status = "paused"
+                break
+
+            batch = await db.pet_health_summaries.find(
+                {"season": {"$ne": season}, "petId": {"$gt": last_pet_id}},
+                {"petId": 1}
+            ).sort("petId", 1).limit(self.batch_size).to_list(length=self.batch_size)
+            if not batch:
+                break
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+            heartbeat = asyncio.create_task(self._renew_lease(run_id))
+            try:
+                outcomes = await asyncio.gather(*(
+                    self._refresh_pet(db, doc["petId"], semaphore) for doc in batch
+                ))
+            finally:
+                heartbeat.cancel()
+            last_pet_id = batch[-1]["petId"]
+
+            checkpoint = await self.collection.find_one_and_update(
+                {"_id": run_id, "owner": self._owner},
+                {
+                    "$set": {
+                        "lastPetId": last_pet_id,
+                        "updatedAt": datetime.utcnow(),
+                        "lockedUntil": datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+                    },
+                    "$inc": {
+                        "processed": len(outcomes),
+                        "regenerated": outcomes.count("regenerated"),
+                        "skipped": outcomes.count("skipped"),
+                        "queued": outcomes.count("queued"),
+                        "failed": outcomes.count("failed")
+                    }
+                },
+                return_document=ReturnDocument.AFTER
+            )
+            if checkpoint is None:
+                # Lease lost to another process - it carries on from its own checkpoint
+                status = "locked"
+                break
+            logger.info(
+                f"Season refresh {run_id}: {checkpoint['processed']} processed, "
+                f"{checkpoint['failed']} failed, at petId {last_pet_id}"
+            )
+
+        update: Dict[str, Any] = {"$unset": {"owner": "", "lockedUntil": ""}}
+        if status == "completed":
+            update["$set"] = {"completedAt": datetime.utcnow()}
+        checkpoint = await self.collection.find_one_and_update(
+            {"_id": run_id, "owner": self._owner},
+            update,
+            return_document=ReturnDocument.AFTER
+        ) or checkpoint
+
+        self._last_run = self._progress(checkpoint, status)
+        return self._last_run
+
+    async def _claim(self, run_id: str, season: str) -> Optional[Dict[str, Any]]:
+        """Create or lock the season's checkpoint for this process"""
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"_id": run_id},
+            {"$setOnInsert": {
+                "season": season,
+                "lastPetId": "",
+                "processed": 0,
+                "regenerated": 0,
+                "skipped": 0,
+                "queued": 0,
+                "failed": 0,
+                "startedAt": now
+            }},
+            upsert=True
+        )
+        checkpoint = await self.collection.find_one({"_id": run_id})
+        if checkpoint.get("completedAt"):
+            return checkpoint
+        return await self.collection.find_one_and_update(
+            {
+                "_id": run_id,
+                "$or": [
+                    {"owner": {"$exists": False}},
+                    {"owner": self._owner},
+                    {"lockedUntil": {"$lt": now}}
+                ]
+            },
+            {"$set": {
+                "owner": self._owner,
+                "lockedUntil": now + timedelta(seconds=self.lease_seconds)
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _renew_lease(self, run_id: str) -> None:
+        """Extend this process's lock on a run until cancelled"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.collection.update_one(
+                    {"_id": run_id, "owner": self._owner},
+                    {"$set": {"lockedUntil": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+                )
+            except Exception as e:
+                logger.warning(f"Season refresh lease renewal failed: {e}")
+
+    async def _refresh_pet(self, db, pet_id: str, semaphore: asyncio.Semaphore) -> str:
+        """
+        Regenerate one pet's summary through the job queue
+
+        If the pet already has a summary job queued or running (e.g. its
+        owner just asked for one), that job is waited for instead.
+
+        Returns:
+            "regenerated", "skipped" (already current, or pet/owner gone),
+            "queued" (job still running after job_wait_seconds) or "failed"
+        """
+        async with semaphore:
+            await self._pace()
+            try:
+                pet = await db.pets.find_one({"_id": ObjectId(pet_id)}, {"userId": 1})
+                if not pet or not await db.users.find_one({"_id": ObjectId(pet["userId"])}, {"_id": 1}):
+                    return "skipped"
+
+                job = await job_queue.enqueue(
+                    PET_SUMMARY_JOB,
+                    {"petId": pet_id, "userId": pet["userId"], "forceRefresh": False},
+                    dedupe_key=pet_summary_job_key(pet_id)
+                )
+                job = await job_queue.wait(job["_id"], self.job_wait_seconds)
+            except Exception as e:
+                logger.warning(f"Season refresh failed for pet {pet_id}: {type(e).__name__}: {e}")
+                return "failed"
+
+            if job and job["status"] == SUCCEEDED:
+                return "skipped" if job["result"].get("cached") else "regenerated"
+            if not job or job["status"] == FAILED:
+                logger.warning(f"Season refresh failed for pet {pet_id}: {job.get('lastError') if job else 'job not found'}")
+                return "failed"
+            return "queued"
+
+    async def _pace(self) -> None:
+        """Space summary starts to stay under max_per_minute"""
+        if self.max_per_minute <= 0:
+            return
+        async with self._pace_lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_start - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = max(loop.time(), self._next_start) + 60 / self.max_per_minute
+
+    def start(self) -> None:
+        """Start the in-app scheduler, which runs during each off-peak window"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._scheduler())
+
+    async def stop(self) -> None:
+        """Stop the in-app scheduler (an interrupted run resumes from its checkpoint)"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _scheduler(self) -> None:
+        while True:
+            if self.in_window():
+                try:
+                    await self.run()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Season summary refresh failed: {e}")
+            await asyncio.sleep(self.check_interval_seconds)
+
+    @staticmethod
+    def _progress(checkpoint: Dict[str, Any], status: str) -> Dict[str, Any]:
+        return {
+            "runId": checkpoint["_id"],
+            "season": checkpoint.get("season"),
+            "status": status,
+            "processed": checkpoint.get("processed", 0),
+            "regenerated": checkpoint.get("regenerated", 0),
+            "skipped": checkpoint.get("skipped", 0),
+            "queued": checkpoint.get("queued", 0),
+            "failed": checkpoint.get("failed", 0),
+            "lastPetId": checkpoint.get("lastPetId")
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduler state and the outcome of this process's last run"""
+        return {
+            "scheduled": self._task is not None,
+            "window": f"{self.window_start_hour:02d}:00-{self.window_end_hour:02d}:00",
+            "concurrency": self.concurrency,
+            "maxPerMinute": self.max_per_minute,
+            "lastRun": self._last_run
+        }
+
+
+# Global season refresher instance
+season_refresher = SeasonSummaryRefresher(
+    concurrency=settings.season_refresh_concurrency,
+    max_per_minute=settings.season_refresh_max_per_minute,
+    window_start_hour=settings.season_refresh_window_start_hour,
+    window_end_hour=settings.season_refresh_window_end_hour
+)
@@ -0,0 +1,187 @@
+"""
+Persistent stale-while-revalidate cache for AI-generated vet directory lookups
+"""
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Set
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import re
+
+from app.database import get_database
+from app.services.index_registry import index_registry
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_location_key(value: str) -> str:
+    """Normalize a pin code or city name for use in cache keys"""
+    return re.sub(r"\s+", " ", value.strip()).casefold()
+
+
+class VetDirectoryCache:
+    """
+    MongoDB-backed cache of clinic lists keyed by pin code/city and limit
+
+    Entries are fresh for ``fresh_seconds``. After that they are stale: the
+    stale list is returned immediately and a background task refreshes it.
+    Entries older than ``max_age_seconds`` are removed by a TTL index, after
+    which the next request fetches synchronously again.
+    """
+
+    def __init__(
+        self,
+        fresh_seconds: int,
+        max_age_seconds: int,
+        collection_name: str = "vet_directory_cache"
+    ):
+        """
+        Args:
+            fresh_seconds: How long an entry is served without revalidation
+            max_age_seconds: How long an entry may be served at all
+            collection_name: Collection holding the cached lists
+        """
+        self.fresh_seconds = fresh_seconds
+        self.max_age_seconds = max_age_seconds
+        self.collection_name = collection_name
+        # TTL index that drops entries past their maximum age
+        index_registry.declare(collection_name, "expiresAt", expireAfterSeconds=0)
+        self._refreshing: Set[str] = set()
+        self._background_tasks: Set["asyncio.Task[None]"] = set()
+        self._counters = {
+            "freshHits": 0,
+            "staleHits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refreshFailures": 0
+        }
+
+    @staticmethod
+    def build_id(kind: str, location: str, limit: int) -> str:
+        """Build the document ID for a lookup, e.g. 'city:mumbai:10'"""
+        return f"{kind}:{normalize_location_key(location)}:{limit}"
+
+    async def get_or_fetch(
+        self,
+        kind: str,
+        location: str,
+        limit: int,
+        fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Return a cached clinic list, fetching or revalidating as needed
+
+        Args:
+            kind: Lookup type ("pincode" or "city")
+            location: Pin code or city name as supplied by the caller
+            limit: Number of clinics requested
+            fetch: Coroutine function producing a fresh clinic list
+
+        Returns:
+            List of clinic dicts
+
+        Raises:
+            Exception: Whatever ``fetch`` raises on a cache miss
+        """
+        cache_id = self.build_id(kind, location, limit)
+
+        try:
+            doc = await get_database()[self.collection_name].find_one({"_id": cache_id})
+        except Exception as e:
+            logger.warning(f"Vet directory cache lookup failed: {e}")
+            doc = None
+
+        now = datetime.utcnow()
+        if doc and doc.get("expiresAt", now) > now:
+            if doc["staleAt"] > now:
+                self._counters["freshHits"] += 1
+            else:
+                self._counters["staleHits"] += 1
+                self._schedule_refresh(cache_id, kind, location, limit, fetch)
+            return doc["clinics"]
+
+        self._counters["misses"] += 1
+        clinics = await fetch()
+        await self._store(cache_id, kind, location, limit, clinics)
+        return clinics
+
+    async def purge(self, kind: Optional[str] = None, location: Optional[str] = None) -> int:
+        """
+        Delete cached entries
+
+        Args:
+            kind: Restrict to "pincode" or "city" entries (optional)
+            location: Restrict to one pin code/city, any limit (requires kind)
+
+        Returns:
+            Number of entries deleted
+        """
+        query: Dict[str, Any] = {}
+        if kind:
+            query["kind"] = kind
+        if kind and location:
+            query["location"] = normalize_location_key(location)
+        result = await get_database()[self.collection_name].delete_many(query)
+        return result.deleted_count
+
+    def _schedule_refresh(
+        self,
+        cache_id: str,
+        kind: str,
+        location: str,
+        limit: int,
+        fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> None:
+        """Start a background revalidation unless one is already running for this entry"""
+        if cache_id in self._refreshing:
+            return
+        self._refreshing.add(cache_id)
+
+        async def _refresh() -> None:
+            try:
+                clinics = await fetch()
+                await self._store(cache_id, kind, location, limit, clinics)
+                self._counters["refreshes"] += 1
+            except Exception as e:
+                self._counters["refreshFailures"] += 1
+                logger.warning(f"Background refresh of {cache_id} failed, keeping stale entry: {e}")
+            finally:
+                self._refreshing.discard(cache_id)
+
+        task = asyncio.create_task(_refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _store(
+        self,
+        cache_id: str,
+        kind: str,
+        location: str,
+        limit: int,
+        clinics: List[Dict[str, Any]]
+    ) -> None:
+        """Upsert a freshly fetched clinic list"""
+        now = datetime.utcnow()
+        try:
+            await get_database()[self.collection_name].update_one(
+                {"_id": cache_id},
+                {"$set": {
+                    "kind": kind,
+                    "location": normalize_location_key(location),
+                    "limit": limit,
+                    "clinics": clinics,
+                    "fetchedAt": now,
+                    "staleAt": now + timedelta(seconds=self.fresh_seconds),
+                    "expiresAt": now + timedelta(seconds=self.max_age_seconds)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Vet directory cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache counters"""
+        return {
+            **self._counters,
+            "refreshing": len(self._refreshing)
+        }
@@ -0,0 +1,181 @@
+"""
+Circuit breaker with a rolling error window and a latency-derived timeout
+"""
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+import math
+import time
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for calls to a flaky upstream
+
+    While closed, every call outcome is recorded in a rolling time window.
+    Once the window holds at least ``min_calls`` outcomes and the error rate
+    reaches ``error_threshold`` the breaker opens and rejects calls for
+    ``open_seconds``. It then goes half-open and lets ``half_open_max_calls``
+    probe calls through: a successful probe closes it again, a failed one
+    re-opens it.
+
+    Latencies of successful calls feed an adaptive timeout of
+    ``timeout_multiplier`` x p95, clamped to [min_timeout, max_timeout], so
+    callers stop waiting long before the hard limit when the upstream is
+    usually fast.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        min_calls: int,
+        error_threshold: float,
+        open_seconds: float,
+        half_open_max_calls: int,
+        min_timeout: float,
+        max_timeout: float,
+        timeout_multiplier: float = 2.0,
+        latency_samples: int = 200
+    ):
+        """
+        Args:
+            window_seconds: Length of the rolling outcome window
+            min_calls: Outcomes required in the window before the breaker may open
+            error_threshold: Error rate (0-1) that opens the breaker
+            open_seconds: How long the breaker stays open before probing
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+            min_timeout: Lower bound of the adaptive timeout
+            max_timeout: Upper bound of the adaptive timeout, used until enough samples exist
+            timeout_multiplier: Factor applied to the observed p95 latency
+            latency_samples: Number of recent successful latencies kept
+        """
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_multiplier = timeout_multiplier
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._latencies: Deque[float] = deque(maxlen=latency_samples)
+        self._counters = {
+            "opened": 0,
+            "rejected": 0,
+            "successes": 0,
+            "failures": 0
+        }
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the cool-down has passed"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._half_open_in_flight = 0
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected outright"""
+        return self.state == OPEN
+
+    def before_call(self) -> None:
+        """
+        Admit a call or reject it
+
+        Every admitted call must be followed by record_success, record_failure
+        or record_cancelled.
+
+        Raises:
+            CircuitOpenError: If the breaker is open or its probe slots are taken
+        """
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self._half_open_in_flight >= self.half_open_max_calls):
+            self._counters["rejected"] += 1
+            raise CircuitOpenError("AI upstream circuit is open")
+        if state == HALF_OPEN:
+            self._half_open_in_flight += 1
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        """
+        Record a successful call
+
+        Args:
+            latency: Call duration in seconds, if it should inform the adaptive timeout
+        """
+        self._counters["successes"] += 1
+        if latency is not None:
+            self._latencies.append(latency)
+        if self._state == HALF_OPEN:
+            self._state = CLOSED
+            self._half_open_in_flight = 0
+            self._outcomes.clear()
+            return
+        self._record(True)
+
+    def record_failure(self) -> None:
+        """Record a failed or timed-out call"""
+        self._counters["failures"] += 1
+        if self._state == HALF_OPEN:
+            self._open()
+            return
+        self._record(False)
+        if self._state == CLOSED:
+            total = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if total >= self.min_calls and failures / total >= self.error_threshold:
+                self._open()
+
+    def record_cancelled(self) -> None:
+        """Release the probe slot of a call its caller abandoned, without recording an outcome"""
+        if self._state == HALF_OPEN and self._half_open_in_flight > 0:
+            self._half_open_in_flight -= 1
+
+    def current_timeout(self) -> float:
+        """Adaptive timeout in seconds derived from recent p95 latency"""
+        if len(self._latencies) < 20:
+            return self.max_timeout
+        ordered = sorted(self._latencies)
+        p95 = ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+        return min(self.max_timeout, max(self.min_timeout, p95 * self.timeout_multiplier))
+
+    def _record(self, ok: bool) -> None:
+        """Append an outcome and drop those older than the window"""
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self) -> None:
+        """Trip the breaker"""
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_in_flight = 0
+        self._outcomes.clear()
+        self._counters["opened"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of breaker state and counters"""
+        state = self.state
+        total = len(self._outcomes)
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        return {
+            "state": state,
+            "windowCalls": total,
+            "windowErrorRate": round(failures / total, 4) if total else 0.0,
+            "timeoutSeconds": round(self.current_timeout(), 3),
+            "retryInSeconds": round(max(self.open_seconds - (time.monotonic() - self._opened_at), 0), 1) if state == OPEN else 0,
+            **self._counters
+        }
@@ -1,11 +1,13 @@
 """
 FastAPI dependencies for authentication and authorization
 """
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 from bson import ObjectId
+import secrets
 
+from app.config import settings
 from app.utils.security import decode_access_token
 from app.database import get_database
 from app.models.user import UserInDB
@@ -79,4 +81,31 @@ async def get_current_user_optional(
     try:
         return await get_current_user(credentials)
     except HTTPException:
-        return None
\ No newline at end of file
+        return None
+
+
+async def require_admin(
+    x_admin_key: Optional[str] = Header(None, alias="X-Admin-Key")
+) -> None:
+    """
+    Require the configured admin API key
+    
+    Admin endpoints are disabled entirely unless ADMIN_API_KEY is set.
+    
+    Args:
+        x_admin_key: Value of the X-Admin-Key request header
+    
+    Raises:
+        HTTPException: If admin access is disabled or the key does not match
+    """
+    if not settings.admin_api_key:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled"
+        )
+    
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.admin_api_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key"
+        )
@@ -0,0 +1,165 @@
+"""
+Compiled keyword matcher with synonyms and negation handling
+"""
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+import re
+
+
+class KeywordMatch(NamedTuple):
+    """One keyword occurrence found in a text"""
+    category: str
+    keyword: str
+    phrase: str
+    position: int  # Character offset of the phrase in the lowercased text
+    negated: bool
+
+
+# Words (keeping apostrophes, so "can't" is one token) and clause-ending punctuation
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[.;:!?,\n]")
+
+# Punctuation and contrast words end the scope of a negation
+_CLAUSE_BOUNDARIES = frozenset([".", ";", ":", "!", "?", ",", "\n", "but", "however", "although", "though", "except"])
+
+# A negated match followed only by one of these negates the next match too ("no vomiting or diarrhea")
+_NEGATION_CONJUNCTIONS = frozenset(["or", "nor"])
+
+# Between the words of a phrase: anything that is neither part of a word nor ends a clause
+_PHRASE_GAP = r"[^a-z0-9'.;:!?,\n]+"
+
+
+def _trie_pattern(phrases: Iterable[Tuple[str, ...]]) -> str:
+    """
+    Regex source matching any of the phrases, factored into a character trie
+
+    A flat alternation makes the regex engine try every phrase at every
+    position; the trie shares prefixes, so each position costs one branch
+    per character. Optional tails are greedy, so the longest phrase wins.
+    """
+    trie: Dict[str, dict] = {}
+    for words in phrases:
+        node = trie
+        for char in " ".join(words):
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [
+            (_PHRASE_GAP if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Match a table of keyword phrases against free text in a single pass
+
+    All phrases are compiled into one trie-shaped regex, so a text is
+    scanned once, longest phrase first. Matching is on whole words, so
+    "blood" does not fire inside "bloodhound", and each word is consumed by
+    at most one phrase, so "vomiting blood" wins over "vomiting". A match is
+    marked negated when one of the ``negation_window`` words before it,
+    within the same clause and after the previous match, is a negation cue
+    or ends in "n't". Words of an earlier phrase never negate a later one,
+    so "not eating and vomiting blood" still reports blood; a negation only
+    carries over "or"/"nor" directly after a negated match.
+    """
+
+    def __init__(
+        self,
+        table: Dict[str, Dict[str, List[str]]],
+        negation_cues: Iterable[str],
+        negation_window: int = 3
+    ):
+        """
+        Args:
+            table: Category -> canonical keyword -> list of phrases/synonyms
+            negation_cues: Words that negate a following keyword
+            negation_window: Number of preceding words searched for a cue
+
+        Raises:
+            ValueError: If a phrase is listed under two different keywords
+        """
+        self.negation_cues = frozenset(cue.lower() for cue in negation_cues)
+        self.negation_window = negation_window
+
+        lookup: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+        for category, keywords in table.items():
+            for keyword, phrases in keywords.items():
+                for phrase in phrases:
+                    words = tuple(_TOKEN.findall(phrase.lower()))
+                    if lookup.get(words, (category, keyword)) != (category, keyword):
+                        raise ValueError(f"Phrase '{phrase}' is listed under more than one keyword")
+                    lookup[words] = (category, keyword)
+
+        # Keyed by the phrase as written with single spaces, the usual form in a text
+        self._by_text = {" ".join(words): (category, keyword, " ".join(words)) for words, (category, keyword) in lookup.items()}
+        self._lookup = lookup
+
+        self._pattern = re.compile(
+            r"(?<![a-z0-9'])(?:" + _trie_pattern(lookup) + r")(?![a-z0-9])(?!'[a-z])"
+        )
+
+    def _scan(self, text: str) -> List[Tuple[str, str, str, int, bool]]:
+        """(category, keyword, phrase, position, negated) for each occurrence"""
+        text = text.lower().replace("’", "'")
+        by_text = self._by_text
+
+        occurrences = []
+        previous_end = 0
+        previous_negated = False
+        for found in self._pattern.finditer(text):
+            entry = by_text.get(found.group())
+            if entry is None:
+                # Words separated by something other than one space
+                words = tuple(_TOKEN.findall(found.group()))
+                entry = (*self._lookup[words], " ".join(words))
+            start = found.start()
+            # Only the words since the previous match can negate this one
+            between = _TOKEN.findall(text, previous_end, start)
+            negated = self._is_negated(between) or (
+                previous_negated and len(between) == 1 and between[0] in _NEGATION_CONJUNCTIONS
+            )
+            occurrences.append((entry[0], entry[1], entry[2], start, negated))
+            previous_end = found.end()
+            previous_negated = negated
+        return occurrences
+
+    def find(self, text: str) -> List[KeywordMatch]:
+        """
+        Find every keyword occurrence in a text
+
+        Args:
+            text: Free text to scan
+
+        Returns:
+            Matches in order of appearance, including negated ones
+        """
+        return [KeywordMatch(*match) for match in self._scan(text)]
+
+    def categories(self, text: str) -> Set[str]:
+        """
+        Categories with at least one non-negated match
+
+        Args:
+            text: Free text to scan
+
+        Returns:
+            Set of category names
+        """
+        return {category for category, _, _, _, negated in self._scan(text) if not negated}
+
+
+    def _is_negated(self, preceding: List[str]) -> bool:
+        """Check the last words before a match for a negation cue in the same clause"""
+        for word in reversed(preceding[-self.negation_window:]):
+            if word in _CLAUSE_BOUNDARIES:
+                return False
+            if word in self.negation_cues or word.endswith("n't"):
+                return True
+        return False
@@ -0,0 +1,107 @@
+"""
+Keyset pagination over (timestamp, _id), newest first
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+import base64
+import binascii
+
+
+# Sort order the cursors assume: newest first, _id breaking timestamp ties
+KEYSET_SORT = [("timestamp", -1), ("_id", -1)]
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """
+    Opaque cursor pointing just past a document
+
+    Args:
+        doc: Last document of a page (needs ``timestamp`` and ``_id``)
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = f"{doc['timestamp'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """
+    Read a cursor made by encode_cursor
+
+    Returns:
+        (timestamp, _id) of the last document already returned
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        timestamp, object_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), ObjectId(object_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, InvalidId) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_query(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    Restrict a query to documents after a cursor in KEYSET_SORT order
+
+    The timestamp bound lets the index range start at the cursor; the $or
+    then only has to skip documents sharing the cursor's timestamp.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not cursor:
+        return query
+    timestamp, object_id = decode_cursor(cursor)
+    return {
+        **query,
+        "timestamp": {"$lte": timestamp},
+        "$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": object_id}}
+        ]
+    }
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    projection: Dict[str, Any],
+    limit: Optional[int],
+    cursor: Optional[str]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page of documents, newest first
+
+    One extra document is read to tell whether another page exists.
+
+    Args:
+        collection: Motor collection
+        query: Filter; must not use a top-level $or
+        projection: Fields to return (timestamp and _id are always included)
+        limit: Page size, or None for all remaining documents
+        cursor: Cursor from the previous page (optional)
+
+    Returns:
+        (documents, cursor of the next page or None)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    find = collection.find(keyset_query(query, cursor), projection).sort(KEYSET_SORT)
+    if limit is None:
+        return await find.to_list(length=None), None
+
+    docs = await find.limit(limit + 1).to_list(length=limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1])
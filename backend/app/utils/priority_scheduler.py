@@ -0,0 +1,145 @@
+"""
+Priority lanes with reserved concurrency for a shared pool of slots
+"""
+from collections import deque
+from typing import Any, Deque, Dict
+import asyncio
+import time
+
+
+EMERGENCY = "emergency"
+NORMAL = "normal"
+BACKGROUND = "background"
+
+# Lanes in the order waiting work is admitted
+LANES = (EMERGENCY, NORMAL, BACKGROUND)
+
+
+class PriorityScheduler:
+    """
+    Admission control for a fixed number of concurrent slots
+
+    Waiting work is admitted strictly by lane priority and FIFO within a
+    lane. ``emergency_reserved`` slots can only be used by the emergency
+    lane, so an emergency never waits behind a full pool of routine work,
+    and the background lane is additionally capped at ``background_limit``
+    slots so batch work cannot crowd out interactive requests.
+    """
+
+    def __init__(self, total_slots: int, emergency_reserved: int, background_limit: int):
+        """
+        Args:
+            total_slots: Maximum concurrent slots across all lanes
+            emergency_reserved: Slots only the emergency lane may use
+            background_limit: Maximum slots the background lane may use
+        """
+        if not 0 <= emergency_reserved < total_slots:
+            raise ValueError("emergency_reserved must be at least 0 and less than total_slots")
+        self.total_slots = total_slots
+        self.emergency_reserved = emergency_reserved
+        self.background_limit = max(1, min(background_limit, total_slots - emergency_reserved))
+
+        self._queues: Dict[str, Deque["asyncio.Future[None]"]] = {lane: deque() for lane in LANES}
+        self._running: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._stats: Dict[str, Dict[str, float]] = {
+            lane: {"admitted": 0, "waitSecondsTotal": 0.0, "waitSecondsMax": 0.0}
+            for lane in LANES
+        }
+
+    async def acquire(self, lane: str) -> None:
+        """
+        Wait for a slot in a lane
+
+        Cancelling the wait (e.g. through asyncio.wait_for) leaves no slot held.
+
+        Args:
+            lane: One of LANES
+        """
+        if lane not in self._queues:
+            raise ValueError(f"Unknown lane: {lane}")
+
+        started = time.monotonic()
+        if not self._has_waiters_at_or_above(lane) and self._can_start(lane):
+            self._start(lane, started)
+            return
+
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._queues[lane].append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as the waiter gave up - hand it on
+                self.release(lane)
+            else:
+                self._queues[lane].remove(future)
+            raise
+        self._record_wait(lane, started)
+
+    def release(self, lane: str) -> None:
+        """Give back a slot and admit waiting work in priority order"""
+        self._running[lane] -= 1
+        self._dispatch()
+
+    def _has_waiters_at_or_above(self, lane: str) -> bool:
+        for other in LANES:
+            if self._queues[other]:
+                return True
+            if other == lane:
+                return False
+        return False
+
+    def _can_start(self, lane: str) -> bool:
+        running = sum(self._running.values())
+        if running >= self.total_slots:
+            return False
+        if lane == EMERGENCY:
+            return True
+        routine = self._running[NORMAL] + self._running[BACKGROUND]
+        if routine >= self.total_slots - self.emergency_reserved:
+            return False
+        if lane == BACKGROUND:
+            return self._running[BACKGROUND] < self.background_limit
+        return True
+
+    def _start(self, lane: str, started: float) -> None:
+        self._running[lane] += 1
+        self._record_wait(lane, started)
+
+    def _record_wait(self, lane: str, started: float) -> None:
+        waited = time.monotonic() - started
+        stats = self._stats[lane]
+        stats["admitted"] += 1
+        stats["waitSecondsTotal"] += waited
+        stats["waitSecondsMax"] = max(stats["waitSecondsMax"], waited)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to the highest-priority waiters that are allowed to run"""
+        for lane in LANES:
+            queue = self._queues[lane]
+            while queue and self._can_start(lane):
+                future = queue.popleft()
+                if future.done():
+                    continue
+                self._running[lane] += 1
+                future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-lane running work, queue depth and wait times"""
+        lanes = {}
+        for lane in LANES:
+            stats = self._stats[lane]
+            admitted = stats["admitted"]
+            lanes[lane] = {
+                "running": self._running[lane],
+                "queued": sum(1 for future in self._queues[lane] if not future.done()),
+                "admitted": int(admitted),
+                "avgWaitSeconds": round(stats["waitSecondsTotal"] / admitted, 4) if admitted else 0.0,
+                "maxWaitSeconds": round(stats["waitSecondsMax"], 4)
+            }
+        return {
+            "totalSlots": self.total_slots,
+            "emergencyReserved": self.emergency_reserved,
+            "backgroundLimit": self.background_limit,
+            "lanes": lanes
+        }
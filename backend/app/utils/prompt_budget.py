@@ -0,0 +1,144 @@
+"""
+Per-endpoint prompt size accounting and budgets
+"""
+from typing import Any, Callable, Dict, Optional
+from collections import defaultdict
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_text_chars(contents: Any) -> int:
+    """Characters of text in a prompt string or content list (media parts are not counted)"""
+    if isinstance(contents, str):
+        return len(contents)
+    return sum(len(part) for part in contents if isinstance(part, str))
+
+
+class PromptAccountant:
+    """
+    Measures prompt sizes per endpoint and keeps dynamic prompt parts within budget
+
+    Sizes are tracked in characters; tokens are estimated at
+    ``chars_per_token`` characters each, which is close enough for English
+    prompts to compare endpoints and spot regressions. Budgets apply to the
+    dynamic part of a prompt only - the static system instruction is the
+    same on every call.
+    """
+
+    def __init__(self, budgets: Dict[str, int], chars_per_token: float = 4.0):
+        """
+        Args:
+            budgets: Endpoint name -> maximum dynamic prompt characters (0 disables)
+            chars_per_token: Characters per token for estimates
+        """
+        self.budgets = budgets
+        self.chars_per_token = chars_per_token
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {
+            "calls": 0,
+            "systemChars": 0,
+            "dynamicChars": 0,
+            "maxDynamicChars": 0,
+            "overBudget": 0,
+            "truncatedCalls": 0,
+            "truncatedItems": 0
+        })
+
+    def fit(self, endpoint: str, render: Callable[[int], str], items: int) -> str:
+        """
+        Render a prompt with as much history as the endpoint's budget allows
+
+        Args:
+            endpoint: Endpoint name
+            render: Builds the prompt from the first n history items; items
+                must be ordered most important first, so the oldest (or least
+                relevant) are dropped first
+            items: Number of history items available
+
+        Returns:
+            The rendered prompt
+        """
+        budget = self.budgets.get(endpoint)
+        kept = items
+        text = render(kept)
+        while budget and len(text) > budget and kept > 0:
+            kept -= 1
+            text = render(kept)
+
+        if kept < items:
+            stats = self._stats[endpoint]
+            stats["truncatedCalls"] += 1
+            stats["truncatedItems"] += items - kept
+            logger.info(f"Prompt for {endpoint} dropped {items - kept} of {items} history item(s) to fit {budget} chars")
+        return text
+
+    def fit_tail(self, endpoint: str, text: str, reserved_chars: int = 0) -> str:
+        """
+        Trim free-form history to the endpoint's budget, keeping the most recent end
+
+        Args:
+            endpoint: Endpoint name
+            text: History text, oldest first
+            reserved_chars: Budget already used by the rest of the prompt
+
+        Returns:
+            The text, with its oldest part cut if needed
+        """
+        budget = self.budgets.get(endpoint)
+        if not budget:
+            return text
+        allowed = max(budget - reserved_chars, 0)
+        if len(text) <= allowed:
+            return text
+
+        stats = self._stats[endpoint]
+        stats["truncatedCalls"] += 1
+        trimmed = text[len(text) - allowed:]
+        # Start at a line boundary when one is close, so the model doesn't see half a message
+        newline = trimmed.find("\n")
+        if 0 <= newline < 200:
+            trimmed = trimmed[newline + 1:]
+        logger.info(f"Prompt for {endpoint} dropped the oldest {len(text) - len(trimmed)} history chars")
+        return "[Earlier conversation omitted]\n" + trimmed
+
+    def record(self, endpoint: str, system_instruction: Optional[str], contents: Any) -> None:
+        """
+        Count one model call's prompt size
+
+        Args:
+            endpoint: Endpoint name
+            system_instruction: Static instruction sent with the call (optional)
+            contents: Prompt string or content list
+        """
+        system_chars = len(system_instruction or "")
+        dynamic_chars = prompt_text_chars(contents)
+        stats = self._stats[endpoint]
+        stats["calls"] += 1
+        stats["systemChars"] += system_chars
+        stats["dynamicChars"] += dynamic_chars
+        stats["maxDynamicChars"] = max(stats["maxDynamicChars"], dynamic_chars)
+
+        budget = self.budgets.get(endpoint)
+        if budget and dynamic_chars > budget:
+            stats["overBudget"] += 1
+        logger.info(
+            f"Prompt {endpoint}: {system_chars} system + {dynamic_chars} dynamic chars "
+            f"(~{round((system_chars + dynamic_chars) / self.chars_per_token)} tokens)"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-endpoint prompt sizes, estimated tokens and truncation counts"""
+        endpoints = {}
+        for endpoint, stats in sorted(self._stats.items()):
+            calls = stats["calls"]
+            avg_system = stats["systemChars"] / calls if calls else 0.0
+            avg_dynamic = stats["dynamicChars"] / calls if calls else 0.0
+            endpoints[endpoint] = {
+                **stats,
+                "budgetChars": self.budgets.get(endpoint) or None,
+                "avgSystemChars": round(avg_system, 1),
+                "avgDynamicChars": round(avg_dynamic, 1),
+                "avgEstimatedTokens": round((avg_system + avg_dynamic) / self.chars_per_token, 1)
+            }
+        return {"charsPerToken": self.chars_per_token, "endpoints": endpoints}
@@ -0,0 +1,304 @@
+"""
+Per-client token-bucket rate limiting and AI concurrency quotas
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+from abc import ABC, abstractmethod
+from collections import defaultdict
+import math
+import time
+
+from fastapi import HTTPException, Request, status
+from jose import JWTError, jwt
+
+from app.config import settings
+
+
+# Relative cost of each rate-limited endpoint, in bucket tokens
+ENDPOINT_COSTS: Dict[str, float] = {
+    "symptom_check": 3.0,
+    "symptom_followup": 1.0,
+    "pet_summary": 2.0,
+    "vet_lookup": 1.0,
+    "vet_question": 1.0
+}
+
+
+class RateLimitStore(ABC):
+    """
+    Storage for token buckets and concurrency counters
+
+    The in-memory store keeps counters per worker process. A shared store
+    (e.g. Redis or MongoDB) can implement the same methods so several
+    workers enforce one limit.
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, cost: float, capacity: float, refill_per_second: float) -> float:
+        """
+        Take ``cost`` tokens from the bucket for ``key`` if it has enough
+
+        Args:
+            key: Client identifier
+            cost: Tokens required
+            capacity: Bucket size (maximum burst)
+            refill_per_second: Token refill rate
+
+        Returns:
+            0 if the tokens were taken, otherwise seconds until they would be available
+        """
+
+    @abstractmethod
+    async def acquire(self, key: str, limit: int) -> bool:
+        """
+        Take one concurrency slot for ``key`` if fewer than ``limit`` are in use
+
+        Returns:
+            True if a slot was taken
+        """
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """Give back a concurrency slot taken with acquire()"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Store-specific counters merged into RateLimiter.stats()"""
+        return {}
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Token buckets and slot counters held in this process"""
+
+    def __init__(self, max_keys: int = 100000):
+        """
+        Args:
+            max_keys: Bucket count above which idle, fully refilled buckets are pruned
+        """
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._active: Dict[str, int] = defaultdict(int)
+
+    async def consume(self, key: str, cost: float, capacity: float, refill_per_second: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+
+        if tokens >= cost:
+            self._buckets[key] = (tokens - cost, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now, capacity, refill_per_second)
+            return 0.0
+
+        self._buckets[key] = (tokens, now)
+        if refill_per_second <= 0:
+            return math.inf
+        return (cost - tokens) / refill_per_second
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        if self._active[key] >= limit:
+            return False
+        self._active[key] += 1
+        return True
+
+    async def release(self, key: str) -> None:
+        self._active[key] -= 1
+        if self._active[key] <= 0:
+            del self._active[key]
+
+    def _prune(self, now: float, capacity: float, refill_per_second: float) -> None:
+        """Drop buckets that have refilled completely - they behave like new ones"""
+        full = [
+            key for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * refill_per_second >= capacity
+        ]
+        for key in full:
+            del self._buckets[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buckets": len(self._buckets),
+            "activeClients": len(self._active)
+        }
+
+
+class RateLimitLease:
+    """
+    A client's concurrency slot for one request
+
+    The slot is released when the request's dependencies are torn down.
+    Streaming endpoints call detach() and release the lease themselves once
+    the stream finishes, since teardown happens before streaming starts.
+    """
+
+    def __init__(self, limiter: "RateLimiter", key: str):
+        self._limiter = limiter
+        self.key = key
+        self._detached = False
+        self._released = False
+
+    @property
+    def detached(self) -> bool:
+        """True once the caller has taken over releasing the slot"""
+        return self._detached
+
+    def detach(self) -> "RateLimitLease":
+        """Take over responsibility for releasing the slot"""
+        self._detached = True
+        return self
+
+    async def release(self) -> None:
+        """Release the slot (idempotent)"""
+        if not self._released:
+            self._released = True
+            await self._limiter.store.release(self.key)
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter with per-endpoint costs and per-client AI concurrency
+
+    Every client gets one bucket of ``capacity`` tokens refilled at
+    ``refill_per_second``; each endpoint draws its cost from it, so a
+    client looping on any mix of AI endpoints is throttled to a fair share.
+    Independently, a client may have at most ``max_concurrent`` AI requests
+    in flight.
+    """
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        capacity: float,
+        refill_per_second: float,
+        max_concurrent: int,
+        costs: Optional[Dict[str, float]] = None,
+        enabled: bool = True
+    ):
+        """
+        Args:
+            store: Where buckets and slot counters are kept
+            capacity: Bucket size (maximum burst) in tokens
+            refill_per_second: Token refill rate
+            max_concurrent: AI requests a client may have in flight
+            costs: Endpoint name -> token cost (defaults to ENDPOINT_COSTS)
+            enabled: When False every request is allowed
+        """
+        self.store = store
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_concurrent = max_concurrent
+        self.costs = costs or ENDPOINT_COSTS
+        self.enabled = enabled
+        self._allowed: Dict[str, int] = defaultdict(int)
+        self._limited: Dict[str, int] = defaultdict(int)
+        self._concurrency_limited: Dict[str, int] = defaultdict(int)
+
+    async def check(self, key: str, endpoint: str) -> Optional[RateLimitLease]:
+        """
+        Charge a request to a client's bucket and take a concurrency slot
+
+        Args:
+            key: Client identifier
+            endpoint: Endpoint name from ``costs``
+
+        Returns:
+            The lease holding the concurrency slot, or None when disabled
+
+        Raises:
+            HTTPException: 429 with Retry-After when the client is over its limit
+        """
+        if not self.enabled:
+            return None
+
+        if not await self.store.acquire(key, self.max_concurrent):
+            self._concurrency_limited[endpoint] += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests in progress. Please wait for them to finish.",
+                headers={"Retry-After": "1"}
+            )
+
+        retry_after = await self.store.consume(
+            key, self.costs.get(endpoint, 1.0), self.capacity, self.refill_per_second
+        )
+        if retry_after > 0:
+            await self.store.release(key)
+            self._limited[endpoint] += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests. Please wait before trying again.",
+                headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 86400))))}
+            )
+
+        self._allowed[endpoint] += 1
+        return RateLimitLease(self, key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of allowed and rejected requests per endpoint"""
+        endpoints = set(self._allowed) | set(self._limited) | set(self._concurrency_limited)
+        return {
+            "enabled": self.enabled,
+            "capacity": self.capacity,
+            "refillPerSecond": self.refill_per_second,
+            "maxConcurrent": self.max_concurrent,
+            "endpoints": {
+                endpoint: {
+                    "allowed": self._allowed[endpoint],
+                    "rateLimited": self._limited[endpoint],
+                    "concurrencyLimited": self._concurrency_limited[endpoint]
+                }
+                for endpoint in sorted(endpoints)
+            },
+            **self.store.stats()
+        }
+
+
+def client_key(request: Request) -> str:
+    """
+    Identify the caller for rate limiting
+
+    Authenticated callers are keyed by the user ID in their access token
+    (the same ID get_current_user resolves), verified but without a database
+    lookup. Anonymous callers are keyed by client IP.
+    """
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except JWTError:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+rate_limiter = RateLimiter(
+    store=InMemoryRateLimitStore(),
+    capacity=settings.rate_limit_capacity,
+    refill_per_second=settings.rate_limit_refill_per_minute / 60,
+    max_concurrent=settings.ai_max_concurrent_per_client,
+    enabled=settings.rate_limit_enabled
+)
+
+
+def rate_limit(endpoint: str) -> Callable[..., Any]:
+    """
+    Build a dependency enforcing the rate limit for an endpoint
+
+    Usage:
+        @router.post("/x", dependencies=[Depends(rate_limit("symptom_followup"))])
+
+    Args:
+        endpoint: Endpoint name from ENDPOINT_COSTS
+
+    Returns:
+        FastAPI dependency yielding the request's RateLimitLease (or None when disabled)
+    """
+    async def dependency(request: Request):
+        lease = await rate_limiter.check(client_key(request), endpoint)
+        try:
+            yield lease
+        finally:
+            if lease is not None and not lease.detached:
+                await lease.release()
+
+    return dependency
@@ -0,0 +1,324 @@
+"""
+Retries with jittered backoff, hedged requests and a shared retry budget
+"""
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, NamedTuple, Optional, TypeVar
+import asyncio
+import logging
+import math
+import random
+import time
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: timeouts, rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Transient error classes, matched by name so SDK exceptions need no import here
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "InternalServerError",
+    "BadGateway",
+    "ServiceUnavailable",
+    "GatewayTimeout",
+    "DeadlineExceeded",
+    "FakeUpstreamError"
+}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Check whether an upstream error is transient
+
+    Timeouts, 429s and 5xx responses are retryable; bad requests, blocked
+    prompts and an open circuit breaker are not.
+    """
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    if any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in RETRYABLE_STATUS_CODES
+
+
+class RetryPolicy(NamedTuple):
+    """How one endpoint's calls are retried"""
+    max_attempts: int = 1  # Including the first attempt
+    hedge: bool = False  # Send a duplicate request once the first is slower than the endpoint's p95
+
+
+def parse_retry_policies(spec: str) -> Dict[str, RetryPolicy]:
+    """
+    Parse per-endpoint policies from a settings string
+
+    Args:
+        spec: Comma-separated ``endpoint:attempts[:hedge]`` entries,
+            e.g. "symptom_check:3:hedge,pet_summary:4"
+
+    Returns:
+        Dict of endpoint name -> RetryPolicy
+
+    Raises:
+        ValueError: If an entry is malformed
+    """
+    policies = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = [part.strip() for part in entry.split(":")]
+        if len(parts) < 2 or not parts[1].isdigit() or any(flag != "hedge" for flag in parts[2:]):
+            raise ValueError(f"Invalid retry policy '{entry}', expected endpoint:attempts[:hedge]")
+        policies[parts[0]] = RetryPolicy(max_attempts=max(int(parts[1]), 1), hedge="hedge" in parts[2:])
+    return policies
+
+
+class RetryBudget:
+    """
+    Caps retries and hedges at a fraction of first attempts
+
+    Every call deposits ``ratio`` tokens and every retry or hedge spends one,
+    with a trickle of ``min_per_second`` so a quiet service can still retry.
+    During an outage almost every call fails, the bucket drains, and extra
+    load on the upstream stays near ``ratio`` instead of multiplying by the
+    number of attempts.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, max_tokens: float = 10.0):
+        """
+        Args:
+            ratio: Tokens deposited per call (0.1 allows one retry per ten calls)
+            min_per_second: Tokens added per second regardless of traffic
+            max_tokens: Bucket size, bounding a burst of retries
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+
+    def record_call(self) -> None:
+        """Deposit for a new call"""
+        self._refill()
+        self._tokens = min(self._tokens + self.ratio, self.max_tokens)
+
+    def try_spend(self) -> bool:
+        """Take a token for a retry or hedge, if one is available"""
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._updated) * self.min_per_second, self.max_tokens)
+        self._updated = now
+
+
+class RetryingCaller:
+    """
+    Runs idempotent upstream calls under per-endpoint retry and hedging policies
+
+    A failed attempt with a retryable error is retried after a full-jitter
+    exponential backoff (uniform between 0 and ``base_delay`` x 2^n, capped
+    at ``max_delay``), as long as attempts remain, the next attempt would
+    start before ``deadline_seconds`` and the shared RetryBudget has a token.
+    For hedged endpoints a duplicate request is sent once the first has run
+    longer than the endpoint's observed p95 latency; whichever answers first
+    wins and the other is cancelled.
+    """
+
+    def __init__(
+        self,
+        policies: Dict[str, RetryPolicy],
+        default_policy: RetryPolicy,
+        budget: RetryBudget,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        deadline_seconds: float = 60.0,
+        hedge_min_delay: float = 1.0,
+        latency_samples: int = 200,
+        min_hedge_samples: int = 20
+    ):
+        """
+        Args:
+            policies: Endpoint name -> policy
+            default_policy: Policy for endpoints without one
+            budget: Budget shared by every endpoint
+            base_delay: Backoff ceiling before the first retry, doubling per attempt
+            max_delay: Largest backoff ceiling
+            deadline_seconds: No retry starts later than this after the call began
+            hedge_min_delay: Shortest wait before hedging, whatever the p95
+            latency_samples: Recent successful latencies kept per endpoint
+            min_hedge_samples: Samples needed before an endpoint is hedged
+        """
+        self.policies = policies
+        self.default_policy = default_policy
+        self.budget = budget
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline_seconds = deadline_seconds
+        self.hedge_min_delay = hedge_min_delay
+        self.min_hedge_samples = min_hedge_samples
+
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=latency_samples))
+        self._random = random.Random()
+        self._counters = {
+            "calls": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedgeWins": 0,
+            "budgetExhausted": 0,
+            "deadlineExceeded": 0,
+            "givenUp": 0
+        }
+
+    def policy(self, endpoint: str) -> RetryPolicy:
+        """Policy applied to an endpoint"""
+        return self.policies.get(endpoint, self.default_policy)
+
+    async def call(self, endpoint: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run an attempt function until it succeeds or the policy gives up
+
+        Args:
+            endpoint: Endpoint name selecting the policy
+            attempt: Makes one upstream call; must be safe to repeat
+
+        Returns:
+            The first successful result
+
+        Raises:
+            Exception: The last attempt's error
+        """
+        policy = self.policy(endpoint)
+        self.record_call()
+        started = time.monotonic()
+        attempt_number = 1
+        while True:
+            try:
+                hedge_delay = self.hedge_delay(endpoint) if policy.hedge else None
+                if hedge_delay is None:
+                    return await self._timed(endpoint, attempt)
+                return await self._hedged(endpoint, attempt, hedge_delay)
+            except Exception as e:
+                delay = self.retry_delay(endpoint, e, attempt_number, started)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt_number += 1
+
+    def record_call(self) -> None:
+        """Count a new call (for callers that drive retries themselves, like streams)"""
+        self._counters["calls"] += 1
+        self.budget.record_call()
+
+    def retry_delay(
+        self,
+        endpoint: str,
+        error: BaseException,
+        attempt_number: int,
+        started: float
+    ) -> Optional[float]:
+        """
+        Decide whether a failed attempt is retried
+
+        Args:
+            endpoint: Endpoint name selecting the policy
+            error: The attempt's error
+            attempt_number: Attempts made so far (1 after the first failure)
+            started: time.monotonic() when the call began
+
+        Returns:
+            Backoff in seconds before the next attempt, or None to give up
+        """
+        if not is_retryable(error):
+            return None
+        if attempt_number >= self.policy(endpoint).max_attempts:
+            self._counters["givenUp"] += 1
+            return None
+
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt_number - 1))
+        delay = self._random.uniform(0, ceiling)
+        if time.monotonic() + delay - started >= self.deadline_seconds:
+            self._counters["deadlineExceeded"] += 1
+            return None
+        if not self.budget.try_spend():
+            self._counters["budgetExhausted"] += 1
+            return None
+
+        self._counters["retries"] += 1
+        logger.info(
+            f"Retrying {endpoint} after {type(error).__name__} "
+            f"(attempt {attempt_number + 1}) in {delay:.2f}s"
+        )
+        return delay
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        """Observed p95 latency of an endpoint, or None until there are enough samples"""
+        samples = self._latencies[endpoint]
+        if len(samples) < self.min_hedge_samples:
+            return None
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+        return max(p95, self.hedge_min_delay)
+
+    async def _timed(self, endpoint: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Run one attempt, recording its latency if it succeeds"""
+        started = time.monotonic()
+        result = await attempt()
+        self._latencies[endpoint].append(time.monotonic() - started)
+        return result
+
+    async def _hedged(self, endpoint: str, attempt: Callable[[], Awaitable[T]], hedge_delay: float) -> T:
+        """Run an attempt, adding a duplicate if it outlives hedge_delay; the first success wins"""
+        primary = asyncio.ensure_future(self._timed(endpoint, attempt))
+        hedge: Optional["asyncio.Future[T]"] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+            if done or not self.budget.try_spend():
+                return await primary
+
+            self._counters["hedges"] += 1
+            hedge = asyncio.ensure_future(self._timed(endpoint, attempt))
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._counters["hedgeWins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retry and hedge counters, budget level and per-endpoint hedge delays"""
+        return {
+            **self._counters,
+            "budgetTokens": round(self.budget.tokens, 2),
+            "hedgeDelaySeconds": {
+                endpoint: round(delay, 3)
+                for endpoint in sorted(self._latencies)
+                if (delay := self.hedge_delay(endpoint)) is not None
+            },
+            "policies": {
+                endpoint: {"maxAttempts": policy.max_attempts, "hedge": policy.hedge}
+                for endpoint, policy in sorted(self.policies.items())
+            }
+        }
@@ -0,0 +1,34 @@
+"""
+Indian season helpers shared by routes and services
+"""
+from datetime import datetime
+from typing import Optional
+
+
+# Short descriptions used when prompting about each season
+SEASON_DESCRIPTIONS = {
+    "Summer": "hot and dry weather",
+    "Monsoon": "rainy season with high humidity",
+    "Winter": "cooler temperatures"
+}
+
+
+def get_season(now: Optional[datetime] = None) -> str:
+    """
+    Determine the current season in India from the month
+    
+    Summer: March to June, Monsoon: July to September, Winter: October to February
+    
+    Args:
+        now: Date to evaluate (defaults to the current local time)
+    
+    Returns:
+        str: "Summer", "Monsoon" or "Winter"
+    """
+    month = (now or datetime.now()).month
+    
+    if 3 <= month <= 6:
+        return "Summer"
+    elif 7 <= month <= 9:
+        return "Monsoon"
+    return "Winter"
@@ -0,0 +1,79 @@
+"""
+Single-flight coalescing of concurrent identical async calls
+"""
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into one execution
+
+    The first caller for a key starts the work as a background task; callers
+    arriving while it is still running await the same task instead of starting
+    their own. Once it finishes the key is released, so later calls run fresh.
+    Keys are tuples whose first element names the operation, which is used to
+    group the metrics.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Tuple[Hashable, ...], "asyncio.Task[Any]"] = {}
+        self._calls: Dict[str, int] = defaultdict(int)
+        self._executions: Dict[str, int] = defaultdict(int)
+        self._coalesced: Dict[str, int] = defaultdict(int)
+
+    async def do(self, key: Tuple[Hashable, ...], fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``fn`` unless an identical call is already in flight
+
+        The shared task is shielded, so one caller being cancelled (e.g. a
+        client disconnect) does not cancel the work for the other callers.
+
+        Args:
+            key: Tuple identifying the call; key[0] is the operation name
+            fn: Zero-argument coroutine function performing the work
+
+        Returns:
+            The result of the (possibly shared) execution
+        """
+        operation = str(key[0])
+        self._calls[operation] += 1
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self._executions[operation] += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+        else:
+            self._coalesced[operation] += 1
+
+        return await asyncio.shield(task)
+
+    def _release(self, key: Tuple[Hashable, ...], task: "asyncio.Task[Any]") -> None:
+        """Forget a finished task and mark its exception as retrieved"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of call, execution and coalescing counters per operation"""
+        operations = {
+            operation: {
+                "calls": self._calls[operation],
+                "executions": self._executions[operation],
+                "coalesced": self._coalesced[operation]
+            }
+            for operation in self._calls
+        }
+        return {
+            "inFlight": len(self._in_flight),
+            "calls": sum(self._calls.values()),
+            "coalesced": sum(self._coalesced.values()),
+            "operations": operations
+        }
@@ -0,0 +1,121 @@
+"""
+Micro-benchmark for the keyword triage fallback
+
+Compares the compiled KeywordMatcher against the substring scan it replaced,
+prints per-call timings and the cases where the old and new classifications
+disagree, and checks sentences whose risk level must not change (exit status 1
+if one does).
+
+Usage:
+    python benchmark_triage.py [iterations]
+"""
+import sys
+import timeit
+
+from app.data.triage_keywords import TRIAGE_KEYWORDS, NEGATION_CUES, NEGATION_WINDOW
+from app.utils.keyword_matcher import KeywordMatcher
+
+
+SAMPLES = [
+    "My bloodhound has been sneezing a little since this morning",
+    "No vomiting or diarrhea, just a bit tired after the walk",
+    "She collapsed in the garden and has pale gums",
+    "Vomiting for three days and won't eat anything",
+    "He is limping slightly on the back left leg",
+    "Occasional scratching behind the ears, no redness",
+    "Ate chocolate about an hour ago and is restless",
+    "Not breathing properly, gasping for air",
+    "Hasn't been vomiting but has loose stools for two weeks",
+    "Mild cough when excited, otherwise eating and drinking normally. " * 4,
+    "Not eating and vomiting blood since yesterday",
+    "No energy and collapsed in the kitchen",
+]
+
+# Regression checks: phrases that start with a negation cue ("not eating",
+# "no energy") must not negate the keyword that follows them
+EXPECTED_RISK = {
+    "Not eating and vomiting blood since yesterday": "emergency",
+    "No energy and collapsed in the kitchen": "emergency",
+    "No appetite and had two seizures today": "emergency",
+    "Hasn't eaten and is not breathing properly": "emergency",
+    "No urine since morning and bloody vomit": "emergency",
+    "No vomiting or diarrhea, just a bit tired after the walk": "low_risk",
+}
+
+LEGACY_EMERGENCY = [
+    'bleeding', 'blood', 'seizure', 'unconscious', 'collapse',
+    'difficulty breathing', 'choking', 'poisoning', 'toxic',
+    'severe pain', 'trauma', 'accident', 'hit by', 'broken bone',
+    'not breathing', 'unresponsive', 'convulsion', 'bloat',
+    'pale gums', 'blue gums', 'distended abdomen'
+]
+LEGACY_URGENT = [
+    'vomiting', 'diarrhea', 'not eating', 'lethargic', 'fever',
+    'limping', 'swelling', 'discharge', 'coughing', 'sneezing',
+    'scratching excessively', 'loss of appetite', 'dehydrated',
+    'painful', 'whining', 'restless', 'rapid breathing'
+]
+LEGACY_MONITOR = ['mild', 'slight', 'occasional', 'sometimes', 'minor', 'small', 'little', 'bit']
+LEGACY_PERSISTENT = ['days', 'week', 'weeks', 'persistent', 'continuous']
+
+
+def legacy_risk_level(symptoms: str) -> str:
+    """The substring scan used before the compiled matcher"""
+    symptoms_lower = symptoms.lower()
+    if any(keyword in symptoms_lower for keyword in LEGACY_EMERGENCY):
+        return "emergency"
+    if any(keyword in symptoms_lower for keyword in LEGACY_URGENT):
+        if any(word in symptoms_lower for word in LEGACY_PERSISTENT):
+            return "urgent"
+        return "monitor"
+    if any(keyword in symptoms_lower for keyword in LEGACY_MONITOR):
+        return "low_risk"
+    return "monitor"
+
+
+def compiled_risk_level(matcher: KeywordMatcher, symptoms: str) -> str:
+    """Same decision rules as AIService._determine_risk_level"""
+    found = matcher.categories(symptoms)
+    if "emergency" in found:
+        return "emergency"
+    if "urgent" in found:
+        return "urgent" if "persistent" in found else "monitor"
+    if "monitor" in found:
+        return "low_risk"
+    return "monitor"
+
+
+def main() -> int:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    matcher = KeywordMatcher(TRIAGE_KEYWORDS, NEGATION_CUES, NEGATION_WINDOW)
+
+    legacy = timeit.timeit(
+        lambda: [legacy_risk_level(s) for s in SAMPLES], number=iterations
+    )
+    compiled = timeit.timeit(
+        lambda: [compiled_risk_level(matcher, s) for s in SAMPLES], number=iterations
+    )
+    calls = iterations * len(SAMPLES)
+
+    print(f"Calls per implementation: {calls}")
+    print(f"Legacy substring scan: {legacy / calls * 1e6:8.2f} us/call")
+    print(f"Compiled matcher:      {compiled / calls * 1e6:8.2f} us/call ({compiled / legacy:.2f}x legacy)")
+    print()
+    print("Classification differences (legacy -> compiled):")
+    for sample in SAMPLES:
+        before, after = legacy_risk_level(sample), compiled_risk_level(matcher, sample)
+        if before != after:
+            print(f"  {before:>9} -> {after:<9} {sample[:70]}")
+    print()
+    failures = 0
+    for sample, expected in EXPECTED_RISK.items():
+        actual = compiled_risk_level(matcher, sample)
+        if actual != expected:
+            failures += 1
+            print(f"REGRESSION: expected {expected}, got {actual}: {sample}")
+    print(f"Regression checks: {len(EXPECTED_RISK) - failures}/{len(EXPECTED_RISK)} passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
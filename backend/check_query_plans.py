@@ -0,0 +1,355 @@
+"""
+Query-plan check for the hot MongoDB queries
+
+Seeds a scratch database with synthetic users, pets, symptom checks,
+summaries, providers and jobs, applies the declared indexes (see
+app/services/index_registry.py), then runs each hot query shape through
+``explain`` with execution stats. A query fails the check when its
+winning plan:
+
+- uses a COLLSCAN, or not the expected index
+- sorts in memory where the index should give the order
+- examines more than --max-ratio documents per document returned
+
+Keys and documents examined are printed for every query (and written with
+--json) so plan changes can be compared between runs. The scratch
+database is dropped afterwards unless --keep is given; it must differ
+from the app database.
+
+Usage:
+    python check_query_plans.py [--database NAME] [--scale N]
+        [--max-ratio X] [--json PATH] [--keep]
+
+Exits with status 1 if any query fails.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from bson import ObjectId
+
+from app.config import settings
+from app.database import connect_to_mongo, close_mongo_connection, get_database
+from app.routes.symptom_checks import LIST_PROJECTION
+from app.services.ai_service import ai_service
+from app.services.job_queue import job_queue, QUEUED, RUNNING
+from app.services.index_registry import index_registry
+from app.services.pet_summary import PET_SUMMARY_JOB, changed_checks_query
+from app.services.followup_session import FOLLOWUP_SUMMARY_JOB
+from app.services.season_refresh import season_refresher
+from app.utils.pagination import KEYSET_SORT, encode_cursor, keyset_query
+from app.utils.season import get_season
+
+
+CITIES = [
+    "Singapore", "Kuala Lumpur", "Penang", "Johor Bahru", "Ipoh", "Malacca",
+    "Kuching", "Kota Kinabalu", "Bangkok", "Chiang Mai", "Jakarta", "Manila"
+]
+SEEDED_PAGE_SIZE = 20
+
+
+class QueryShape(NamedTuple):
+    """One query as a route or service issues it"""
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    index: str
+    sort: Optional[List[Tuple[str, int]]] = None
+    limit: int = 0
+    projection: Optional[Dict[str, Any]] = None
+    in_order: bool = True  # The index should provide the sort order
+    gated: bool = True  # Fail on the examined/returned ratio (otherwise only recorded)
+
+
+async def seed(db, scale: int, rng: random.Random) -> Dict[str, Any]:
+    """
+    Insert synthetic documents and return sample values for the query shapes
+
+    Args:
+        db: Scratch database
+        scale: Number of users (each has 2 pets with 25 symptom checks)
+        rng: Random source, seeded for repeatable data
+    """
+    now = datetime.utcnow()
+    season = get_season(now)
+    users, pets, checks, history, summaries, summary_history = [], [], [], [], [], []
+
+    for u in range(scale):
+        user_id = ObjectId()
+        users.append({"_id": user_id, "email": f"owner{u}@example.com", "name": f"Owner {u}"})
+        for p in range(2):
+            pet_id = ObjectId()
+            pets.append({
+                "_id": pet_id,
+                "userId": str(user_id),
+                "name": f"Pet {u}-{p}",
+                "createdAt": now - timedelta(days=rng.randint(1, 900))
+            })
+            for _ in range(25):
+                timestamp = now - timedelta(minutes=rng.randint(1, 525600))
+                check = {
+                    "userId": str(user_id),
+                    "petId": str(pet_id),
+                    "category": "health",
+                    "symptoms": "Occasional sneezing",
+                    "riskLevel": rng.choice(["low_risk", "monitor", "urgent"]),
+                    "summary": "Synthetic check",
+                    "immediateActions": [],
+                    "resolved": rng.random() < 0.4,
+                    "timestamp": timestamp
+                }
+                if rng.random() < 0.3:
+                    check["updatedAt"] = timestamp + timedelta(minutes=rng.randint(1, 10000))
+                checks.append(check)
+            for _ in range(5):
+                history.append({"petId": str(pet_id), "date": now - timedelta(days=rng.randint(1, 2000))})
+            summaries.append({
+                "petId": str(pet_id),
+                "season": season if rng.random() < 0.9 else "Stale",
+                "generatedAt": now - timedelta(days=rng.randint(1, 90))
+            })
+            for _ in range(6):
+                summary_history.append({
+                    "petId": str(pet_id),
+                    "generatedAt": now - timedelta(days=rng.randint(1, 365))
+                })
+
+    providers = [
+        {
+            "name": f"Clinic {i}",
+            "city": CITIES[i % len(CITIES)],
+            "is24x7": rng.random() < 0.2,
+            "latitude": 1.3,
+            "longitude": 103.8
+        }
+        for i in range(scale * 2)
+    ]
+    jobs = [
+        {
+            "type": PET_SUMMARY_JOB,
+            "status": "succeeded",
+            "dedupeKey": f"pet_summary:{i}",
+            "runAt": now - timedelta(minutes=i),
+            "createdAt": now - timedelta(minutes=i)
+        }
+        for i in range(scale * 10)
+    ]
+    jobs += [
+        {"type": PET_SUMMARY_JOB, "dedupeKey": f"queued:{i}", "active": True, "status": QUEUED,
+         "runAt": now - timedelta(seconds=i)}
+        for i in range(10)
+    ]
+    jobs += [
+        {"type": FOLLOWUP_SUMMARY_JOB, "dedupeKey": f"running:{i}", "active": True, "status": RUNNING,
+         "runAt": now, "leaseExpiresAt": now + timedelta(minutes=2)}
+        for i in range(3)
+    ]
+
+    for name, docs in (
+        ("users", users), ("pets", pets), ("symptom_checks", checks), ("medical_history", history),
+        ("pet_health_summaries", summaries), ("pet_health_summary_history", summary_history),
+        ("providers", providers), (job_queue.collection_name, jobs)
+    ):
+        for start in range(0, len(docs), 1000):
+            await db[name].insert_many(docs[start:start + 1000])
+
+    user_id = str(users[0]["_id"])
+    pet_id = str(pets[0]["_id"])
+    first_page = await db.symptom_checks.find(
+        {"userId": user_id}
+    ).sort(KEYSET_SORT).limit(SEEDED_PAGE_SIZE).to_list(length=SEEDED_PAGE_SIZE)
+    return {
+        "now": now,
+        "season": season,
+        "email": users[0]["email"],
+        "userId": user_id,
+        "petId": pet_id,
+        "cursor": encode_cursor(first_page[-1]),
+        "summaryGeneratedAt": now - timedelta(days=3)
+    }
+
+
+def hot_queries(sample: Dict[str, Any]) -> List[QueryShape]:
+    """The query shapes issued by the routes and services, with seeded sample values"""
+    user_id, pet_id = sample["userId"], sample["petId"]
+    page = SEEDED_PAGE_SIZE + 1  # fetch_page reads one extra document
+    return [
+        QueryShape("auth.user_by_email", "users", {"email": sample["email"]}, "email_1", limit=1),
+        QueryShape("pets.list", "pets", {"userId": user_id}, "userId_1_createdAt_-1", sort=[("createdAt", -1)]),
+        QueryShape(
+            "symptom_checks.history", "symptom_checks", {"userId": user_id},
+            "userId_1_timestamp_-1__id_-1", sort=KEYSET_SORT, limit=page, projection=LIST_PROJECTION
+        ),
+        QueryShape(
+            "symptom_checks.history_next_page", "symptom_checks",
+            keyset_query({"userId": user_id}, sample["cursor"]),
+            "userId_1_timestamp_-1__id_-1", sort=KEYSET_SORT, limit=page, projection=LIST_PROJECTION
+        ),
+        QueryShape(
+            "symptom_checks.pet_history", "symptom_checks", {"petId": pet_id, "userId": user_id},
+            "petId_1_timestamp_-1__id_-1", sort=KEYSET_SORT, limit=page, projection=LIST_PROJECTION
+        ),
+        QueryShape(
+            "pet_context.recent_checks", "symptom_checks", {"petId": pet_id},
+            "petId_1_timestamp_-1__id_-1", sort=[("timestamp", -1)], limit=5
+        ),
+        QueryShape(
+            "pet_summary.all_checks", "symptom_checks", {"petId": pet_id},
+            "petId_1_timestamp_-1__id_-1", sort=[("timestamp", -1)], limit=100
+        ),
+        QueryShape(
+            "pet_summary.changed_checks", "symptom_checks",
+            changed_checks_query(pet_id, sample["summaryGeneratedAt"]),
+            "petId_1_updatedAt_-1", sort=[("timestamp", -1)], limit=6, in_order=False
+        ),
+        QueryShape("pets.medical_history", "medical_history", {"petId": pet_id}, "petId_1_date_-1", sort=[("date", -1)]),
+        QueryShape("pet_summary.current", "pet_health_summaries", {"petId": pet_id}, "petId_1", limit=1),
+        QueryShape(
+            "pet_summary.history", "pet_health_summary_history", {"petId": pet_id},
+            "petId_1_generatedAt_-1", sort=[("generatedAt", -1)], limit=100
+        ),
+        # Walks summaries in petId order looking for stale ones, so the ratio
+        # is the share of current summaries by design
+        QueryShape(
+            "season_refresh.stale_batch", "pet_health_summaries",
+            {"season": {"$ne": sample["season"]}, "petId": {"$gt": ""}},
+            "petId_1", sort=[("petId", 1)], limit=season_refresher.batch_size,
+            projection={"petId": 1}, gated=False
+        ),
+        QueryShape(
+            "providers.search_city", "providers", {"city": {"$regex": "kuala", "$options": "i"}},
+            "city_1", in_order=False
+        ),
+        QueryShape(
+            "providers.search_city_24x7", "providers",
+            {"city": {"$regex": "kuala", "$options": "i"}, "is24x7": True},
+            "is24x7_1_city_1", in_order=False
+        ),
+        QueryShape("providers.emergency_24x7", "providers", {"is24x7": True}, "is24x7_1_city_1", in_order=False),
+        # Every claim also checks the running jobs for expired leases, a few per worker
+        QueryShape(
+            "jobs.claim", job_queue.collection_name,
+            {
+                "type": {"$in": [PET_SUMMARY_JOB, FOLLOWUP_SUMMARY_JOB]},
+                "$or": [
+                    {"status": QUEUED, "runAt": {"$lte": sample["now"]}},
+                    {"status": RUNNING, "leaseExpiresAt": {"$lte": sample["now"]}}
+                ]
+            },
+            "status_1_runAt_1", sort=[("runAt", 1)], limit=1, gated=False
+        )
+    ]
+
+
+def plan_stages(node: Any) -> List[Tuple[str, Optional[str]]]:
+    """(stage, indexName) for every stage of a plan tree, classic or slot-based"""
+    stages = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if not isinstance(current, dict):
+            continue
+        if "stage" in current:
+            stages.append((current["stage"], current.get("indexName")))
+        for key in ("inputStage", "queryPlan", "outerStage", "innerStage"):
+            if key in current:
+                stack.append(current[key])
+        stack.extend(current.get("inputStages", []))
+    return stages
+
+
+async def explain(db, shape: QueryShape, max_ratio: float) -> Dict[str, Any]:
+    """Explain one query shape and judge its winning plan"""
+    command: Dict[str, Any] = {"find": shape.collection, "filter": shape.filter}
+    if shape.sort:
+        command["sort"] = dict(shape.sort)
+    if shape.limit:
+        command["limit"] = shape.limit
+    if shape.projection:
+        command["projection"] = shape.projection
+    result = await db.command({"explain": command, "verbosity": "executionStats"})
+
+    stages = plan_stages(result["queryPlanner"]["winningPlan"])
+    stage_names = {stage for stage, _ in stages}
+    indexes = sorted({index for _, index in stages if index})
+    execution = result["executionStats"]
+    returned = execution["nReturned"]
+    ratio = execution["totalDocsExamined"] / max(returned, 1)
+
+    problems = []
+    if "COLLSCAN" in stage_names:
+        problems.append("COLLSCAN")
+    if shape.index not in indexes:
+        problems.append(f"expected index {shape.index}")
+    if shape.in_order and shape.sort and "SORT" in stage_names:
+        problems.append("in-memory SORT")
+    if shape.gated and ratio > max_ratio:
+        problems.append(f"examined {ratio:.1f}x the documents returned")
+
+    return {
+        "name": shape.name,
+        "indexes": indexes,
+        "stages": sorted(stage_names),
+        "returned": returned,
+        "keysExamined": execution["totalKeysExamined"],
+        "docsExamined": execution["totalDocsExamined"],
+        "docsPerReturned": round(ratio, 2),
+        "keysPerReturned": round(execution["totalKeysExamined"] / max(returned, 1), 2),
+        "gated": shape.gated,
+        "problems": problems
+    }
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the query plans of the hot MongoDB queries")
+    parser.add_argument("--database", default=f"{settings.database_name}_query_plans", help="Scratch database")
+    parser.add_argument("--scale", type=int, default=200, help="Synthetic users to seed")
+    parser.add_argument("--max-ratio", type=float, default=2.0, help="Allowed documents examined per document returned")
+    parser.add_argument("--json", default=None, help="Write the results to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database")
+    args = parser.parse_args()
+
+    if args.database == settings.database_name:
+        print("Refusing to seed the app database; pass a different --database")
+        return 2
+
+    settings.database_name = args.database
+    await connect_to_mongo()
+    db = get_database()
+    try:
+        await db.client.drop_database(args.database)
+        await index_registry.apply()
+        sample = await seed(db, args.scale, random.Random(42))
+
+        results = [await explain(db, shape, args.max_ratio) for shape in hot_queries(sample)]
+        print(f"{'query':<36} {'index':<32} {'returned':>8} {'keys':>7} {'docs':>7} {'docs/ret':>8}")
+        for result in results:
+            print(
+                f"{result['name']:<36} {','.join(result['indexes']) or '-':<32} {result['returned']:>8} "
+                f"{result['keysExamined']:>7} {result['docsExamined']:>7} {result['docsPerReturned']:>8}"
+                + ("" if result["gated"] else "  (not gated)")
+            )
+            for problem in result["problems"]:
+                print(f"  - FAIL: {problem}")
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"maxRatio": args.max_ratio, "scale": args.scale, "queries": results}, f, indent=2)
+
+        failed = [result["name"] for result in results if result["problems"]]
+        print(f"{len(results) - len(failed)}/{len(results)} queries passed")
+        return 1 if failed else 0
+    finally:
+        if not args.keep:
+            await db.client.drop_database(args.database)
+        ai_service.executor.shutdown()
+        ai_service.image_pipeline.shutdown()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,89 @@
+"""
+Check and build the declared MongoDB indexes
+
+Without options, prints the drift between the declared indexes (see
+app/services/index_registry.py) and the ones in MongoDB: missing,
+mismatched and undeclared indexes. The app only builds missing indexes at
+startup on collections below INDEX_STARTUP_BUILD_MAX_DOCUMENTS; use
+--build to create the rest, one at a time, as background builds.
+
+Usage:
+    python manage_indexes.py [--build] [--drop-extra] [--collection NAME]
+
+    --build         Create every missing index, whatever the collection size
+    --drop-extra    Drop indexes that are not declared (never _id_)
+    --collection    Only build or drop on this collection
+
+Exits with status 1 while declared indexes are still missing or mismatched.
+"""
+import argparse
+import asyncio
+import sys
+
+from app.database import connect_to_mongo, close_mongo_connection, get_database
+from app.services.ai_service import ai_service
+from app.services.job_queue import job_queue  # noqa: F401 - declares the job queue indexes
+from app.services.index_registry import index_registry
+
+
+def print_report(report) -> None:
+    for collection, info in report["collections"].items():
+        print(f"  {collection}: ~{info['documents']} documents, {info['indexes']} indexes")
+    for item in report["missing"]:
+        print(f"  MISSING     {item['collection']}.{item['name']} {item['keys']}")
+    for item in report["mismatched"]:
+        print(f"  MISMATCHED  {item['collection']}.{item['name']} declared {item['declared']}, actual {item['actual']}")
+    for item in report["extra"]:
+        print(f"  EXTRA       {item['collection']}.{item['name']} {item['keys']}")
+    if not (report["missing"] or report["mismatched"] or report["extra"]):
+        print("  All declared indexes are present, no drift")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Check and build the declared MongoDB indexes")
+    parser.add_argument("--build", action="store_true", help="Create missing indexes in the background")
+    parser.add_argument("--drop-extra", action="store_true", help="Drop undeclared indexes")
+    parser.add_argument("--collection", default=None, help="Only build or drop on this collection")
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    try:
+        report = await index_registry.check()
+        print(f"Declared indexes: {len(index_registry.specs())}")
+        print_report(report)
+
+        if args.build:
+            missing = {
+                (item["collection"], item["name"]) for item in report["missing"]
+                if args.collection in (None, item["collection"])
+            }
+            specs = [spec for spec in index_registry.specs() if (spec.collection, spec.name) in missing]
+            for spec in specs:
+                print(f"Building {spec.collection}.{spec.name} ...")
+                created, failed = await index_registry.build([spec], background=True)
+                if created:
+                    print("  - Done")
+                for failure in failed:
+                    print(f"  - Failed: {failure['error']}")
+
+        if args.drop_extra:
+            db = get_database()
+            for item in report["extra"]:
+                if args.collection in (None, item["collection"]):
+                    print(f"Dropping {item['collection']}.{item['name']}")
+                    await db[item["collection"]].drop_index(item["name"])
+
+        if args.build or args.drop_extra:
+            report = await index_registry.check()
+            print("After changes:")
+            print_report(report)
+
+        return 1 if report["missing"] or report["mismatched"] else 0
+    finally:
+        ai_service.executor.shutdown()
+        ai_service.image_pipeline.shutdown()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,124 @@
+"""
+Move inline base64 media out of existing symptom checks into the media store
+
+Symptom checks saved before the media store kept their photos and video as
+base64 in ``images``/``video``, and chat photos as data URLs in
+``messages``. This rewrites them in _id order, a batch at a time: the
+uploads are stored (deduplicated by SHA-256), the check gets ``media``
+references with thumbnails, chat photos become media URLs, and the inline
+fields are removed. Uploads that can't be decoded are never dropped: they
+are moved to ``unmigratedMedia`` for inspection (chat photos stay inline).
+Migrated checks no longer match, so an interrupted run can simply be
+started again.
+
+Usage:
+    python migrate_media.py [--dry-run] [--batch-size N] [--limit N]
+
+    --dry-run       Only count the checks that still hold inline media
+    --batch-size    Checks loaded per batch (default 20; each may be several MB)
+    --limit         Stop after migrating this many checks
+"""
+from typing import Tuple
+import argparse
+import asyncio
+
+from app.database import connect_to_mongo, close_mongo_connection, get_database
+from app.services.ai_service import ai_service
+from app.services.media_store import media_store, externalize_message_images
+
+
+# Checks that still hold inline uploads
+INLINE_MEDIA_FILTER = {
+    "$or": [
+        {"images": {"$exists": True}},
+        {"video": {"$exists": True}},
+        {"messages.image": {"$regex": "^data:"}}
+    ]
+}
+
+
+async def migrate_check(db, check) -> Tuple[int, int]:
+    """
+    Move one check's inline media to the media store
+
+    Returns:
+        (uploads stored, uploads kept in unmigratedMedia); chat photos not included
+    """
+    media = list(check.get("media", []))
+    unmigrated = list(check.get("unmigratedMedia", []))
+    uploads = [(image, "image/jpeg") for image in check.get("images") or []]
+    if check.get("video"):
+        uploads.append((check["video"], "video/mp4"))
+
+    for data, mime_type in uploads:
+        try:
+            media.append(await media_store.save_base64(data, mime_type))
+        except ValueError as e:
+            # Keep the original so nothing is lost; it no longer matches INLINE_MEDIA_FILTER
+            print(f"  - Check {check['_id']}: keeping undecodable upload in unmigratedMedia ({e})")
+            unmigrated.append({"data": data, "mimeType": mime_type, "error": str(e)})
+
+    messages = check.get("messages") or []
+    message_media = await externalize_message_images(messages, check.get("messageMedia", []))
+
+    update = {"media": media, "messages": messages, "messageMedia": message_media}
+    if unmigrated:
+        update["unmigratedMedia"] = unmigrated
+    await db.symptom_checks.update_one(
+        {"_id": check["_id"]},
+        {"$set": update, "$unset": {"images": "", "video": ""}}
+    )
+    return (
+        len(media) - len(check.get("media", [])),
+        len(unmigrated) - len(check.get("unmigratedMedia", []))
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Move inline symptom check media into the media store")
+    parser.add_argument("--dry-run", action="store_true", help="Only count checks with inline media")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        remaining = await db.symptom_checks.count_documents(INLINE_MEDIA_FILTER)
+        print(f"Symptom checks with inline media: {remaining}")
+        if args.dry_run or not remaining:
+            return
+
+        migrated = 0
+        stored = 0
+        kept = 0
+        last_id = None
+        while args.limit is None or migrated < args.limit:
+            size = args.batch_size if args.limit is None else min(args.batch_size, args.limit - migrated)
+            query = dict(INLINE_MEDIA_FILTER)
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            batch = await db.symptom_checks.find(query).sort("_id", 1).limit(size).to_list(length=size)
+            if not batch:
+                break
+
+            for check in batch:
+                check_stored, check_kept = await migrate_check(db, check)
+                stored += check_stored
+                kept += check_kept
+            migrated += len(batch)
+            last_id = batch[-1]["_id"]
+            print(f"Migrated {migrated}/{remaining} checks ({stored} uploads stored), at _id {last_id}")
+
+        print(f"Done: {migrated} checks migrated, {stored} uploads stored")
+        if kept:
+            print(f"{kept} undecodable uploads kept in unmigratedMedia on their checks")
+        print(f"Media store: {media_store.stats()}")
+    finally:
+        ai_service.executor.shutdown()
+        ai_service.image_pipeline.shutdown()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
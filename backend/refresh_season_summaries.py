@@ -0,0 +1,65 @@
+"""
+Regenerate pet health summaries made stale by a season change
+
+Runs the same checkpointed batch refresh as the in-app scheduler. An
+interrupted run resumes after the last completed batch; a run already in
+progress in another process is left alone. Summaries are regenerated as
+pet summary jobs; this script runs job workers for them alongside any
+running app processes.
+
+Usage:
+    python refresh_season_summaries.py [--now] [--dry-run]
+        [--concurrency N] [--max-per-minute N]
+
+    --now        Ignore the off-peak window and run until every stale summary is refreshed
+    --dry-run    Only count the summaries that are out of date
+"""
+import argparse
+import asyncio
+import json
+
+from app.config import settings
+from app.database import connect_to_mongo, close_mongo_connection
+from app.services.ai_service import ai_service
+from app.services.job_queue import job_queue
+from app.services.pet_summary import PET_SUMMARY_JOB, run_pet_summary_job
+from app.services.season_refresh import SeasonSummaryRefresher
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Refresh season-stale pet health summaries")
+    parser.add_argument("--now", action="store_true", help="Ignore the off-peak window")
+    parser.add_argument("--dry-run", action="store_true", help="Only count stale summaries")
+    parser.add_argument("--concurrency", type=int, default=settings.season_refresh_concurrency)
+    parser.add_argument("--max-per-minute", type=float, default=settings.season_refresh_max_per_minute)
+    args = parser.parse_args()
+
+    refresher = SeasonSummaryRefresher(
+        concurrency=args.concurrency,
+        max_per_minute=args.max_per_minute,
+        window_start_hour=settings.season_refresh_window_start_hour,
+        window_end_hour=settings.season_refresh_window_end_hour
+    )
+
+    await connect_to_mongo()
+    try:
+        if not args.now and not args.dry_run and not refresher.in_window():
+            print(
+                f"Outside the off-peak window ({refresher.window_start_hour:02d}:00-"
+                f"{refresher.window_end_hour:02d}:00). Use --now to run anyway."
+            )
+            return
+        if not args.dry_run:
+            job_queue.register(PET_SUMMARY_JOB, run_pet_summary_job)
+            job_queue.start()
+        result = await refresher.run(respect_window=not args.now, dry_run=args.dry_run)
+        print(json.dumps(result, indent=2, default=str))
+    finally:
+        await job_queue.stop()
+        ai_service.executor.shutdown()
+        ai_service.image_pipeline.shutdown()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
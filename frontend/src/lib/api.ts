@@ -297,6 +297,38 @@ export interface SymptomCheckResponse {
   resolvedAt?: string;
 }
 
+// Symptom check as returned by the history lists (no report sections or chat)
+export interface SymptomCheckListItem {
+  id: string;
+  userId?: string;
+  petId?: string;
+  category: string;
+  healthSubcategory?: string;
+  symptoms: string;
+  riskLevel: string;
+  summary: string;
+  immediateActions: string[];
+  mediaCount: number;
+  feedback?: 'up' | 'down';
+  resolved?: boolean;
+  resolvedAt?: string;
+  timestamp: string;
+}
+
+// Optional paging for the history lists; the next cursor comes back in the X-Next-Cursor header
+export interface SymptomCheckPageParams {
+  limit?: number;
+  cursor?: string;
+}
+
+const pageQuery = (params?: SymptomCheckPageParams) => {
+  const query = new URLSearchParams();
+  if (params?.limit) query.set('limit', String(params.limit));
+  if (params?.cursor) query.set('cursor', params.cursor);
+  const text = query.toString();
+  return text ? `?${text}` : '';
+};
+
 export interface SymptomCheckCreate {
   petId?: string;
   category: string;
@@ -317,12 +349,12 @@ export const symptomCheckApi = {
   },
 
   // Get all symptom checks for current user
-  getAllSymptomChecks: () =>
-    api.get<SymptomCheckResponse[]>('/api/v1/symptom-checks'),
+  getAllSymptomChecks: (params?: SymptomCheckPageParams) =>
+    api.get<SymptomCheckListItem[]>(`/api/v1/symptom-checks${pageQuery(params)}`),
 
   // Get symptom checks for a specific pet
-  getPetSymptomChecks: (petId: string) =>
-    api.get<SymptomCheckResponse[]>(`/api/v1/symptom-checks/pet/${petId}`),
+  getPetSymptomChecks: (petId: string, params?: SymptomCheckPageParams) =>
+    api.get<SymptomCheckListItem[]>(`/api/v1/symptom-checks/pet/${petId}${pageQuery(params)}`),
 
   // Get specific symptom check
   getSymptomCheck: (checkId: string) =>
@@ -452,11 +484,16 @@ export const recommendationsApi = {
   },
   
   // Ask follow-up questions in symptom checker using Gemini AI
-  askSymptomFollowup: (question: string, conversationContext: string) => {
+  // With a check ID the server holds the conversation, so only the question is sent
+  askSymptomFollowup: (question: string, conversationContext: string, checkId?: string | null) => {
     const queryParams = new URLSearchParams();
     queryParams.append('question', question);
-    queryParams.append('conversation_context', conversationContext);
-    return api.post<{ question: string; answer: string; source: string }>(
+    if (checkId) {
+      queryParams.append('check_id', checkId);
+    } else {
+      queryParams.append('conversation_context', conversationContext);
+    }
+    return api.post<{ question: string; answer: string; source: string; checkId?: string; turn?: number }>(
       `/api/v1/recommendations/symptom-followup?${queryParams.toString()}`,
       {}
     );
@@ -29,7 +29,7 @@ import { useAuth } from '@/contexts/AuthContext';
 import { DOG_BREEDS } from '@/data/mockData';
 import { toast } from 'sonner';
 import { Pet } from '@/types';
-import { symptomCheckApi, recommendationsApi, api, type SymptomCheckResponse } from '@/lib/api';
+import { symptomCheckApi, recommendationsApi, api, type SymptomCheckResponse, type SymptomCheckListItem } from '@/lib/api';
 import { ChatHistoryViewer } from '@/components/ChatHistoryViewer';
 
 // Top 50 common medical conditions in dogs
@@ -267,7 +267,7 @@ const PetProfile: React.FC = () => {
   const [errors, setErrors] = useState<Record<string, string>>({});
   const [selectedPet, setSelectedPet] = useState<Pet | null>(null);
   const [showDetailDialog, setShowDetailDialog] = useState(false);
-  const [symptomCheckHistory, setSymptomCheckHistory] = useState<SymptomCheckResponse[]>([]);
+  const [symptomCheckHistory, setSymptomCheckHistory] = useState<SymptomCheckListItem[]>([]);
   const [loadingHistory, setLoadingHistory] = useState(false);
   const [selectedSymptomCheck, setSelectedSymptomCheck] = useState<SymptomCheckResponse | null>(null);
   const [showHistoryViewer, setShowHistoryViewer] = useState(false);
@@ -552,8 +552,9 @@ const PetProfile: React.FC = () => {
     
     try {
       // Call the backend API to generate AI-powered summary
-      // Pass force_refresh parameter to bypass cache
-      const url = `/api/v1/recommendations/pet-summary/${pet.id}${forceRefresh ? '?force_refresh=true' : ''}`;
+      // Pass force_refresh parameter to bypass cache, and wait for the fresh summary
+      // (otherwise the cached summary is returned while it regenerates in the background)
+      const url = `/api/v1/recommendations/pet-summary/${pet.id}${forceRefresh ? '?force_refresh=true&wait=true' : ''}`;
       const response = await api.post<{
         petId: string;
         petName: string;
@@ -563,8 +564,18 @@ const PetProfile: React.FC = () => {
         checksAnalyzed: number;
         source: string;
         cached: boolean;
+        regenerating?: boolean;
       }>(url, {});
       
+      if (!response.summary) {
+        // Still generating in the background - it will be shown on the next open
+        toast.info(`Generating summary for ${response.petName}`, {
+          description: 'This is taking a little longer than usual. Please check back in a moment.'
+        });
+        setShowSummaryDialog(false);
+        return;
+      }
+      
       // Set the summary from the API response
       setPetSummary(response.summary);
       
@@ -577,6 +588,10 @@ const PetProfile: React.FC = () => {
         toast.success(`Fresh summary generated for ${response.petName}`, {
           description: `Analyzed ${response.checksAnalyzed} health conversation(s)`
         });
+      } else if (response.regenerating) {
+        toast.info(`Showing last summary for ${response.petName}`, {
+          description: 'An updated summary is being generated in the background'
+        });
       } else if (response.cached) {
         toast.info(`Showing cached summary for ${response.petName}`, {
           description: 'No new chat history since last generation'
@@ -717,6 +732,18 @@ const PetProfile: React.FC = () => {
     }
   };
 
+  // History items are list summaries; load the full check (with chat messages) to view it
+  const openHistoryCheck = async (checkId: string) => {
+    try {
+      const check = await symptomCheckApi.getSymptomCheck(checkId);
+      setSelectedSymptomCheck(check);
+      setShowHistoryViewer(true);
+    } catch (error) {
+      console.error('Failed to load symptom check:', error);
+      toast.error('Failed to load symptom check');
+    }
+  };
+
   const toggleHistorySelection = (checkId: string) => {
     setSelectedHistoryItems(prev => {
       const newSet = new Set(prev);
@@ -1583,19 +1610,13 @@ const PetProfile: React.FC = () => {
                                   
                                   <div
                                     className={`w-10 h-10 rounded-full ${getRiskColor(check.riskLevel)} flex items-center justify-center flex-shrink-0`}
-                                    onClick={() => {
-                                      setSelectedSymptomCheck(check);
-                                      setShowHistoryViewer(true);
-                                    }}
+                                    onClick={() => openHistoryCheck(check.id)}
                                   >
                                     <RiskIcon className="w-5 h-5 text-white" />
                                   </div>
                                   <div
                                     className="flex-1 min-w-0"
-                                    onClick={() => {
-                                      setSelectedSymptomCheck(check);
-                                      setShowHistoryViewer(true);
-                                    }}
+                                    onClick={() => openHistoryCheck(check.id)}
                                   >
                                     <div className="flex items-center gap-2 mb-1">
                                       <Badge variant="outline" className="text-xs">
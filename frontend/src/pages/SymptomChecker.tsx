@@ -1202,9 +1202,11 @@ const SymptomChecker: React.FC = () => {
           );
         } else {
           // Use general symptom follow-up API for situation questions
+          // Only saved (signed-in) checks hold a server-side session; anonymous chats send their context
           response = await recommendationsApi.askSymptomFollowup(
             question,
-            conversationContext
+            conversationContext,
+            isAuthenticated ? currentCheckId : null
           );
         }
 
@@ -1225,7 +1227,8 @@ const SymptomChecker: React.FC = () => {
 
         const response = await recommendationsApi.askSymptomFollowup(
           question,
-          conversationContext
+          conversationContext,
+          isAuthenticated ? currentCheckId : null
         );
 
         addBotMessage(response.answer || 'I apologize, but I couldn\'t generate a proper answer. Could you rephrase your question?');